@@ -14,10 +14,10 @@ import {
 } from '@/components';
 import { Theme } from '@/constants';
 import { useAuth } from '@/contexts/AuthContext';
-import { Boulder, deleteAscent, getBoulder, getGyms, logAscent, Gym } from '@/services/api';
+import { Ascent, Boulder, deleteAscent, getBoulder, getBoulderAscents, getGyms, logAscent, Gym } from '@/services/api';
 import AsyncStorage from '@react-native-async-storage/async-storage';
 import { useLocalSearchParams, useRouter } from 'expo-router';
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import {
   ActivityIndicator,
   SafeAreaView,
@@ -30,9 +30,14 @@ import {
   View,
   ViewStyle,
   RefreshControl,
+  NativeScrollEvent,
+  NativeSyntheticEvent,
 } from 'react-native';
 import { Button, ThemedText } from '@/components';
 
+// Start loading the next page of ascents this many pixels before the end of the list
+const LOAD_MORE_THRESHOLD = 400;
+
 interface AscentDisplay {
   id: number;
   climberName: string;
@@ -57,6 +62,10 @@ export default function RouteDetailScreen() {
   const [selectedGymId, setSelectedGymId] = useState<number | null>(null);
   const [modalVisible, setModalVisible] = useState(false);
   const [ascents, setAscents] = useState<AscentDisplay[]>([]);
+  const [ascentsNext, setAscentsNext] = useState<string | null>(null);
+  const [loadingMoreAscents, setLoadingMoreAscents] = useState(false);
+  // Bumped per boulder load, so a page requested for the previous load is dropped
+  const requestRef = useRef(0);
 
   // Load saved gym ID and fetch gyms on mount
   useEffect(() => {
@@ -97,49 +106,79 @@ export default function RouteDetailScreen() {
     }
   };
 
+  const toAscentDisplay = (ascent: Ascent, position: number, difficulty: string): AscentDisplay => {
+    // Get climber name from climber_details if available
+    let climberName = 'Unknown Climber';
+    if (ascent.climber_details) {
+      const { first_name, last_name, username } = ascent.climber_details;
+      if (first_name && last_name) {
+        climberName = `${first_name} ${last_name}`;
+      } else if (username) {
+        climberName = username;
+      }
+    }
+    
+    return {
+      id: ascent.id,
+      climberName,
+      date: new Date(ascent.date_climbed).toLocaleDateString('en-US', {
+        month: '2-digit',
+        day: '2-digit',
+        year: 'numeric',
+      }),
+      rating: getDifficultyFromBoulder(difficulty),
+      isFlash: ascent.ascent_type === 'flash',
+      position,
+    };
+  };
+
   const loadBoulderDetails = async (boulderId: number) => {
+    const request = ++requestRef.current;
     try {
       setLoading(true);
       setError(null);
       const boulderData = await getBoulder(boulderId);
+      if (request !== requestRef.current) return;
       setBoulder(boulderData);
       
-      // Transform ascents data
+      // The detail embeds the newest page of ascents; the rest load from ascents_next
       if (boulderData.ascents && Array.isArray(boulderData.ascents)) {
-        const transformedAscents: AscentDisplay[] = boulderData.ascents.map((ascent, index) => {
-          // Get climber name from climber_details if available
-          let climberName = 'Unknown Climber';
-          if (ascent.climber_details) {
-            const { first_name, last_name, username } = ascent.climber_details;
-            if (first_name && last_name) {
-              climberName = `${first_name} ${last_name}`;
-            } else if (username) {
-              climberName = username;
-            }
-          }
-          
-          return {
-            id: ascent.id,
-            climberName,
-            date: new Date(ascent.date_climbed).toLocaleDateString('en-US', {
-              month: '2-digit',
-              day: '2-digit',
-              year: 'numeric',
-            }),
-            rating: getDifficultyFromBoulder(boulderData.difficulty),
-            isFlash: ascent.ascent_type === 'flash',
-            position: index + 1,
-          };
-        });
-        setAscents(transformedAscents);
+        setAscents(boulderData.ascents.map((ascent, index) => toAscentDisplay(ascent, index + 1, boulderData.difficulty)));
       } else {
         setAscents([]);
       }
+      setAscentsNext(boulderData.ascents_next ?? null);
     } catch (err) {
       console.error('Failed to load boulder details:', err);
       setError('Failed to load route details');
     } finally {
-      setLoading(false);
+      if (request === requestRef.current) setLoading(false);
+    }
+  };
+
+  const loadMoreAscents = async () => {
+    if (!boulder || !ascentsNext || loadingMoreAscents || loading) return;
+    const request = requestRef.current;
+    setLoadingMoreAscents(true);
+    try {
+      const page = await getBoulderAscents(boulder.id, ascentsNext);
+      if (request !== requestRef.current) return;
+      setAscents(current => [
+        ...current,
+        ...page.results.map((ascent, index) => toAscentDisplay(ascent, current.length + index + 1, boulder.difficulty)),
+      ]);
+      setAscentsNext(page.next);
+    } catch (err) {
+      console.error('Failed to load more ascents:', err);
+    } finally {
+      setLoadingMoreAscents(false);
+    }
+  };
+
+  const handleScroll = ({ nativeEvent }: NativeSyntheticEvent<NativeScrollEvent>) => {
+    const { layoutMeasurement, contentOffset, contentSize } = nativeEvent;
+    if (layoutMeasurement.height + contentOffset.y >= contentSize.height - LOAD_MORE_THRESHOLD) {
+      loadMoreAscents();
     }
   };
 
@@ -319,6 +358,8 @@ export default function RouteDetailScreen() {
           style={styles.scrollView}
           contentContainerStyle={styles.contentContainer}
           showsVerticalScrollIndicator={false}
+          onScroll={handleScroll}
+          scrollEventThrottle={200}
           refreshControl={
             <RefreshControl
               refreshing={refreshing}
@@ -338,7 +379,7 @@ export default function RouteDetailScreen() {
               {/* Sends Header */}
               <View style={styles.sendsHeader}>
                 <ThemedText variant="heading2" style={styles.sendsTitle}>
-                  Sends ({ascents.length})
+                  Sends ({boulder?.num_ascents ?? ascents.length})
                 </ThemedText>
               </View>
 
@@ -362,6 +403,9 @@ export default function RouteDetailScreen() {
                     />
                   ))
                 )}
+                {loadingMoreAscents && (
+                  <ActivityIndicator style={styles.loadingMore} color={Theme.colors.primary[500]} />
+                )}
               </View>
             </>
           )}
@@ -402,6 +446,7 @@ const styles = StyleSheet.create<{
   ascentListItemWithMargin: ViewStyle;
   loadingContainer: ViewStyle;
   loadingText: TextStyle;
+  loadingMore: ViewStyle;
   errorContainer: ViewStyle;
   errorText: TextStyle;
   emptyContainer: ViewStyle;
@@ -497,6 +542,9 @@ const styles = StyleSheet.create<{
     fontSize: 14,
     color: Theme.colors.neutral[500],
   },
+  loadingMore: {
+    marginTop: 12,
+  },
   errorContainer: {
     backgroundColor: Theme.colors.error[500],
     paddingHorizontal: 20,
@@ -1,5 +1,5 @@
 import { Theme } from '@/constants';
-import { StyleSheet, View, ScrollView, SafeAreaView, StatusBar, ActivityIndicator, RefreshControl } from 'react-native';
+import { StyleSheet, View, ScrollView, SafeAreaView, StatusBar, ActivityIndicator, RefreshControl, NativeScrollEvent, NativeSyntheticEvent } from 'react-native';
 import { useAuth } from '@/contexts/AuthContext';
 import { Button, ThemedText, LeaderboardListItem, BlueLeaderboardListItem, InputField, CaretDownIcon } from '@/components';
 import { useRouter } from 'expo-router';
@@ -10,6 +10,10 @@ import { getLeaderboard, getGyms, Gym, LeaderboardEntry } from '@/services/api';
 const STORAGE_KEY_GYM = '@leaderboard_selected_gym';
 const STORAGE_KEY_TIMEFRAME = '@leaderboard_selected_timeframe';
 const ALL_GYMS_VALUE = 'all';
+// Entries per leaderboard request; further pages load as the list is scrolled
+const PAGE_SIZE = 100;
+// Start loading the next page this many pixels before the end of the list
+const LOAD_MORE_THRESHOLD = 400;
 
 export default function LeaderboardScreen() {
   const { isAuthenticated, isLoading: authLoading } = useAuth();
@@ -23,6 +27,12 @@ export default function LeaderboardScreen() {
   const [leaderboardData, setLeaderboardData] = useState<LeaderboardEntry[]>([]);
   const [yourRanking, setYourRanking] = useState<number | null>(null);
   const [yourUserId, setYourUserId] = useState<number | null>(null);
+  const [hasMore, setHasMore] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Bumped per first-page fetch, so a page requested for the previous filters is dropped
+  const requestRef = useRef(0);
+  // Scroll to the user once per first page, not again whenever another page is appended
+  const scrolledToUserRef = useRef(false);
   const [isLoading, setIsLoading] = useState(true);
   const [refreshing, setRefreshing] = useState(false);
   const [preferencesLoaded, setPreferencesLoaded] = useState(false);
@@ -69,7 +79,8 @@ export default function LeaderboardScreen() {
       const userIndex = leaderboardData.findIndex(entry => entry.id === yourUserId);
       
       // Only scroll if user is beyond the top 3 (index 3 or greater)
-      if (userIndex >= 3) {
+      if (userIndex >= 3 && !scrolledToUserRef.current) {
+        scrolledToUserRef.current = true;
         const itemHeight = 56;
         const scrollIndex = userIndex - 3; // First scrollable item is at index 3
         const scrollY = scrollIndex * itemHeight;
@@ -90,24 +101,55 @@ export default function LeaderboardScreen() {
     }
   };
   
+  const leaderboardFilters = () => ({
+    gym_id: selectedGymId === ALL_GYMS_VALUE ? null : parseInt(selectedGymId),
+    only_active: selectedTimeframe === 'Currently Set',
+  });
+  
   const fetchLeaderboard = async (showLoading = true) => {
+    const request = ++requestRef.current;
     if (showLoading) setIsLoading(true);
     try {
-      const gymId = selectedGymId === ALL_GYMS_VALUE ? null : parseInt(selectedGymId);
-      const onlyActive = selectedTimeframe === 'Currently Set';
-      
-      const data = await getLeaderboard({
-        gym_id: gymId,
-        only_active: onlyActive
-      });
+      const data = await getLeaderboard({ ...leaderboardFilters(), limit: PAGE_SIZE });
+      if (request !== requestRef.current) return;
       
+      scrolledToUserRef.current = false;
       setLeaderboardData(data.leaderboard);
+      setHasMore(data.next !== null);
       setYourRanking(data.your_ranking);
       setYourUserId(data.your_user_id);
     } catch (error) {
       console.error('Failed to fetch leaderboard:', error);
     } finally {
-      if (showLoading) setIsLoading(false);
+      if (showLoading && request === requestRef.current) setIsLoading(false);
+    }
+  };
+  
+  const fetchMoreLeaderboard = async () => {
+    if (!hasMore || loadingMore || isLoading) return;
+    const request = requestRef.current;
+    setLoadingMore(true);
+    try {
+      const data = await getLeaderboard({
+        ...leaderboardFilters(),
+        limit: PAGE_SIZE,
+        offset: leaderboardData.length,
+      });
+      if (request !== requestRef.current) return;
+      
+      setLeaderboardData(current => [...current, ...data.leaderboard]);
+      setHasMore(data.next !== null);
+    } catch (error) {
+      console.error('Failed to fetch more of the leaderboard:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+  
+  const handleScroll = ({ nativeEvent }: NativeSyntheticEvent<NativeScrollEvent>) => {
+    const { layoutMeasurement, contentOffset, contentSize } = nativeEvent;
+    if (layoutMeasurement.height + contentOffset.y >= contentSize.height - LOAD_MORE_THRESHOLD) {
+      fetchMoreLeaderboard();
     }
   };
   
@@ -247,6 +289,8 @@ export default function LeaderboardScreen() {
             style={styles.scrollableSection}
             contentContainerStyle={styles.scrollContent}
             showsVerticalScrollIndicator={false}
+            onScroll={handleScroll}
+            scrollEventThrottle={200}
             refreshControl={
               <RefreshControl
                 refreshing={refreshing}
@@ -269,6 +313,9 @@ export default function LeaderboardScreen() {
                 ))}
               </View>
             )}
+            {loadingMore && (
+              <ActivityIndicator style={styles.loadingMore} color={Theme.colors.primary[500]} />
+            )}
           </ScrollView>
         </>
       )}
@@ -367,6 +414,9 @@ const styles = StyleSheet.create({
   loadingText: {
     color: Theme.colors.neutral[600],
   },
+  loadingMore: {
+    paddingBottom: Theme.spacing.lg,
+  },
   emptyContainer: {
     flex: 1,
     justifyContent: 'center',
@@ -68,6 +68,15 @@ export interface Wall {
   name: string;
 }
 
+export interface GymChanges {
+  token: number;
+  reset: boolean; // true: walls/boulders are the whole gym, replace local state
+  walls: Wall[];
+  boulders: Boulder[];
+  removed_walls: number[];
+  removed_boulders: number[];
+}
+
 export interface Boulder {
   id: number;
   wall: number;
@@ -81,7 +90,8 @@ export interface Boulder {
   is_active: boolean;
   num_ascents: number;
   user_has_sent: boolean;
-  ascents?: Ascent[];
+  ascents?: Ascent[]; // detail only: the newest page, see getBoulderAscents
+  ascents_next?: string | null;
   wall_details?: {
     id: number;
     name: string;
@@ -116,23 +126,34 @@ export interface LeaderboardEntry {
   rank: number; // With ties (1, 2, 3, 4, 4, 6...)
 }
 
+export interface LeaderboardPage {
+  count: number; // Climbers on the whole leaderboard
+  next: string | null;
+  previous: string | null;
+  leaderboard: LeaderboardEntry[];
+  your_ranking: number | null;
+  your_index: number | null;
+  your_user_id: number | null;
+}
+
+export interface ProfileAscent {
+  id: number;
+  boulder_id: number;
+  boulder_grade: string;
+  boulder_color: string;
+  wall_name: string;
+  gym_name: string;
+  ascent_type: 'flash' | 'send';
+  date_climbed: string;
+  points: number;
+}
+
 export interface UserProfile {
   id: number;
   username: string;
   email: string;
   first_name: string;
   last_name: string;
-  ascents: {
-    id: number;
-    boulder_id: number;
-    boulder_grade: string;
-    boulder_color: string;
-    wall_name: string;
-    gym_name: string;
-    ascent_type: 'flash' | 'send';
-    date_climbed: string;
-    points: number;
-  }[];
   stats: {
     total_ascents: number;
     total_points: number;
@@ -176,6 +197,12 @@ export const getGym = async (id: number): Promise<Gym> => {
   return response.data;
 };
 
+export const getGymChanges = async (id: number, since?: number): Promise<GymChanges> => {
+  const query = since !== undefined ? `?since=${since}` : '';
+  const response = await apiClient.get(`/gyms/${id}/changes/${query}`);
+  return response.data;
+};
+
 export const createGym = async (data: { name: string }): Promise<Gym> => {
   const response = await apiClient.post('/gyms/', data);
   return response.data;
@@ -196,9 +223,51 @@ export const deleteWall = async (gymId: number, wallId: number): Promise<void> =
   await apiClient.delete(`/gyms/${gymId}/walls/${wallId}/`);
 };
 
+// Retire every active boulder on the wall and set the new batch in one request
+export const resetWall = async (
+  gymId: number,
+  wallId: number,
+  boulders: { setter_grade: string; color: string; difficulty?: string; climbing_style?: string; setter?: number }[]
+): Promise<{ retired: number[]; created: Boulder[] }> => {
+  const response = await apiClient.post(`/gyms/${gymId}/walls/${wallId}/reset/`, { boulders });
+  return response.data;
+};
+
 // Boulders
-export const getBoulders = async (): Promise<Boulder[]> => {
-  const response = await apiClient.get('/boulders/');
+export interface BoulderFilters {
+  gym?: number;
+  wall?: number;
+  grade_min?: string;
+  grade_max?: string;
+  climbing_style?: string; // one value or comma-separated
+  difficulty?: string; // one value or comma-separated
+  is_active?: boolean;
+  date_set_from?: string; // YYYY-MM-DD, inclusive
+  date_set_to?: string; // YYYY-MM-DD, inclusive
+  not_sent?: boolean;
+  page_size?: number;
+}
+
+export interface BoulderPage {
+  next: string | null;
+  previous: string | null;
+  results: Boulder[];
+}
+
+// Newest first; pass a page's `next` URL to continue
+export const getBoulders = async (filters?: BoulderFilters, next?: string): Promise<BoulderPage> => {
+  if (next) {
+    const response = await apiClient.get(next);
+    return response.data;
+  }
+  const queryParams = new URLSearchParams();
+  Object.entries(filters || {}).forEach(([key, value]) => {
+    if (value !== undefined && value !== null) {
+      queryParams.append(key, value.toString());
+    }
+  });
+  const query = queryParams.toString();
+  const response = await apiClient.get(`/boulders/${query ? `?${query}` : ''}`);
   return response.data;
 };
 
@@ -207,6 +276,16 @@ export const getBoulder = async (id: number): Promise<Boulder> => {
   return response.data;
 };
 
+// Pass the previous page's `next` URL (or a boulder's `ascents_next`) to continue
+export const getBoulderAscents = async (id: number, next?: string | null): Promise<{
+  next: string | null;
+  previous: string | null;
+  results: Ascent[];
+}> => {
+  const response = await apiClient.get(next || `/boulders/${id}/ascents/`);
+  return response.data;
+};
+
 export const createBoulder = async (data: {
   wall: number;
   setter?: number;
@@ -242,11 +321,35 @@ export const deleteAscent = async (boulderId: number): Promise<{ boulder: Boulde
   return response.data;
 };
 
+// Compact variants: just the new counter, for callers that patch local state themselves
+export interface AscentWriteResult {
+  ascent_id: number;
+  num_ascents: number;
+  user_has_sent: boolean;
+}
+
+export const logAscentCompact = async (boulderId: number, ascentType: 'flash' | 'send'): Promise<AscentWriteResult> => {
+  const response = await apiClient.post(`/boulders/${boulderId}/ascent/?compact=1`, {
+    ascent_type: ascentType,
+  });
+  return response.data;
+};
+
+export const deleteAscentCompact = async (boulderId: number): Promise<AscentWriteResult> => {
+  const response = await apiClient.delete(`/boulders/${boulderId}/ascent/?compact=1`);
+  return response.data;
+};
+
 // Leaderboard
 export const getLeaderboard = async (params?: {
   gym_id?: number | null;
   only_active?: boolean;
-}): Promise<{ leaderboard: LeaderboardEntry[]; your_ranking: number | null; your_user_id: number | null }> => {
+  from?: string; // YYYY-MM-DD, inclusive
+  to?: string; // YYYY-MM-DD, inclusive
+  limit?: number; // Page size, at most 500 (default 100)
+  offset?: number;
+  around_me?: number; // Entries above and below you, instead of a page
+}): Promise<LeaderboardPage> => {
   const queryParams = new URLSearchParams();
   if (params?.gym_id) {
     queryParams.append('gym_id', params.gym_id.toString());
@@ -254,6 +357,21 @@ export const getLeaderboard = async (params?: {
   if (params?.only_active !== undefined) {
     queryParams.append('only_active', params.only_active.toString());
   }
+  if (params?.from) {
+    queryParams.append('from', params.from);
+  }
+  if (params?.to) {
+    queryParams.append('to', params.to);
+  }
+  if (params?.limit !== undefined) {
+    queryParams.append('limit', params.limit.toString());
+  }
+  if (params?.offset) {
+    queryParams.append('offset', params.offset.toString());
+  }
+  if (params?.around_me !== undefined) {
+    queryParams.append('around_me', params.around_me.toString());
+  }
   
   const url = `/leaderboard/${queryParams.toString() ? `?${queryParams.toString()}` : ''}`;
   const response = await apiClient.get(url);
@@ -266,4 +384,14 @@ export const getUserProfile = async (): Promise<UserProfile> => {
   return response.data;
 };
 
+// Pass the previous page's `next` URL to continue; omit it for the newest ascents
+export const getProfileAscents = async (next?: string | null): Promise<{
+  next: string | null;
+  previous: string | null;
+  results: ProfileAscent[];
+}> => {
+  const response = await apiClient.get(next || '/profile/ascents/');
+  return response.data;
+};
+
 export default apiClient;
@@ -2,6 +2,9 @@
 ASGI config for eQ_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn eQ_backend.asgi:application``)
+for the live ``/api/gyms/<pk>/events/`` streams, which WSGI cannot hold open,
+and the async read endpoints under ``/api/async/``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
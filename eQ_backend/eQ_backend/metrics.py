@@ -0,0 +1,237 @@
+"""Per-view request and database instrumentation.
+
+``MetricsMiddleware`` records, for every resolved view, the request count, a
+wall-time histogram, and the number and duration of database queries. It is
+configured with the ``EQ_METRICS_*`` settings; when disabled Django drops the
+middleware at startup, so it costs nothing. Totals are kept in process memory
+and exposed as JSON to admins and in the Prometheus text format.
+"""
+
+import hmac
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework.permissions import BasePermission, IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger('eQ_backend.metrics')
+
+# Upper bounds of the wall-time histogram buckets, in milliseconds
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+
+class ViewStats:
+    __slots__ = ('requests', 'buckets', 'wall_ms', 'queries', 'db_ms')
+
+    def __init__(self):
+        self.requests = 0
+        self.buckets = [0] * len(BUCKETS_MS)
+        self.wall_ms = 0.0
+        self.queries = 0
+        self.db_ms = 0.0
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'wall_ms_total': round(self.wall_ms, 3),
+            'wall_ms_mean': round(self.wall_ms / self.requests, 3) if self.requests else 0.0,
+            'histogram_ms': {('+Inf' if bound == float('inf') else bound): count
+                             for bound, count in zip(BUCKETS_MS, self.buckets)},
+            'queries_total': self.queries,
+            'queries_mean': round(self.queries / self.requests, 3) if self.requests else 0.0,
+            'db_ms_total': round(self.db_ms, 3),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe per-view totals."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view, wall_ms, queries, db_ms):
+        with self._lock:
+            stats = self._views.get(view)
+            if stats is None:
+                stats = self._views[view] = ViewStats()
+            stats.requests += 1
+            stats.wall_ms += wall_ms
+            stats.queries += queries
+            stats.db_ms += db_ms
+            for index, bound in enumerate(BUCKETS_MS):
+                if wall_ms <= bound:
+                    stats.buckets[index] += 1
+                    break
+
+    def snapshot(self):
+        with self._lock:
+            return {view: stats.as_dict() for view, stats in sorted(self._views.items())}
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = MetricsRegistry()
+
+
+class QueryTracker:
+    """``connection.execute_wrapper`` hook counting and timing queries."""
+
+    def __init__(self, slow_query_ms):
+        self.count = 0
+        self.duration_ms = 0.0
+        self.slow_query_ms = slow_query_ms
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.duration_ms += elapsed
+            if self.slow_query_ms is not None and elapsed >= self.slow_query_ms:
+                logger.warning('Slow query (%.1f ms): %s', elapsed, sql)
+
+
+def view_name(view_func, request):
+    """Label a view as ``Class.action`` for viewsets or ``Class.method`` for API views."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__qualname__', repr(view_func))
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{cls.__name__}.{action}'
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'EQ_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'EQ_METRICS_SAMPLE_RATE', 1.0)
+        self.slow_request_ms = getattr(settings, 'EQ_METRICS_SLOW_REQUEST_MS', None)
+        self.slow_query_ms = getattr(settings, 'EQ_METRICS_SLOW_QUERY_MS', None)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+
+        tracker, hooks = self._track_queries()
+        start = time.perf_counter()
+        with hooks:
+            response = self.get_response(request)
+        self._record(request, start, tracker)
+        return response
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        # Under ASGI the ORM runs on the request's sync_to_async thread, whose
+        # connections differ from the event loop's, so hook them from there
+        tracker, hooks = await sync_to_async(self._track_queries)()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(hooks.close)()
+        self._record(request, start, tracker)
+        return response
+
+    def _sampled(self):
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def _track_queries(self):
+        tracker = QueryTracker(self.slow_query_ms)
+        hooks = ExitStack()
+        for connection in connections.all():
+            hooks.enter_context(connection.execute_wrapper(tracker))
+        return tracker, hooks
+
+    def _record(self, request, start, tracker):
+        wall_ms = (time.perf_counter() - start) * 1000
+        view = getattr(request, '_metrics_view', '<unresolved>')
+        registry.record(view, wall_ms, tracker.count, tracker.duration_ms)
+        if self.slow_request_ms is not None and wall_ms >= self.slow_request_ms:
+            logger.warning(
+                'Slow request %s %s -> %s (%.1f ms, %d queries, %.1f ms in DB)',
+                request.method, request.path, view, wall_ms, tracker.count, tracker.duration_ms,
+            )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view = view_name(view_func, request)
+
+
+def prometheus_text(snapshot):
+    """Render a registry snapshot in the Prometheus text exposition format."""
+    lines = [
+        '# HELP eq_http_request_duration_milliseconds Wall time per request.',
+        '# TYPE eq_http_request_duration_milliseconds histogram',
+    ]
+    for view, stats in snapshot.items():
+        cumulative = 0
+        for bound, count in stats['histogram_ms'].items():
+            cumulative += count
+            lines.append(f'eq_http_request_duration_milliseconds_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+        lines.append(f'eq_http_request_duration_milliseconds_sum{{view="{view}"}} {stats["wall_ms_total"]}')
+        lines.append(f'eq_http_request_duration_milliseconds_count{{view="{view}"}} {stats["requests"]}')
+    lines += [
+        '# HELP eq_db_queries_total Database queries issued while serving requests.',
+        '# TYPE eq_db_queries_total counter',
+    ]
+    lines += [f'eq_db_queries_total{{view="{view}"}} {stats["queries_total"]}' for view, stats in snapshot.items()]
+    lines += [
+        '# HELP eq_db_duration_milliseconds_total Time spent in database queries.',
+        '# TYPE eq_db_duration_milliseconds_total counter',
+    ]
+    lines += [f'eq_db_duration_milliseconds_total{{view="{view}"}} {stats["db_ms_total"]}' for view, stats in snapshot.items()]
+    return '\n'.join(lines) + '\n'
+
+
+class HasMetricsToken(BasePermission):
+    """Allow scrapers that send the configured ``X-Metrics-Token`` header."""
+
+    def has_permission(self, request, view):
+        token = getattr(settings, 'EQ_METRICS_TOKEN', None)
+        return bool(token) and hmac.compare_digest(request.headers.get('X-Metrics-Token', ''), token)
+
+
+class MetricsView(APIView):
+    """Per-view request and query totals as JSON (admin only)."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            'enabled': getattr(settings, 'EQ_METRICS_ENABLED', False),
+            'sample_rate': getattr(settings, 'EQ_METRICS_SAMPLE_RATE', 1.0),
+            'views': registry.snapshot(),
+        })
+
+
+class PrometheusMetricsView(APIView):
+    """The same totals in the Prometheus text format, for admins or token-bearing scrapers."""
+
+    permission_classes = [IsAdminUser | HasMetricsToken]
+
+    def get(self, request):
+        return HttpResponse(prometheus_text(registry.snapshot()), content_type='text/plain; version=0.0.4')
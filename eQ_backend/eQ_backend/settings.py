@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -46,6 +49,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'eQ_backend.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -58,6 +62,17 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'eQ_backend.urls'
 
+# Request metrics (see eQ_backend/metrics.py)
+# Disabled by default; the middleware removes itself at startup when off.
+EQ_METRICS_ENABLED = os.environ.get('EQ_METRICS_ENABLED', 'false').lower() == 'true'
+# Fraction of requests to instrument
+EQ_METRICS_SAMPLE_RATE = float(os.environ.get('EQ_METRICS_SAMPLE_RATE', 1.0))
+# Log requests / queries slower than these many milliseconds (unset to disable)
+EQ_METRICS_SLOW_REQUEST_MS = float(os.environ['EQ_METRICS_SLOW_REQUEST_MS']) if os.environ.get('EQ_METRICS_SLOW_REQUEST_MS') else None
+EQ_METRICS_SLOW_QUERY_MS = float(os.environ['EQ_METRICS_SLOW_QUERY_MS']) if os.environ.get('EQ_METRICS_SLOW_QUERY_MS') else None
+# Lets a Prometheus scraper read /api/metrics/prometheus/ by sending X-Metrics-Token
+EQ_METRICS_TOKEN = os.environ.get('EQ_METRICS_TOKEN')
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -79,13 +94,90 @@ WSGI_APPLICATION = 'eQ_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# SQLite by default, for development and single-node deployments. Set
+# EQ_DB_ENGINE=postgresql (needs psycopg) with EQ_DB_NAME, EQ_DB_USER,
+# EQ_DB_PASSWORD, EQ_DB_HOST and EQ_DB_PORT for production; the test suite and
+# benchmark commands run against whichever database is configured.
+EQ_DB_ENGINE = os.environ.get('EQ_DB_ENGINE', 'sqlite').lower()
+
+if EQ_DB_ENGINE in ('postgres', 'postgresql'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('EQ_DB_NAME', 'eq'),
+            'USER': os.environ.get('EQ_DB_USER', ''),
+            'PASSWORD': os.environ.get('EQ_DB_PASSWORD', ''),
+            'HOST': os.environ.get('EQ_DB_HOST', ''),
+            'PORT': os.environ.get('EQ_DB_PORT', ''),
+            # Keep connections open across requests for this many seconds, and
+            # check them before reuse so a database restart doesn't fail requests
+            'CONN_MAX_AGE': int(os.environ.get('EQ_DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+            'TEST': {'NAME': os.environ.get('EQ_DB_TEST_NAME')},
+        }
+    }
+    # Pool connections inside each worker process instead (needs psycopg[pool]);
+    # pooled connections are returned after every request, so CONN_MAX_AGE must be 0
+    if os.environ.get('EQ_DB_POOL', 'false').lower() == 'true':
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('EQ_DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('EQ_DB_POOL_MAX_SIZE', 10)),
+            'timeout': float(os.environ.get('EQ_DB_POOL_TIMEOUT', 10)),
+        }
+elif EQ_DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('EQ_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Seconds a connection waits on a locked database before failing
+                'timeout': float(os.environ.get('EQ_DB_TIMEOUT', 20)),
+                # Take the write lock when a transaction starts so concurrent ascent
+                # writes queue up for it instead of failing on a lock upgrade
+                'transaction_mode': 'IMMEDIATE',
+                # WAL lets reads proceed while a write is in progress; NORMAL sync
+                # is durable across application crashes and much cheaper per commit
+                'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL',
+            },
+            # A file-backed test database lets the concurrency tests share it between threads
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"EQ_DB_ENGINE must be 'sqlite' or 'postgresql', not {EQ_DB_ENGINE!r}")
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory by default; point EQ_CACHE_BACKEND / EQ_CACHE_LOCATION at
+# e.g. django.core.cache.backends.redis.RedisCache to share it between workers.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.environ.get('EQ_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('EQ_CACHE_LOCATION', 'eq-backend'),
     }
 }
 
+# Seconds a cached gym detail payload may live; signals invalidate it sooner on change
+EQ_GYM_CACHE_TIMEOUT = int(os.environ.get('EQ_GYM_CACHE_TIMEOUT', 600))
+
+# Days of gym change log kept for delta sync; older entries are removed by the
+# prune_changelog job (`manage.py enqueue_job prune_changelog`, e.g. daily from cron)
+# and clients whose token predates them get a full reset.
+EQ_CHANGELOG_RETENTION_DAYS = int(os.environ.get('EQ_CHANGELOG_RETENTION_DAYS', 30))
+
+# Background jobs (see logger/jobs.py)
+# Recomputations after regrades and wall resets are queued for `manage.py run_workers`;
+# EQ_JOBS_EAGER=true runs them inline instead, as before the queue existed.
+EQ_JOBS_EAGER = os.environ.get('EQ_JOBS_EAGER', 'false').lower() == 'true'
+# Runs per job before it is marked failed
+EQ_JOBS_MAX_ATTEMPTS = int(os.environ.get('EQ_JOBS_MAX_ATTEMPTS', 3))
+# Seconds after which a running job whose worker went silent may be claimed again
+EQ_JOBS_TIMEOUT = int(os.environ.get('EQ_JOBS_TIMEOUT', 600))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -141,7 +233,7 @@ CORS_ALLOW_METHODS = [
     'POST',
     'PUT',
 ]
-CORS_EXPOSE_HEADERS = ['Content-Type', 'X-CSRFToken']
+CORS_EXPOSE_HEADERS = ['Content-Type', 'X-CSRFToken', 'ETag', 'Last-Modified']
 
 # REST Framework settings
 REST_FRAMEWORK = {
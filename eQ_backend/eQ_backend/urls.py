@@ -18,7 +18,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from .metrics import MetricsView, PrometheusMetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
+    path('api/metrics/prometheus/', PrometheusMetricsView.as_view(), name='metrics-prometheus'),
     path('api/', include('logger.urls')),
 ]
@@ -1,7 +1,11 @@
 from django.contrib import admin
-from .models import Gym, Wall, Boulder, Ascent
+from .models import Gym, Wall, Boulder, Ascent, LeaderboardScore, DailyPoints, ChangeLog, Job
 
 admin.site.register(Gym)
 admin.site.register(Wall)
 admin.site.register(Boulder)
 admin.site.register(Ascent)
+admin.site.register(LeaderboardScore)
+admin.site.register(DailyPoints)
+admin.site.register(ChangeLog)
+admin.site.register(Job)
@@ -0,0 +1,168 @@
+"""Helpers shared by the benchmark management commands."""
+
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+from .models import Ascent
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(name, timings, query_counts, elapsed):
+    """Latency, query and throughput figures for one benchmark case."""
+    return {
+        'name': name,
+        'requests': len(timings),
+        'p50_ms': statistics.median(timings),
+        'p95_ms': percentile(timings, 0.95),
+        'max_ms': max(timings),
+        'queries': statistics.mean(query_counts) if query_counts else None,
+        'throughput_rps': len(timings) / elapsed if elapsed else float('inf'),
+    }
+
+
+def measure(name, call, iterations, warmup=0, count_queries=True, setup=None):
+    """Run ``call()`` repeatedly and summarize its latency and query count.
+
+    ``setup()``, if given, runs untimed before every call.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        call()
+    timings, query_counts = [], []
+    elapsed = 0.0
+    for _ in range(iterations):
+        if setup:
+            setup()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            call()
+            duration = time.perf_counter() - start
+        elapsed += duration
+        timings.append(duration * 1000)
+        if count_queries:
+            query_counts.append(len(queries))
+    return summarize(name, timings, query_counts, elapsed)
+
+
+@contextmanager
+def client_environment():
+    """Set up the test environment the Django test clients need (e.g. the
+    ``testserver`` host), unless we are already running inside the test suite."""
+    try:
+        setup_test_environment()
+    except RuntimeError:
+        yield
+        return
+    try:
+        yield
+    finally:
+        teardown_test_environment()
+
+
+def run_cases(cases, iterations, warmup=0, setup=None):
+    """Measure ``(name, call)`` cases that drive the Django test client."""
+    with client_environment():
+        return [measure(name, call, iterations, warmup=warmup, setup=setup) for name, call in cases]
+
+
+def measure_threaded(name, make_call, clients, iterations):
+    """Run ``clients`` threads at once, each calling ``make_call()``'s result ``iterations`` times."""
+    def worker():
+        call = make_call()
+        timings = []
+        try:
+            for _ in range(iterations):
+                start = time.perf_counter()
+                call()
+                timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            connections.close_all()
+        return timings
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        futures = [pool.submit(worker) for _ in range(clients)]
+        timings = [timing for future in futures for timing in future.result()]
+    return summarize(name, timings, [], time.perf_counter() - start)
+
+
+def measure_gathered(name, make_call, clients, iterations):
+    """Like ``measure_threaded``, but with ``clients`` coroutines sharing one event loop."""
+    async def worker():
+        call = make_call()
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await call()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    async def run():
+        try:
+            return await asyncio.gather(*(worker() for _ in range(clients)))
+        finally:
+            # Async views ran their queries on the shared sync thread; release its connections
+            await sync_to_async(connections.close_all)()
+
+    start = time.perf_counter()
+    timings = [timing for worker_timings in asyncio.run(run()) for timing in worker_timings]
+    return summarize(name, timings, [], time.perf_counter() - start)
+
+
+def benchmark_user(username=None):
+    """The named user, or by default the climber with the most ascents."""
+    if username:
+        try:
+            return User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError(f'No user named {username!r}.')
+    climber_id = Ascent.objects.values('climber_id').annotate(n=Count('pk')).order_by('-n').values_list('climber_id', flat=True).first()
+    if climber_id is None:
+        raise CommandError('Nothing to benchmark; run "manage.py seed_data" first.')
+    return User.objects.get(pk=climber_id)
+
+
+def format_table(results):
+    """Render summaries as a fixed-width text table."""
+    lines = [f"{'case':<34}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}{'req/s':>10}"]
+    for result in results:
+        queries = '-' if result['queries'] is None else f"{result['queries']:.1f}"
+        lines.append(
+            f"{result['name']:<34}{result['requests']:>6}{result['p50_ms']:>10.2f}"
+            f"{result['p95_ms']:>10.2f}{queries:>9}{result['throughput_rps']:>10.1f}"
+        )
+    return '\n'.join(lines)
+
+
+def compare_to_baseline(results, path, tolerance):
+    """Return a message per case whose p95 or query count regressed past ``tolerance``."""
+    with open(path) as handle:
+        baseline = {result['name']: result for result in json.load(handle)}
+    regressions = []
+    for result in results:
+        before = baseline.get(result['name'])
+        if before is None:
+            continue
+        if result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{result['name']}: p95 {before['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms")
+        if before['queries'] is not None and result['queries'] is not None and result['queries'] > before['queries']:
+            regressions.append(f"{result['name']}: queries {before['queries']:.1f} -> {result['queries']:.1f}")
+    return regressions
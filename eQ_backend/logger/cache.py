@@ -0,0 +1,45 @@
+"""Server-side cache of the user-independent part of the gym detail payload.
+
+The walls and active boulders of a gym only change when a setter edits them
+or an ascent moves ``num_ascents``. Both paths go through
+``logger.versions.touch_gyms``, which invalidates the entry here; the per-user
+``user_has_sent`` flags are overlaid on every read.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+GYM_DETAIL_KEY = 'logger:gym-detail:{}'
+
+
+def get_gym_detail(gym_id, build):
+    """Return the cached ``{'walls', 'boulders'}`` payload, building it on a miss."""
+    key = GYM_DETAIL_KEY.format(gym_id)
+    payload = cache.get(key)
+    if payload is None:
+        payload = build()
+        cache.set(key, payload, settings.EQ_GYM_CACHE_TIMEOUT)
+    return payload
+
+
+async def aget_gym_detail(gym_id, build):
+    """Async version of ``get_gym_detail``; ``build`` is awaited on a miss."""
+    key = GYM_DETAIL_KEY.format(gym_id)
+    payload = await cache.aget(key)
+    if payload is None:
+        payload = await build()
+        await cache.aset(key, payload, settings.EQ_GYM_CACHE_TIMEOUT)
+    return payload
+
+
+def invalidate_gym_detail(gym_ids):
+    """Drop cached payloads for the given gyms, now and again once the transaction commits.
+
+    The second delete covers a reader that repopulated the entry from
+    not-yet-committed state in between.
+    """
+    keys = [GYM_DETAIL_KEY.format(gym_id) for gym_id in gym_ids]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,86 @@
+"""Delta sync of a gym's walls and boulders for the mobile client.
+
+Clients keep the ``token`` - the gym's revision - from their last sync and
+ask for what changed since. ``ChangeLog`` entries at later revisions are
+collapsed to the latest action per object and only those objects are
+serialized; boulders that were deleted, retired or moved to another gym are
+listed as removed. Without a usable token, or after more changes than a delta
+is worth, the whole gym is sent instead with ``reset`` set. Entries older than
+``EQ_CHANGELOG_RETENTION_DAYS`` are pruned by the ``prune_changelog`` job;
+tokens from before a gym's ``pruned_revision`` get a reset too.
+"""
+
+from django.db.models import Max
+
+from .models import Wall, Boulder, ChangeLog
+from .cache import get_gym_detail
+from .serializers import build_gym_detail, sent_boulder_ids, boulder_rows, ascent_rows_by_boulder, BOULDER_ROW_FIELDS
+
+# Past this many changed walls and boulders a full payload is cheaper than a delta
+MAX_DELTA_CHANGES = 1000
+
+
+def collapse_changes(gym_id, since, until, limit=None):
+    """Return ``{(kind, object_id): action}`` for revisions ``(since, until]``, or None past ``limit`` objects.
+
+    The log is collapsed to each object's latest entry in SQL, so a boulder
+    with a thousand ascents logged counts once.
+    """
+    if limit is None:
+        limit = MAX_DELTA_CHANGES
+    latest = list(
+        ChangeLog.objects.filter(gym_id=gym_id, revision__gt=since, revision__lte=until)
+        .values('kind', 'object_id').annotate(last=Max('id')).order_by()
+        .values_list('last', flat=True)[:limit + 1]
+    )
+    if len(latest) > limit:
+        return None
+    return {
+        (kind, object_id): action
+        for kind, object_id, action in ChangeLog.objects.filter(id__in=latest).values_list('kind', 'object_id', 'action')
+    }
+
+
+def gym_changes(request, gym, since=None):
+    """Build the ``/api/gyms/<pk>/changes/`` response for ``request``'s user."""
+    # Tokens are the gym's revision, which only moves once the entries logged at it are committed
+    token = gym.revision
+    # A token from the future means the client synced against another database, and one
+    # from before the pruned revisions may have missed their changes
+    usable = since is not None and gym.pruned_revision <= since <= token
+    latest = collapse_changes(gym.pk, since, token) if usable else None
+    if latest is None:
+        detail = get_gym_detail(gym.pk, lambda: build_gym_detail(gym))
+        sent = sent_boulder_ids(request, boulder__wall__gym=gym)
+        return {
+            'token': token,
+            'reset': True,
+            'walls': detail['walls'],
+            'boulders': [dict(boulder, user_has_sent=boulder['id'] in sent) for boulder in detail['boulders']],
+            'removed_walls': [],
+            'removed_boulders': [],
+        }
+
+    changed = {ChangeLog.WALL: set(), ChangeLog.BOULDER: set()}
+    upserted = {ChangeLog.WALL: set(), ChangeLog.BOULDER: set()}
+    for (kind, object_id), action in latest.items():
+        changed[kind].add(object_id)
+        if action == ChangeLog.UPSERT:
+            upserted[kind].add(object_id)
+
+    walls = list(Wall.objects.filter(gym=gym, pk__in=upserted[ChangeLog.WALL]).order_by('id').values('id', 'name'))
+    # Only active boulders belong in the gym payload; retired ones are removed like deleted ones
+    boulders = list(
+        Boulder.objects.filter(wall__gym=gym, is_active=True, pk__in=upserted[ChangeLog.BOULDER])
+        .order_by('id').values(*BOULDER_ROW_FIELDS)
+    ) if upserted[ChangeLog.BOULDER] else []
+    boulder_ids = [boulder['id'] for boulder in boulders]
+    sent = sent_boulder_ids(request, boulder_id__in=boulder_ids)
+    return {
+        'token': token,
+        'reset': False,
+        'walls': walls,
+        'boulders': boulder_rows(boulders, sent, ascent_rows_by_boulder(boulder_ids)),
+        'removed_walls': sorted(changed[ChangeLog.WALL] - {wall['id'] for wall in walls}),
+        'removed_boulders': sorted(changed[ChangeLog.BOULDER] - set(boulder_ids)),
+    }
@@ -0,0 +1,126 @@
+"""Per-gym live event stream.
+
+Ascent writes publish small deltas - a boulder's new ``num_ascents`` and the
+affected climbers' new leaderboard positions - to everyone streaming that
+gym's ``/api/gyms/<pk>/events/`` channel. Publishing happens after the write
+commits and is skipped entirely while nobody is subscribed.
+
+The default broker fans out in process, which is enough for a single ASGI
+worker; ``EQ_EVENT_BROKER`` can name a drop-in replacement backed by a real
+message broker for multi-worker deployments.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Boulder
+from .leaderboard import user_position
+
+
+class Subscription:
+    """One listener's queue; consume it from the event loop that created it."""
+
+    def __init__(self, broker, gym_id, max_pending):
+        self.broker = broker
+        self.gym_id = gym_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_pending)
+
+    def deliver(self, event):
+        """Queue an event, dropping the oldest one if the listener is falling behind."""
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Thread-safe fan-out from request threads to asyncio listeners in this process."""
+
+    max_pending = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, gym_id):
+        subscription = Subscription(self, gym_id, self.max_pending)
+        with self._lock:
+            self._subscriptions[gym_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            listeners = self._subscriptions.get(subscription.gym_id)
+            if listeners is not None:
+                listeners.discard(subscription)
+                if not listeners:
+                    del self._subscriptions[subscription.gym_id]
+
+    def subscribed_gyms(self):
+        with self._lock:
+            return set(self._subscriptions)
+
+    def publish(self, gym_id, event):
+        with self._lock:
+            listeners = list(self._subscriptions.get(gym_id, ()))
+        for subscription in listeners:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The listener's event loop has shut down
+                self.unsubscribe(subscription)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'EQ_EVENT_BROKER', 'logger.events.InProcessBroker')
+                _broker = import_string(path)()
+    return _broker
+
+
+def publish_ascent_changes(boulder_ids, climber_ids):
+    """After commit, publish new boulder counts and climber positions to listening gyms."""
+    boulder_ids, climber_ids = set(boulder_ids), set(climber_ids)
+
+    def publish():
+        broker = get_broker()
+        gym_ids = broker.subscribed_gyms()
+        if not gym_ids:
+            return
+        boulders = Boulder.objects.filter(pk__in=boulder_ids, wall__gym_id__in=gym_ids).values(
+            'id', 'num_ascents', 'wall__gym_id'
+        )
+        touched_gyms = set()
+        for boulder in boulders:
+            gym_id = boulder['wall__gym_id']
+            touched_gyms.add(gym_id)
+            broker.publish(gym_id, {'type': 'boulder', 'id': boulder['id'], 'num_ascents': boulder['num_ascents']})
+        for gym_id in touched_gyms:
+            for climber_id in climber_ids:
+                position = user_position(gym_id, False, climber_id)
+                broker.publish(gym_id, {
+                    'type': 'leaderboard',
+                    'user_id': climber_id,
+                    'total_points': position['total_points'] if position else 0,
+                    'rank': position['rank'] if position else None,
+                })
+
+    transaction.on_commit(publish)
@@ -0,0 +1,72 @@
+"""Query-string filters for the boulder list."""
+
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Boulder
+
+GRADES = [grade for grade, _ in Boulder.GRADE_CHOICES]
+
+
+class BoulderFilter(BaseFilterBackend):
+    """Filter ``/api/boulders/`` by gym, wall, grade range, style, difficulty, state and date set.
+
+    Query parameters:
+    - gym, wall: ids
+    - grade_min / grade_max: inclusive bounds such as L2 and L5
+    - climbing_style, difficulty: one value or a comma-separated list
+    - is_active: true or false
+    - date_set_from / date_set_to: inclusive YYYY-MM-DD bounds
+    - not_sent: if true, hide boulders the authenticated user has sent
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if getattr(view, 'action', None) != 'list':
+            return queryset
+        params = request.query_params
+        errors = {}
+
+        def parse(name, parser, message):
+            value = params.get(name)
+            if value in (None, ''):
+                return None
+            try:
+                parsed = parser(value)
+            except ValueError:
+                parsed = None
+            if parsed is None:
+                errors[name] = [message]
+            return parsed
+
+        gym = parse('gym', int, 'Must be a gym id.')
+        wall = parse('wall', int, 'Must be a wall id.')
+        grade_min = parse('grade_min', GRADES.index, f'Must be one of {", ".join(GRADES)}.')
+        grade_max = parse('grade_max', GRADES.index, f'Must be one of {", ".join(GRADES)}.')
+        is_active = parse('is_active', {'true': True, 'false': False}.get, 'Must be true or false.')
+        date_from = parse('date_set_from', parse_date, 'Must be a date (YYYY-MM-DD).')
+        date_to = parse('date_set_to', parse_date, 'Must be a date (YYYY-MM-DD).')
+        if errors:
+            raise ValidationError(errors)
+
+        if gym is not None:
+            queryset = queryset.filter(wall__gym_id=gym)
+        if wall is not None:
+            queryset = queryset.filter(wall_id=wall)
+        if grade_min is not None or grade_max is not None:
+            low = 0 if grade_min is None else grade_min
+            high = len(GRADES) - 1 if grade_max is None else grade_max
+            queryset = queryset.filter(setter_grade__in=GRADES[low:high + 1])
+        for field in ('climbing_style', 'difficulty'):
+            if params.get(field):
+                queryset = queryset.filter(**{f'{field}__in': params[field].split(',')})
+        if is_active is not None:
+            # IN rather than a bare boolean test, so SQLite can seek boulder_active_date_idx
+            queryset = queryset.filter(is_active__in=[is_active])
+        if date_from is not None:
+            queryset = queryset.filter(date_set__gte=date_from)
+        if date_to is not None:
+            queryset = queryset.filter(date_set__lte=date_to)
+        if params.get('not_sent', '').lower() == 'true' and request.user and request.user.is_authenticated:
+            queryset = queryset.exclude(ascents__climber=request.user)
+        return queryset
@@ -0,0 +1,129 @@
+"""Database-backed background jobs.
+
+Recomputations that grow with the number of ascents involved - ascent points
+and leaderboard rows after a regrade or a wall reset, counter repairs, full
+score rebuilds - are queued as ``Job`` rows, in the same transaction as the
+change that needs them, and run by ``manage.py run_workers``. Tasks are
+registered in ``logger.tasks`` with ``@task``.
+
+A job ``key`` names the work rather than the request for it: while a job with
+that key is still queued, enqueueing it again returns the queued job, whose
+run will see the newer change too. Tasks must therefore be idempotent, which
+also makes retrying a failed job safe. With ``EQ_JOBS_EAGER`` jobs run inline
+instead of being queued.
+"""
+
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+# Seconds before the first retry of a failed job; doubled for every further attempt
+RETRY_DELAY = 10
+
+TASKS = {}
+
+
+def task(name):
+    """Register a function taking ``(job, **payload)`` as the task ``name``."""
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, key=None, **payload):
+    """Queue the task ``name`` with a JSON-serializable ``payload``.
+
+    Returns the queued ``Job``, which is the already queued one if ``key``
+    matches; with ``EQ_JOBS_EAGER`` the task runs before this returns and
+    None is returned.
+    """
+    if name not in TASKS:
+        raise ValueError(f'Unknown job {name!r}.')
+    if settings.EQ_JOBS_EAGER:
+        TASKS[name](Job(name=name, key=key, payload=payload), **payload)
+        return None
+    try:
+        with transaction.atomic():
+            return Job.objects.create(name=name, key=key, payload=payload, max_attempts=settings.EQ_JOBS_MAX_ATTEMPTS)
+    except IntegrityError:
+        return Job.objects.filter(key=key, status=Job.QUEUED).first()
+
+
+def _claimable(now):
+    stale = now - timedelta(seconds=settings.EQ_JOBS_TIMEOUT)
+    return Q(status=Job.QUEUED, run_after__lte=now) | Q(status=Job.RUNNING, locked_at__lt=stale)
+
+
+def claim(worker):
+    """Mark the oldest due job as running for ``worker`` and return it, or None if there is none."""
+    now = timezone.now()
+    candidates = Job.objects.filter(_claimable(now)).order_by('run_after', 'id').values_list('pk', flat=True)
+    for pk in candidates[:10]:
+        # Re-checked in the UPDATE itself, so of several workers racing for a job only one matches
+        claimed = Job.objects.filter(_claimable(now), pk=pk).update(
+            status=Job.RUNNING, locked_by=worker, locked_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def run(job):
+    """Run a claimed job and record the outcome; returns True if the task succeeded.
+
+    The outcome is only recorded while the job is still locked by this worker;
+    if it went stale and another worker claimed it, that worker records it.
+    """
+    jobs = Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by)
+    try:
+        TASKS[job.name](job, **job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            jobs.update(status=Job.FAILED, error=error, finished_at=timezone.now())
+            return False
+        retry_at = timezone.now() + timedelta(seconds=RETRY_DELAY * 2 ** (job.attempts - 1))
+        try:
+            with transaction.atomic():
+                jobs.update(status=Job.QUEUED, error=error, run_after=retry_at, locked_by='', locked_at=None)
+        except IntegrityError:
+            # The same work was queued again meanwhile and will run anyway
+            jobs.update(status=Job.FAILED, error=error, finished_at=timezone.now())
+        return False
+    jobs.update(status=Job.DONE, error='', finished_at=timezone.now())
+    return True
+
+
+def work(worker=None, burst=False, poll_interval=1.0, max_jobs=None):
+    """Claim and run jobs until ``max_jobs`` have run or, with ``burst``, none is due.
+
+    Returns ``(succeeded, failed)`` counts.
+    """
+    worker = worker or f'{socket.gethostname()}:{os.getpid()}'
+    succeeded = failed = 0
+    while max_jobs is None or succeeded + failed < max_jobs:
+        # Long-lived workers must honour CONN_MAX_AGE and health checks like requests do,
+        # unless called inside a transaction (as in tests) that must keep its connection
+        if not transaction.get_connection().in_atomic_block:
+            close_old_connections()
+        job = claim(worker)
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        if run(job):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
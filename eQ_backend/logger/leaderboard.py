@@ -0,0 +1,334 @@
+"""Maintenance of the denormalized ``LeaderboardScore`` and ``DailyPoints`` tables.
+
+Every climber has one score row per scope they have ascents in: global and per
+gym, each both for all boulders and for active boulders only. Date-ranged
+leaderboards are summed from the per-day ``DailyPoints`` buckets instead.
+
+Logging or deleting a single ascent adjusts the few rows it counts towards in
+place (``add_ascent_scores``, ``add_ascent_daily_points`` and their
+``remove_`` counterparts), so a tap costs the same however long the
+climber's history. Regrades, retirements and rebuilds
+change many ascents at once and rebuild each affected climber's rows from a
+single grouped query over their ascents (``refresh_user_scores``).
+"""
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, Count, F, Max, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Ascent, LeaderboardScore, DailyPoints
+
+
+def _scopes(gym_id, is_active):
+    """Yield every (gym_id, only_active) scope an ascent contributes to."""
+    for scope_gym in (None, gym_id):
+        yield scope_gym, False
+        if is_active:
+            yield scope_gym, True
+
+
+def build_scores(rows):
+    """Fold grouped ascent rows into unsaved ``LeaderboardScore`` instances.
+
+    ``rows`` are dicts with ``climber_id``, ``gym_id``, ``is_active``,
+    ``points``, ``latest`` and ``count`` keys, one per
+    (climber, gym, is_active) group.
+    """
+    totals = {}
+    for row in rows:
+        for gym_id, only_active in _scopes(row['gym_id'], row['is_active']):
+            key = (row['climber_id'], gym_id, only_active)
+            score = totals.get(key)
+            if score is None:
+                score = totals[key] = LeaderboardScore(
+                    user_id=row['climber_id'],
+                    gym_id=gym_id,
+                    only_active=only_active,
+                )
+            score.total_points += row['points'] or 0
+            score.num_ascents += row['count']
+            if row['latest'] and (score.most_recent_ascent is None or row['latest'] > score.most_recent_ascent):
+                score.most_recent_ascent = row['latest']
+    return list(totals.values())
+
+
+def build_daily_points(rows):
+    """Turn grouped ascent rows that include ``date_climbed`` into unsaved ``DailyPoints``."""
+    return [
+        DailyPoints(
+            user_id=row['climber_id'], gym_id=row['gym_id'], day=row['date_climbed'],
+            is_active=row['is_active'], points=row['points'] or 0, num_ascents=row['count'],
+        )
+        for row in rows
+    ]
+
+
+def refresh_user_scores(user_ids):
+    """Recompute every leaderboard row and daily bucket for the given climbers."""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    # One row per climber, gym, boulder activity and day feeds both tables
+    rows = list(
+        Ascent.objects.filter(climber_id__in=user_ids)
+        .values('climber_id', 'date_climbed', gym_id=F('boulder__wall__gym_id'), is_active=F('boulder__is_active'))
+        .annotate(points=Sum('points'), latest=Max('date_climbed'), count=Count('id'))
+        .order_by()
+    )
+    scores = build_scores(rows)
+    buckets = build_daily_points(rows)
+    with transaction.atomic():
+        LeaderboardScore.objects.filter(user_id__in=user_ids).delete()
+        LeaderboardScore.objects.bulk_create(scores)
+        DailyPoints.objects.filter(user_id__in=user_ids).delete()
+        DailyPoints.objects.bulk_create(buckets)
+
+
+def _score_rows(climber_id, gym_id, is_active):
+    """The climber's ``LeaderboardScore`` rows an ascent in ``gym_id`` counts towards."""
+    return LeaderboardScore.objects.filter(
+        Q(gym_id=gym_id) | Q(gym__isnull=True),
+        user_id=climber_id,
+        only_active__in=[False, True] if is_active else [False],
+    )
+
+
+def add_ascent_scores(climber_id, gym_id, is_active, points, day):
+    """Count a new ascent in the climber's two to four score rows.
+
+    One UPDATE adds to the rows that exist; rows for scopes the climber has
+    no ascents in yet are created.
+    """
+    scopes = list(_scopes(gym_id, is_active))
+    rows = _score_rows(climber_id, gym_id, is_active)
+    changes = {
+        'total_points': F('total_points') + points,
+        'num_ascents': F('num_ascents') + 1,
+        'most_recent_ascent': Greatest(Coalesce('most_recent_ascent', Value(day)), Value(day)),
+    }
+    if rows.update(**changes) == len(scopes):
+        return
+    existing = set(rows.values_list('gym_id', 'only_active'))
+    for scope_gym, only_active in scopes:
+        if (scope_gym, only_active) in existing:
+            continue
+        try:
+            with transaction.atomic():
+                LeaderboardScore.objects.create(
+                    user_id=climber_id, gym_id=scope_gym, only_active=only_active,
+                    total_points=points, num_ascents=1, most_recent_ascent=day,
+                )
+        except IntegrityError:
+            # A concurrent write created the row first; count this ascent in it
+            LeaderboardScore.objects.filter(user_id=climber_id, gym_id=scope_gym, only_active=only_active).update(**changes)
+
+
+def remove_ascent_scores(climber_id, gym_id, is_active, points, day):
+    """Take a deleted ascent out of the climber's score rows.
+
+    Rows left without ascents are dropped, and rows whose latest ascent was
+    on ``day`` take ``most_recent_ascent`` from one index seek per scope.
+    """
+    rows = _score_rows(climber_id, gym_id, is_active)
+    deleted, _ = rows.filter(num_ascents__lte=1).delete()
+    if deleted == len(list(_scopes(gym_id, is_active))):
+        return
+    # Clamped so rows that drifted never go negative
+    rows.update(
+        total_points=Greatest(F('total_points') - points, Value(0)),
+        num_ascents=F('num_ascents') - 1,
+    )
+    latest = []
+    for scope_gym, only_active in _scopes(gym_id, is_active):
+        ascents = Ascent.objects.filter(climber_id=climber_id)
+        if scope_gym is not None:
+            ascents = ascents.filter(boulder__wall__gym_id=scope_gym)
+        if only_active:
+            ascents = ascents.filter(boulder__is_active=True)
+        latest.append(When(
+            gym__isnull=scope_gym is None, only_active=only_active,
+            then=Subquery(ascents.order_by('-date_climbed').values('date_climbed')[:1]),
+        ))
+    rows.filter(most_recent_ascent=day).update(most_recent_ascent=Case(*latest))
+
+
+def add_ascent_daily_points(climber_id, gym_id, is_active, points, day):
+    """Add a new ascent to its one ``DailyPoints`` bucket, creating the bucket if needed."""
+    bucket = DailyPoints.objects.filter(user_id=climber_id, gym_id=gym_id, day=day, is_active=is_active)
+    changes = {'points': F('points') + points, 'num_ascents': F('num_ascents') + 1}
+    if bucket.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            DailyPoints.objects.create(
+                user_id=climber_id, gym_id=gym_id, day=day, is_active=is_active, points=points, num_ascents=1,
+            )
+    except IntegrityError:
+        # A concurrent write created the bucket first
+        bucket.update(**changes)
+
+
+def remove_ascent_daily_points(climber_id, gym_id, is_active, points, day):
+    """Take a deleted ascent out of its ``DailyPoints`` bucket, dropping the bucket once empty."""
+    bucket = DailyPoints.objects.filter(user_id=climber_id, gym_id=gym_id, day=day, is_active=is_active)
+    deleted, _ = bucket.filter(num_ascents__lte=1).delete()
+    if not deleted:
+        bucket.update(points=Greatest(F('points') - points, Value(0)), num_ascents=F('num_ascents') - 1)
+
+
+def rebuild_all_scores(batch_size=500):
+    """Rebuild the whole table, ``batch_size`` climbers at a time."""
+    climber_ids = sorted(set(Ascent.objects.values_list('climber_id', flat=True)))
+    with transaction.atomic():
+        LeaderboardScore.objects.all().delete()
+        DailyPoints.objects.all().delete()
+        for start in range(0, len(climber_ids), batch_size):
+            refresh_user_scores(climber_ids[start:start + batch_size])
+
+
+def _is_ranged(date_from, date_to):
+    return date_from is not None or date_to is not None
+
+
+def _daily_points(gym_id, only_active, date_from, date_to, prefix=''):
+    """Filter kwargs selecting the buckets of one scope and date range."""
+    filters = {}
+    if gym_id is not None:
+        filters[f'{prefix}gym_id'] = gym_id
+    if only_active:
+        filters[f'{prefix}is_active__in'] = [True]
+    if date_from is not None:
+        filters[f'{prefix}day__gte'] = date_from
+    if date_to is not None:
+        filters[f'{prefix}day__lte'] = date_to
+    return filters
+
+
+# Columns of a leaderboard entry, before ``rank`` and ``index`` are attached
+LEADERBOARD_FIELDS = ('id', 'username', 'first_name', 'last_name', 'total_points')
+
+
+def _ordered_leaderboard(gym_id, only_active, date_from, date_to):
+    if _is_ranged(date_from, date_to):
+        return User.objects.filter(
+            **_daily_points(gym_id, only_active, date_from, date_to, prefix='daily_points__')
+        ).annotate(
+            total_points=Sum('daily_points__points'),
+            most_recent_ascent=Max('daily_points__day'),
+        ).order_by(
+            '-total_points', '-most_recent_ascent', 'id'
+        )
+    return User.objects.filter(
+        leaderboard_scores__gym_id=gym_id,
+        # IN rather than a bare boolean test, so SQLite can seek leaderboard_rank_idx on it
+        leaderboard_scores__only_active__in=[only_active],
+    ).annotate(
+        total_points=F('leaderboard_scores__total_points'),
+        most_recent_ascent=F('leaderboard_scores__most_recent_ascent'),
+        # Same value as id, but ordering on the score column lets leaderboard_rank_idx cover the sort
+        score_user_id=F('leaderboard_scores__user_id'),
+    ).order_by(
+        '-total_points', '-most_recent_ascent', 'score_user_id'
+    )
+
+
+def leaderboard_queryset(gym_id=None, only_active=False, date_from=None, date_to=None):
+    """Ordered leaderboard rows for one scope, shaped for the API response.
+
+    With ``date_from`` and/or ``date_to`` (inclusive) only ascents climbed in
+    that range count, summed from the ``DailyPoints`` buckets.
+    """
+    return _ordered_leaderboard(gym_id, only_active, date_from, date_to).values(*LEADERBOARD_FIELDS)
+
+
+def ranked_entries(offset, limit, gym_id=None, only_active=False, date_from=None, date_to=None):
+    """Entries ``offset`` to ``offset + limit`` of ``leaderboard_queryset`` with ``rank`` and ``index``.
+
+    The database attaches both with ``RANK()`` (ties share a rank: 1, 2, 2, 4)
+    and ``ROW_NUMBER()`` windows over the leading ``offset + limit`` rows.
+    Everyone ahead of an entry is among those rows, so ranks are exact while
+    the work stays that of the OFFSET scan; ranking the whole scope instead
+    would make SQLite sort every climber for each page.
+    """
+    leading = _ordered_leaderboard(gym_id, only_active, date_from, date_to).values(
+        *LEADERBOARD_FIELDS, 'most_recent_ascent'
+    )[:offset + limit]
+    sql, params = leading.query.sql_with_params()
+    quote = connection.ops.quote_name
+    points, recent, rank, index = map(quote, ('total_points', 'most_recent_ascent', 'rank', 'index'))
+    ranked = (
+        f"SELECT {', '.join(map(quote, LEADERBOARD_FIELDS))}, "
+        f'RANK() OVER (ORDER BY {points} DESC) AS {rank}, '
+        f'ROW_NUMBER() OVER (ORDER BY {points} DESC, {recent} DESC, {quote("id")}) AS {index} '
+        f'FROM ({sql}) {quote("leaderboard")} ORDER BY {index} LIMIT %s OFFSET %s'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(ranked, (*params, limit, offset))
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+async def aranked_entries(offset, limit, gym_id=None, only_active=False, date_from=None, date_to=None):
+    """Async version of ``ranked_entries``."""
+    return await sync_to_async(ranked_entries)(offset, limit, gym_id, only_active, date_from, date_to)
+
+
+def _scope(gym_id, only_active, date_from=None, date_to=None):
+    """One row per ranked climber with ``user_id``, ``total_points`` and ``most_recent_ascent``."""
+    if _is_ranged(date_from, date_to):
+        return DailyPoints.objects.filter(
+            **_daily_points(gym_id, only_active, date_from, date_to)
+        ).values('user_id').annotate(
+            total_points=Sum('points'), most_recent_ascent=Max('day')
+        ).order_by('user_id')
+    return LeaderboardScore.objects.filter(gym_id=gym_id, only_active__in=[only_active])
+
+
+def _ahead_of(score, user_id):
+    """Filter for the rows ordered before a climber's score in ``leaderboard_queryset``.
+
+    A row only exists once the climber has an ascent in its scope, so
+    ``most_recent_ascent`` is never NULL here and the comparison does not
+    depend on where the database sorts NULLs.
+    """
+    same_points = Q(total_points=score['total_points'])
+    return (
+        Q(total_points__gt=score['total_points'])
+        | (same_points & Q(most_recent_ascent__gt=score['most_recent_ascent']))
+        | (same_points & Q(most_recent_ascent=score['most_recent_ascent'], user_id__lt=user_id))
+    )
+
+
+def user_position(gym_id, only_active, user_id, date_from=None, date_to=None):
+    """Return ``{'rank', 'index', 'total_points'}`` for a climber, or None if unranked.
+
+    ``rank`` shares ties (1, 2, 2, 4) and ``index`` is the climber's 1-based
+    position in ``leaderboard_queryset`` order. Both come from counting rows
+    ahead of the climber rather than materializing the leaderboard; ranking
+    those rows with window functions would sort them all, where the counts
+    are index range scans.
+    """
+    scope = _scope(gym_id, only_active, date_from, date_to)
+    score = scope.filter(user_id=user_id).values('total_points', 'most_recent_ascent').first()
+    if score is None:
+        return None
+    return {
+        'rank': scope.filter(total_points__gt=score['total_points']).count() + 1,
+        'index': scope.filter(_ahead_of(score, user_id)).count() + 1,
+        'total_points': score['total_points'],
+    }
+
+
+async def auser_position(gym_id, only_active, user_id, date_from=None, date_to=None):
+    """Async version of ``user_position``."""
+    scope = _scope(gym_id, only_active, date_from, date_to)
+    score = await scope.filter(user_id=user_id).values('total_points', 'most_recent_ascent').afirst()
+    if score is None:
+        return None
+    return {
+        'rank': await scope.filter(total_points__gt=score['total_points']).acount() + 1,
+        'index': await scope.filter(_ahead_of(score, user_id)).acount() + 1,
+        'total_points': score['total_points'],
+    }
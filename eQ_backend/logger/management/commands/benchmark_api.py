@@ -0,0 +1,85 @@
+"""Drive the hot REST endpoints through the Django test client and report latency."""
+
+import json
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.test import APIClient
+
+from logger.benchmarks import run_cases, format_table, compare_to_baseline, benchmark_user
+from logger.models import Gym, Boulder
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark /api/leaderboard/, /api/gyms/<pk>/, /api/boulders/ (list, detail and ascents), /api/profile/ (and its ascents) '
+        'and /api/boulders/<pk>/ascent/ against the configured database, reporting '
+        'p50/p95 latency, queries per request and throughput. Seed data first with '
+        '"manage.py seed_data".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Timed requests per case (default 50).')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per case.')
+        parser.add_argument('--user', help='Username to authenticate as (default: the climber with most ascents).')
+        parser.add_argument('--cold-cache', action='store_true', help='Clear the cache before every request.')
+        parser.add_argument('--json', dest='json_path', help='Write results to this JSON file.')
+        parser.add_argument('--baseline', help='Fail if p95 or query counts regress against this JSON file.')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 slowdown vs the baseline (default 0.25).')
+
+    def handle(self, *args, **options):
+        user = benchmark_user(options['user'])
+        gym = Gym.objects.annotate(n=Count('walls__boulders')).order_by('-n').first()
+        # A boulder the user has not sent, so the POST/DELETE pair leaves the data unchanged
+        boulder = Boulder.objects.filter(is_active=True).exclude(ascents__climber=user).order_by('-num_ascents').first()
+        popular = Boulder.objects.order_by('-num_ascents').first()
+        if gym is None or boulder is None:
+            raise CommandError('Nothing to benchmark; run "manage.py seed_data" first.')
+
+        client = APIClient()
+        client.force_authenticate(user)
+        setup = cache.clear if options['cold_cache'] else None
+
+        def get(path, **params):
+            def call():
+                response = client.get(path, params)
+                if response.status_code != 200:
+                    raise CommandError(f'GET {path} returned {response.status_code}')
+            return call
+
+        ascent_url = f'/api/boulders/{boulder.pk}/ascent/'
+
+        def log_and_undo():
+            created = client.post(ascent_url, {'ascent_type': 'send'}, format='json')
+            deleted = client.delete(ascent_url)
+            if created.status_code != 201 or deleted.status_code != 200:
+                raise CommandError(f'Ascent round trip returned {created.status_code}/{deleted.status_code}')
+
+        cases = [
+            ('leaderboard', get('/api/leaderboard/')),
+            ('leaderboard gym active', get('/api/leaderboard/', gym_id=gym.pk, only_active='true')),
+            ('leaderboard around me', get('/api/leaderboard/', around_me=10)),
+            ('gym detail', get(f'/api/gyms/{gym.pk}/')),
+            ('boulder list', get('/api/boulders/')),
+            ('boulder detail', get(f'/api/boulders/{popular.pk}/')),
+            ('boulder ascents', get(f'/api/boulders/{popular.pk}/ascents/')),
+            ('profile', get('/api/profile/')),
+            ('profile ascents', get('/api/profile/ascents/')),
+            ('ascent post + delete', log_and_undo),
+        ]
+
+        results = run_cases(cases, options['requests'], options['warmup'], setup)
+
+        self.stdout.write(f'User {user.username}, gym {gym.pk}, boulder {boulder.pk}')
+        self.stdout.write(format_table(results))
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as handle:
+                json.dump(results, handle, indent=2)
+        if options['baseline']:
+            regressions = compare_to_baseline(results, options['baseline'], options['tolerance'])
+            if regressions:
+                raise CommandError('Regressions against baseline:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against baseline.'))
+
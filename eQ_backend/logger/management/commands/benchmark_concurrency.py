@@ -0,0 +1,76 @@
+"""Compare concurrent-client throughput of the sync (WSGI) and async (ASGI) read endpoints."""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import AsyncClient, Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+from logger.benchmarks import client_environment, measure_threaded, measure_gathered, format_table, benchmark_user
+from logger.models import Gym
+
+
+class Command(BaseCommand):
+    help = (
+        'Hit the leaderboard, gym detail and profile endpoints from many clients at once: '
+        'the DRF views through the WSGI handler from a thread per client, and their '
+        '/api/async/ twins through the ASGI handler from a coroutine per client on one '
+        'event loop. Reports latency and aggregate throughput for each. Seed data first '
+        'with "manage.py seed_data".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=16, help='Concurrent clients (default 16).')
+        parser.add_argument('--requests', type=int, default=20, help='Requests per client per case (default 20).')
+        parser.add_argument('--user', help='Username to authenticate as (default: the climber with most ascents).')
+        parser.add_argument('--json', dest='json_path', help='Write results to this JSON file.')
+
+    def handle(self, *args, **options):
+        user = benchmark_user(options['user'])
+        gym = Gym.objects.annotate(n=Count('walls__boulders')).order_by('-n').first()
+        if gym is None:
+            raise CommandError('Nothing to benchmark; run "manage.py seed_data" first.')
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+        def threaded(path, params):
+            def make_call():
+                client = Client()
+
+                def call():
+                    response = client.get(path, params, headers=headers)
+                    if response.status_code != 200:
+                        raise CommandError(f'GET {path} returned {response.status_code}')
+                return call
+            return make_call
+
+        def gathered(path, params):
+            def make_call():
+                client = AsyncClient()
+
+                async def call():
+                    response = await client.get(path, params, headers=headers)
+                    if response.status_code != 200:
+                        raise CommandError(f'GET {path} returned {response.status_code}')
+                return call
+            return make_call
+
+        cases = [
+            ('leaderboard', 'leaderboard/', {}),
+            ('leaderboard gym active', 'leaderboard/', {'gym_id': gym.pk, 'only_active': 'true'}),
+            ('gym detail', f'gyms/{gym.pk}/', {}),
+            ('profile', 'profile/', {}),
+        ]
+        clients, iterations = options['clients'], options['requests']
+        results = []
+        with client_environment():
+            for name, path, params in cases:
+                results.append(measure_threaded(f'{name} (wsgi)', threaded(f'/api/{path}', params), clients, iterations))
+                results.append(measure_gathered(f'{name} (asgi)', gathered(f'/api/async/{path}', params), clients, iterations))
+
+        self.stdout.write(f'User {user.username}, gym {gym.pk}, {clients} clients x {iterations} requests')
+        self.stdout.write(format_table(results))
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as handle:
+                json.dump(results, handle, indent=2)
@@ -0,0 +1,62 @@
+"""Compare per-row serialization cost of BoulderSerializer and the ``.values()`` fast path."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from logger.benchmarks import measure
+from logger.models import Ascent, Boulder
+from logger.serializers import (
+    AscentSerializerWithoutBoulder, BoulderSerializer, boulder_rows, ascent_rows_by_boulder,
+    ascents_with_climbers, BOULDER_ROW_FIELDS,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Serialize the same boulders with BoulderSerializer and with boulder_rows, with and '
+        'without embedded ascents, and report the cost per row. "serialize" cases time only '
+        'the Python work on already-loaded data; "query + serialize" cases include the queries.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--boulders', type=int, default=500, help='Boulders to serialize (default 500).')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed runs per case (default 20).')
+
+    def handle(self, *args, **options):
+        boulders = Boulder.objects.select_related('wall').order_by('id')[:options['boulders']]
+        ids = list(boulders.values_list('id', flat=True))
+        if not ids:
+            raise CommandError('Nothing to benchmark; run "manage.py seed_data" first.')
+        # Every other boulder counts as sent, so the user_has_sent branch is exercised
+        sent = frozenset(ids[::2])
+        context = {'sent_boulder_ids': sent}
+
+        instances = list(boulders)
+        rows = list(boulders.values(*BOULDER_ROW_FIELDS))
+        with_ascents = list(Boulder.objects.filter(pk__in=ids).select_related('wall').prefetch_related(ascents_with_climbers()).order_by('id'))
+        ascent_rows = ascent_rows_by_boulder(ids)
+
+        def serializer_with_ascents(objects):
+            data = BoulderSerializer(objects, many=True, context=context).data
+            for boulder, obj in zip(data, objects):
+                boulder['ascents'] = AscentSerializerWithoutBoulder(obj.ascents.all(), many=True).data
+            return data
+
+        cases = [
+            ('serialize: BoulderSerializer', lambda: BoulderSerializer(instances, many=True, context=context).data),
+            ('serialize: boulder_rows', lambda: boulder_rows(rows, sent)),
+            ('serialize + ascents: BoulderSerializer', lambda: serializer_with_ascents(with_ascents)),
+            ('serialize + ascents: boulder_rows', lambda: boulder_rows(rows, sent, ascent_rows)),
+            ('query + serialize: BoulderSerializer', lambda: BoulderSerializer(list(boulders), many=True, context=context).data),
+            ('query + serialize: boulder_rows', lambda: boulder_rows(boulders.values(*BOULDER_ROW_FIELDS), sent)),
+        ]
+        results = [measure(name, call, options['iterations'], warmup=2, count_queries=False) for name, call in cases]
+
+        ascents = Ascent.objects.filter(boulder_id__in=ids).count()
+        self.stdout.write(f'{len(ids)} boulders, {ascents} ascents, {options["iterations"]} runs per case')
+        self.stdout.write(f"{'case':<42}{'p50 ms':>10}{'us/row':>10}{'speedup':>9}")
+        for index, result in enumerate(results):
+            baseline = results[index - index % 2]
+            self.stdout.write(
+                f"{result['name']:<42}{result['p50_ms']:>10.2f}{result['p50_ms'] * 1000 / len(ids):>10.2f}"
+                f"{baseline['p50_ms'] / result['p50_ms']:>8.1f}x"
+            )
@@ -0,0 +1,22 @@
+"""Queue a background job from the command line."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from logger.jobs import TASKS, enqueue
+
+
+class Command(BaseCommand):
+    help = 'Queue a maintenance job such as rebuild_scores or recount_ascents for run_workers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', help='Registered task name.')
+        parser.add_argument('--key', default=None, help='Skip queueing if a job with this key is already waiting.')
+
+    def handle(self, *args, **options):
+        if options['name'] not in TASKS:
+            raise CommandError(f"Unknown job {options['name']!r}; choose from {', '.join(sorted(TASKS))}.")
+        job = enqueue(options['name'], key=options['key'])
+        if job is None:
+            self.stdout.write('Ran inline (EQ_JOBS_EAGER).')
+        else:
+            self.stdout.write(f'Queued {job}.')
@@ -0,0 +1,69 @@
+"""Find and fix drift in the denormalized ascent counters and points."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from logger.reconcile import all_boulder_ids, current_watermark, pruned_since, reconcile_boulders, touched_boulder_ids
+
+
+def parse_watermark(value):
+    """Parse a printed ``<change_id>:<ascent_id>`` watermark."""
+    try:
+        change_id, ascent_id = (int(part) for part in value.split(':'))
+    except ValueError:
+        raise CommandError(f'--since must be a watermark like 120:4531, not {value!r}.')
+    return change_id, ascent_id
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute Boulder.num_ascents and Ascent.points in SQL, report any '
+        'drift and fix it, one transaction per chunk of boulders. With --since, '
+        'only boulders changed or ascended after that watermark are checked, '
+        'unless the change log has been pruned past it; the watermark to pass '
+        'next time is printed last.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it.')
+        parser.add_argument('--since', default=None, help='Only check boulders changed after this watermark.')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Boulders per transaction (default 500).')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+        fix = not options['dry_run']
+        # Taken first, so changes made while this runs are checked again next time
+        watermark = current_watermark()
+        since = None if options['since'] is None else parse_watermark(options['since'])
+        if since is not None and pruned_since(since[0]):
+            self.stdout.write(self.style.WARNING(
+                'Change log entries after the watermark have been pruned; checking every boulder.'
+            ))
+            since = None
+        if since is None:
+            chunks = all_boulder_ids(chunk_size)
+        else:
+            chunks = touched_boulder_ids(since, watermark, chunk_size)
+
+        checked = counts = points = point_delta = 0
+        climbers = set()
+        for boulder_ids in chunks:
+            report = reconcile_boulders(boulder_ids, fix=fix)
+            checked += len(boulder_ids)
+            counts += len(report['counts'])
+            points += report['points']
+            point_delta += report['point_delta']
+            climbers |= report['climbers']
+            for boulder_id, stored, actual in report['counts']:
+                self.stdout.write(f'Boulder {boulder_id}: num_ascents {stored}, counted {actual}')
+            if report['points']:
+                self.stdout.write(f"{report['points']} ascents of boulders {boulder_ids[0]}-{boulder_ids[-1]} had stale points")
+
+        verb = 'Fixed' if fix else 'Found'
+        summary = f'{verb} {counts} ascent counters and {points} ascent points ({point_delta:+d} points) in {checked} boulders'
+        if fix and climbers:
+            summary += f'; refreshed {len(climbers)} climbers'
+        style = self.style.WARNING if (counts or points) and not fix else self.style.SUCCESS
+        self.stdout.write(style(summary + '.'))
+        self.stdout.write(f'Watermark: {watermark[0]}:{watermark[1]}')
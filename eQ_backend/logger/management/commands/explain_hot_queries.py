@@ -0,0 +1,107 @@
+"""Show query plans and timings for the hot access paths, with and without their indexes."""
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, Q, Sum
+
+from logger.models import Ascent, Boulder, LeaderboardScore
+from logger.leaderboard import leaderboard_queryset
+
+# Indexes added for these access paths, dropped temporarily for the "before" run
+HOT_PATH_INDEXES = [
+    'ascent_climber_date_id_idx',
+    'ascent_boulder_date_id_idx',
+    'boulder_wall_active_idx',
+    'leaderboard_rank_idx',
+    'boulder_date_set_idx',
+    'boulder_active_date_idx',
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Print EXPLAIN output and median timings for the leaderboard, profile, '
+        'boulder and gym detail queries, then repeat them with the hot-path '
+        'indexes dropped inside a rolled-back transaction. Run it against a '
+        'seeded database for meaningful numbers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query (default 20).')
+        parser.add_argument('--no-plans', action='store_true', help='Only print timings.')
+
+    def handle(self, *args, **options):
+        climber_id = self._busiest('climber_id')
+        boulder_id = self._busiest('boulder_id')
+        gym_id = Boulder.objects.values('wall__gym_id').annotate(n=Count('pk')).order_by('-n').values_list('wall__gym_id', flat=True).first()
+        if climber_id is None or gym_id is None:
+            raise CommandError('No ascents found; seed the database first.')
+
+        # Keyset position halfway through the active boulders, as a deep page would send
+        middle = Boulder.objects.filter(is_active=True).order_by('-date_set', '-id').values('date_set', 'id')[
+            Boulder.objects.filter(is_active=True).count() // 2:
+        ].first() or {'date_set': None, 'id': 0}
+
+        queries = {
+            'profile ascents': lambda: Ascent.objects.filter(climber_id=climber_id).order_by('-date_climbed', '-id'),
+            'boulder ascents': lambda: Ascent.objects.filter(boulder_id=boulder_id).order_by('-date_climbed', '-id'),
+            'gym active boulders': lambda: Boulder.objects.filter(wall__gym_id=gym_id, is_active=True),
+            'leaderboard refresh (one climber)': lambda: Ascent.objects.filter(climber_id=climber_id).values(
+                'climber_id', gym_id=F('boulder__wall__gym_id'), is_active=F('boulder__is_active'),
+            ).annotate(points=Sum('points'), latest=Max('date_climbed'), count=Count('id')).order_by(),
+            'leaderboard page (gym, active)': lambda: leaderboard_queryset(gym_id=gym_id, only_active=True)[:100],
+            'leaderboard rank count': lambda: LeaderboardScore.objects.filter(
+                gym_id=gym_id, only_active__in=[True], total_points__gt=0,
+            ).values('pk'),
+            'boulder list deep page (active)': lambda: Boulder.objects.filter(
+                Q(date_set__lte=middle['date_set']) & (Q(date_set__lt=middle['date_set']) | Q(id__lt=middle['id'])),
+                is_active__in=[True],
+            ).order_by('-date_set', '-id')[:100],
+        }
+
+        # Drop first, before anything is prepared: SQLite reuses cached statement plans
+        before = {}
+        connection.close()
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for name in HOT_PATH_INDEXES:
+                        cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+                before = self._run(queries, options, 'without indexes')
+                raise _Rollback
+        except _Rollback:
+            pass
+        connection.close()
+        after = self._run(queries, options, 'with indexes')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Median milliseconds'))
+        self.stdout.write(f"{'query':<36}{'without':>10}{'with':>10}{'speedup':>10}")
+        for label in queries:
+            speedup = before[label] / after[label] if after[label] else float('inf')
+            self.stdout.write(f'{label:<36}{before[label]:>10.3f}{after[label]:>10.3f}{speedup:>9.1f}x')
+
+    def _busiest(self, field):
+        return Ascent.objects.values(field).annotate(n=Count('pk')).order_by('-n').values_list(field, flat=True).first()
+
+    def _run(self, queries, options, heading):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Plans {heading}'))
+        medians = {}
+        for label, build in queries.items():
+            if not options['no_plans']:
+                self.stdout.write(self.style.MIGRATE_LABEL(f'  {label}'))
+                for line in build().explain().splitlines():
+                    self.stdout.write(f'    {line}')
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                list(build())
+                timings.append((time.perf_counter() - start) * 1000)
+            medians[label] = statistics.median(timings)
+        return medians
@@ -0,0 +1,50 @@
+"""Run queued background jobs (see ``logger.jobs``)."""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from logger.jobs import work
+
+
+def _start_worker():
+    # Needed where the pool spawns rather than forks; a no-op after a fork
+    django.setup()
+    connections.close_all()
+
+
+def _work(burst, poll_interval, max_jobs):
+    return work(burst=burst, poll_interval=poll_interval, max_jobs=max_jobs)
+
+
+class Command(BaseCommand):
+    help = (
+        'Claim and run queued jobs - leaderboard refreshes after regrades and '
+        'wall resets, counter repairs, score rebuilds - in a pool of worker '
+        'processes until interrupted, or with --burst until the queue is empty.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help='Worker processes (default 2; 1 runs in this process).')
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due instead of polling.')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls of an empty queue (default 1).')
+        parser.add_argument('--max-jobs', type=int, default=None, help='Exit after each worker has run this many jobs.')
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        if processes < 1:
+            raise CommandError('--processes must be at least 1.')
+        args = (options['burst'], options['poll_interval'], options['max_jobs'])
+        if processes == 1:
+            results = [_work(*args)]
+        else:
+            # Forked workers must not share the parent's open connections
+            connections.close_all()
+            with ProcessPoolExecutor(processes, initializer=_start_worker) as pool:
+                futures = [pool.submit(_work, *args) for _ in range(processes)]
+                results = [future.result() for future in futures]
+        succeeded = sum(result[0] for result in results)
+        failed = sum(result[1] for result in results)
+        self.stdout.write(f'{succeeded} jobs succeeded, {failed} failed.')
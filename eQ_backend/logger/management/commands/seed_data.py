@@ -0,0 +1,170 @@
+"""Seed a realistic gym dataset for load testing and benchmarks."""
+
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from logger.models import Gym, Wall, Boulder, Ascent, LeaderboardScore, DailyPoints, ChangeLog
+from logger.leaderboard import rebuild_all_scores, refresh_user_scores
+from logger.services import recount_ascents
+from logger.versions import touch_gyms
+
+SEED_GYM_PREFIX = 'Seed Gym'
+SEED_USER_PREFIX = 'seed-climber-'
+
+
+@contextmanager
+def explicit_dates():
+    """Let bulk_create keep the dates we generate instead of stamping today."""
+    fields = [Boulder._meta.get_field('date_set'), Ascent._meta.get_field('date_climbed')]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = 'Seed gyms, walls, boulders, climbers and ascents with bulk_create.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gyms', type=int, default=3)
+        parser.add_argument('--walls', type=int, default=8, help='Walls per gym.')
+        parser.add_argument('--boulders', type=int, default=3000, help='Boulders in total.')
+        parser.add_argument('--climbers', type=int, default=1000)
+        parser.add_argument('--ascents', type=int, default=200000, help='Ascents in total.')
+        parser.add_argument('--days', type=int, default=365, help='Spread dates over this many past days.')
+        parser.add_argument('--active-ratio', type=float, default=0.3, help='Share of boulders still on the wall.')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, for reproducible datasets.')
+        parser.add_argument('--clear', action='store_true', help='Delete previously seeded data first.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        today = timezone.localdate()
+
+        def past_day():
+            return today - timedelta(days=rng.randrange(options['days']))
+
+        with transaction.atomic(), explicit_dates():
+            if options['clear']:
+                self._clear()
+
+            run = Gym.objects.filter(name__startswith=SEED_GYM_PREFIX).count()
+            gyms = Gym.objects.bulk_create([
+                Gym(name=f'{SEED_GYM_PREFIX} {run + i + 1}') for i in range(options['gyms'])
+            ])
+            walls = Wall.objects.bulk_create([
+                Wall(gym=gym, name=f'Wall {i + 1}') for gym in gyms for i in range(options['walls'])
+            ])
+
+            grades = [grade for grade, _ in Boulder.GRADE_CHOICES]
+            styles = [style for style, _ in Boulder.STYLE_CHOICES]
+            difficulties = [difficulty for difficulty, _ in Boulder.DIFFICULTY_CHOICES]
+            boulders = Boulder.objects.bulk_create([
+                Boulder(
+                    wall=rng.choice(walls),
+                    setter_grade=rng.choice(grades),
+                    # Unique per boulder, so unique_together can never collide
+                    color=f'color-{i}',
+                    difficulty=rng.choice(difficulties),
+                    climbing_style=rng.choice(styles),
+                    date_set=past_day(),
+                    is_active=rng.random() < options['active_ratio'],
+                )
+                for i in range(options['boulders'])
+            ], batch_size=1000)
+
+            existing = User.objects.filter(username__startswith=SEED_USER_PREFIX).count()
+            password = make_password(None)
+            climbers = User.objects.bulk_create([
+                User(username=f'{SEED_USER_PREFIX}{existing + i}', first_name='Seed', last_name=str(existing + i), password=password)
+                for i in range(options['climbers'])
+            ], batch_size=1000)
+
+            # Popularity is skewed: a few climbers and boulders account for most ascents
+            climber_weights = [rng.paretovariate(1.5) for _ in climbers]
+            boulder_weights = [rng.paretovariate(1.2) for _ in boulders]
+            per_climber = self._split(options['ascents'], climber_weights, len(boulders))
+
+            ascents = []
+            for climber, count in zip(climbers, per_climber):
+                for boulder in self._weighted_sample(rng, boulders, boulder_weights, count):
+                    ascents.append(Ascent(
+                        climber=climber,
+                        boulder=boulder,
+                        ascent_type='flash' if rng.random() < 0.25 else 'send',
+                        date_climbed=max(boulder.date_set, past_day()),
+                        points=Ascent.points_for_grade(boulder.setter_grade),
+                    ))
+                if len(ascents) >= 20000:
+                    Ascent.objects.bulk_create(ascents, batch_size=5000)
+                    ascents = []
+            Ascent.objects.bulk_create(ascents, batch_size=5000)
+
+            # bulk_create bypasses the signals, so derive the denormalized data once
+            for start in range(0, len(boulders), 1000):
+                recount_ascents([boulder.pk for boulder in boulders[start:start + 1000]])
+            rebuild_all_scores()
+            touch_gyms([gym.pk for gym in gyms])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(gyms)} gyms, {len(walls)} walls, {len(boulders)} boulders, "
+            f"{len(climbers)} climbers and {sum(per_climber)} ascents."
+        ))
+
+    @staticmethod
+    def _clear():
+        """Delete previously seeded gyms and climbers with everything hanging off them.
+
+        A cascading delete would run the ascent, boulder and wall signal
+        handlers once per row; the seeded rows are removed in bulk instead,
+        and only the few non-seeded climbers and boulders they touched are
+        recomputed.
+        """
+        gyms = Gym.objects.filter(name__startswith=SEED_GYM_PREFIX)
+        users = User.objects.filter(username__startswith=SEED_USER_PREFIX)
+        ascents = Ascent.objects.filter(Q(boulder__wall__gym__in=gyms) | Q(climber__in=users))
+        climber_ids = set(ascents.exclude(climber__in=users).values_list('climber_id', flat=True))
+        boulder_ids = set(ascents.exclude(boulder__wall__gym__in=gyms).values_list('boulder_id', flat=True))
+
+        for queryset in (
+            ascents,
+            LeaderboardScore.objects.filter(Q(gym__in=gyms) | Q(user__in=users)),
+            DailyPoints.objects.filter(Q(gym__in=gyms) | Q(user__in=users)),
+            ChangeLog.objects.filter(gym__in=gyms),
+            Boulder.objects.filter(wall__gym__in=gyms),
+            Wall.objects.filter(gym__in=gyms),
+        ):
+            # No signals and no cascade collection; nothing else references these rows any more
+            queryset._raw_delete(queryset.db)
+        gyms.delete()
+        users.delete()
+
+        if climber_ids:
+            refresh_user_scores(climber_ids)
+        if boulder_ids:
+            recount_ascents(boulder_ids)
+
+    @staticmethod
+    def _split(total, weights, cap):
+        """Share ``total`` ascents out by weight, at most ``cap`` per climber."""
+        scale = total / sum(weights)
+        return [min(cap, round(weight * scale)) for weight in weights]
+
+    @staticmethod
+    def _weighted_sample(rng, population, weights, count):
+        """Pick ``count`` distinct items, favouring heavier weights."""
+        if count >= len(population):
+            return list(population)
+        # Efraimidis-Spirakis: keep the items with the largest u ** (1 / w)
+        keyed = sorted(zip((rng.random() ** (1 / w) for w in weights), range(len(population))), reverse=True)
+        return [population[index] for _, index in keyed[:count]]
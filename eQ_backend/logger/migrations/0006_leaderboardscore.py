@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0005_populate_ascent_points'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('only_active', models.BooleanField(default=False)),
+                ('total_points', models.PositiveIntegerField(default=0)),
+                ('most_recent_ascent', models.DateField(blank=True, null=True)),
+                ('num_ascents', models.PositiveIntegerField(default=0)),
+                ('gym', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_scores', to='logger.gym')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_scores', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['gym', 'only_active', '-total_points', '-most_recent_ascent'], name='leaderboard_rank_idx')],
+                'unique_together': {('user', 'gym', 'only_active')},
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Data migration to build leaderboard scores from existing ascents
+
+from django.db import migrations
+from django.db.models import F, Sum, Max, Count
+
+
+def populate_leaderboard_scores(apps, schema_editor):
+    """Aggregate every climber's ascents into the global and per-gym leaderboard scopes."""
+    Ascent = apps.get_model('logger', 'Ascent')
+    LeaderboardScore = apps.get_model('logger', 'LeaderboardScore')
+
+    rows = Ascent.objects.values(
+        'climber_id', gym_id=F('boulder__wall__gym_id'), is_active=F('boulder__is_active')
+    ).annotate(
+        points=Sum('points'), latest=Max('date_climbed'), count=Count('id')
+    ).order_by()
+
+    totals = {}
+    for row in rows:
+        for gym_id in (None, row['gym_id']):
+            for only_active in (False, True):
+                if only_active and not row['is_active']:
+                    continue
+                key = (row['climber_id'], gym_id, only_active)
+                score = totals.setdefault(key, {'total_points': 0, 'num_ascents': 0, 'most_recent_ascent': None})
+                score['total_points'] += row['points'] or 0
+                score['num_ascents'] += row['count']
+                if score['most_recent_ascent'] is None or row['latest'] > score['most_recent_ascent']:
+                    score['most_recent_ascent'] = row['latest']
+
+    LeaderboardScore.objects.bulk_create([
+        LeaderboardScore(user_id=user_id, gym_id=gym_id, only_active=only_active, **score)
+        for (user_id, gym_id, only_active), score in totals.items()
+    ], batch_size=1000)
+
+    print(f"Created {len(totals)} leaderboard scores.")
+
+
+def reverse_populate_leaderboard_scores(apps, schema_editor):
+    """Remove all leaderboard scores."""
+    LeaderboardScore = apps.get_model('logger', 'LeaderboardScore')
+    LeaderboardScore.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0006_leaderboardscore'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_leaderboard_scores, reverse_populate_leaderboard_scores),
+    ]
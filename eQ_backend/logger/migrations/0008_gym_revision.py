@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0007_populate_leaderboard_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gym',
+            name='revision',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='gym',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0008_gym_revision'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='leaderboardscore',
+            name='leaderboard_rank_idx',
+        ),
+        migrations.AddIndex(
+            model_name='ascent',
+            index=models.Index(fields=['climber', 'date_climbed'], name='ascent_climber_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ascent',
+            index=models.Index(fields=['boulder', 'date_climbed'], name='ascent_boulder_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boulder',
+            index=models.Index(fields=['wall', 'is_active'], name='boulder_wall_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardscore',
+            index=models.Index(fields=['gym', 'only_active', '-total_points', '-most_recent_ascent', 'user'], name='leaderboard_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0009_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPoints',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('is_active', models.BooleanField(default=True)),
+                ('points', models.PositiveIntegerField(default=0)),
+                ('num_ascents', models.PositiveIntegerField(default=0)),
+                ('gym', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_points', to='logger.gym')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_points', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'user', 'points'], name='dailypoints_day_idx'), models.Index(fields=['gym', 'day', 'user', 'points'], name='dailypoints_gym_day_idx')],
+                'unique_together': {('user', 'gym', 'day', 'is_active')},
+            },
+        ),
+    ]
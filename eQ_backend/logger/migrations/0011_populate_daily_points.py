@@ -0,0 +1,43 @@
+# Data migration to bucket existing ascents into daily points
+
+from django.db import migrations
+from django.db.models import F, Sum, Count
+
+
+def populate_daily_points(apps, schema_editor):
+    """Sum every climber's ascents per gym, day and boulder activity."""
+    Ascent = apps.get_model('logger', 'Ascent')
+    DailyPoints = apps.get_model('logger', 'DailyPoints')
+
+    rows = Ascent.objects.values(
+        'climber_id', day=F('date_climbed'), gym_id=F('boulder__wall__gym_id'), is_active=F('boulder__is_active')
+    ).annotate(
+        total=Sum('points'), count=Count('id')
+    ).order_by()
+
+    DailyPoints.objects.bulk_create([
+        DailyPoints(
+            user_id=row['climber_id'], gym_id=row['gym_id'], day=row['day'], is_active=row['is_active'],
+            points=row['total'] or 0, num_ascents=row['count'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+    print(f"Created {DailyPoints.objects.count()} daily points buckets.")
+
+
+def reverse_populate_daily_points(apps, schema_editor):
+    """Remove all daily points buckets."""
+    DailyPoints = apps.get_model('logger', 'DailyPoints')
+    DailyPoints.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0010_dailypoints'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_daily_points, reverse_populate_daily_points),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0012_changelog'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='boulder',
+            index=models.Index(fields=['date_set', 'id'], name='boulder_date_set_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boulder',
+            index=models.Index(fields=['is_active', 'date_set', 'id'], name='boulder_active_date_idx'),
+        ),
+    ]
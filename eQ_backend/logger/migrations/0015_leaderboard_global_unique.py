@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0014_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='leaderboardscore',
+            constraint=models.UniqueConstraint(condition=models.Q(('gym__isnull', True)), fields=('user', 'only_active'), name='leaderboard_global_unique'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0015_leaderboard_global_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changelog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(fields=['created_at'], name='changelog_created_idx'),
+        ),
+    ]
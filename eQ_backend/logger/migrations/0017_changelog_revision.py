@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0016_changelog_created_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='changelog',
+            name='changelog_gym_idx',
+        ),
+        migrations.AddField(
+            model_name='changelog',
+            name='revision',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(fields=['gym', 'revision'], name='changelog_gym_revision_idx'),
+        ),
+    ]
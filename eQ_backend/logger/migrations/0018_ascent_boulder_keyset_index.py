@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0017_changelog_revision'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ascent',
+            name='ascent_boulder_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='ascent',
+            index=models.Index(fields=['boulder', 'date_climbed', 'id'], name='ascent_boulder_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0018_ascent_boulder_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ascent',
+            name='ascent_climber_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='ascent',
+            index=models.Index(fields=['climber', 'date_climbed', 'id'], name='ascent_climber_date_id_idx'),
+        ),
+    ]
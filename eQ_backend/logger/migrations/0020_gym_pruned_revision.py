@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0019_ascent_climber_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gym',
+            name='pruned_revision',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,11 +1,17 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 # Create your models here.
 
 
 class Gym(models.Model):
 
     name = models.CharField(max_length=100)
+    # Bumped whenever the gym's walls, boulders or ascents change; see logger.versions
+    revision = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Newest revision whose change log entries were pruned; older sync tokens get a full reset
+    pruned_revision = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
 
@@ -63,6 +69,13 @@ class Boulder(models.Model):
 
     class Meta:
         unique_together = ("wall", "setter_grade", "color", "is_active")
+        indexes = [
+            # Gym detail: active boulders of a gym's walls
+            models.Index(fields=["wall", "is_active"], name="boulder_wall_active_idx"),
+            # Boulder list keyset pages, newest first, optionally only active boulders
+            models.Index(fields=["date_set", "id"], name="boulder_date_set_idx"),
+            models.Index(fields=["is_active", "date_set", "id"], name="boulder_active_date_idx"),
+        ]
     
     def __str__(self):
         return f"{self.setter_grade} {self.color} on {self.wall}"
@@ -95,11 +108,193 @@ class Ascent(models.Model):
 
     class Meta:
         unique_together = ("climber", "boulder")
+        indexes = [
+            # Profile history pages, keyed on (date_climbed, id), and per-climber leaderboard refreshes
+            models.Index(fields=["climber", "date_climbed", "id"], name="ascent_climber_date_id_idx"),
+            # Boulder detail ascent pages, keyed on (date_climbed, id)
+            models.Index(fields=["boulder", "date_climbed", "id"], name="ascent_boulder_date_id_idx"),
+        ]
     
+    @classmethod
+    def points_for_grade(cls, grade):
+        """Points awarded for an ascent of a boulder with the given grade."""
+        return cls.GRADE_POINTS.get(grade, 0)
+
     def calculate_points(self):
         """Calculate points based on boulder grade."""
-        grade = self.boulder.setter_grade
-        return self.GRADE_POINTS.get(grade, 0)
+        return self.points_for_grade(self.boulder.setter_grade)
     
     def __str__(self):
-        return f"{self.climber.username} - {self.boulder} ({self.ascent_type})"
\ No newline at end of file
+        return f"{self.climber.username} - {self.boulder} ({self.ascent_type})"
+
+
+class LeaderboardScore(models.Model):
+    """Denormalized leaderboard totals for one climber in one scope.
+
+    A scope is either global (``gym`` is null) or a single gym, optionally
+    restricted to active boulders. Rows are maintained by the ascent and
+    boulder signals in ``logger.signals`` so leaderboard reads never have to
+    aggregate the ``Ascent`` table.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="leaderboard_scores")
+    gym = models.ForeignKey(Gym, on_delete=models.CASCADE, null=True, blank=True, related_name="leaderboard_scores")
+    only_active = models.BooleanField(default=False)
+    total_points = models.PositiveIntegerField(default=0)
+    most_recent_ascent = models.DateField(null=True, blank=True)
+    num_ascents = models.PositiveIntegerField(default=0)
+
+
+    class Meta:
+        unique_together = ("user", "gym", "only_active")
+        constraints = [
+            # unique_together treats every NULL gym as distinct, so global rows need their own
+            models.UniqueConstraint(fields=["user", "only_active"], condition=models.Q(gym__isnull=True), name="leaderboard_global_unique"),
+        ]
+        indexes = [
+            models.Index(
+                fields=["gym", "only_active", "-total_points", "-most_recent_ascent", "user"],
+                name="leaderboard_rank_idx",
+            ),
+        ]
+
+    def __str__(self):
+        scope = self.gym or "all gyms"
+        return f"{self.user.username} - {self.total_points} pts ({scope})"
+
+
+class DailyPoints(models.Model):
+    """Points one climber earned in one gym on one day.
+
+    Ascents are bucketed by ``date_climbed`` and by whether the boulder is
+    still active, so leaderboards over an arbitrary date range (a week, a
+    season) sum a handful of rows per climber instead of scanning ``Ascent``.
+    Rows are maintained alongside ``LeaderboardScore`` by ``logger.leaderboard``.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_points")
+    gym = models.ForeignKey(Gym, on_delete=models.CASCADE, related_name="daily_points")
+    day = models.DateField()
+    is_active = models.BooleanField(default=True)
+    points = models.PositiveIntegerField(default=0)
+    num_ascents = models.PositiveIntegerField(default=0)
+
+
+    class Meta:
+        unique_together = ("user", "gym", "day", "is_active")
+        indexes = [
+            # Date-range leaderboards, across all gyms or within one
+            models.Index(fields=["day", "user", "points"], name="dailypoints_day_idx"),
+            models.Index(fields=["gym", "day", "user", "points"], name="dailypoints_gym_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.points} pts at {self.gym} on {self.day}"
+
+
+class ChangeLog(models.Model):
+    """Append-only log of wall and boulder changes in each gym.
+
+    Each entry records the gym revision it was written at, and that revision
+    is the change token clients send back to ``/api/gyms/<pk>/changes/``.
+    Rows are written together with the revision bump (see ``logger.versions``)
+    and pruned once older than ``EQ_CHANGELOG_RETENTION_DAYS`` (see
+    ``logger.tasks``). ``gym`` has no database constraint so deleting a gym
+    can still log the deletion of its walls and boulders.
+    """
+
+    WALL = "wall"
+    BOULDER = "boulder"
+    KIND_CHOICES = [
+        (WALL, "Wall"),
+        (BOULDER, "Boulder"),
+    ]
+
+    UPSERT = "upsert"
+    DELETE = "delete"
+    ACTION_CHOICES = [
+        (UPSERT, "Upsert"),
+        (DELETE, "Delete"),
+    ]
+
+    gym = models.ForeignKey(Gym, on_delete=models.CASCADE, db_constraint=False, related_name="changes")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    revision = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["gym", "revision"], name="changelog_gym_revision_idx"),
+            # Pruning finds the newest entry past the retention window
+            models.Index(fields=["created_at"], name="changelog_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.action} {self.kind} {self.object_id} at gym {self.gym_id}"
+
+
+class Job(models.Model):
+    """A unit of background work, run by ``manage.py run_workers``.
+
+    ``name`` picks the task registered in ``logger.tasks`` and ``payload``
+    holds its keyword arguments. At most one job per ``key`` waits in the
+    queue at a time, so repeated changes to the same data are only recomputed
+    once. See ``logger.jobs``.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    name = models.CharField(max_length=50)
+    key = models.CharField(max_length=100, null=True, blank=True)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["key"], condition=models.Q(status="queued"), name="job_queued_key_unique"),
+        ]
+        indexes = [
+            # Workers claim the oldest due job
+            models.Index(fields=["status", "run_after"], name="job_claim_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.name} ({self.status})"
+
+    def report_progress(self, done, total=None):
+        """Record how far a running job has got; jobs run eagerly have no row to update.
+
+        Also refreshes ``locked_at``, so a job that keeps reporting progress
+        is not taken for a dead worker's and claimed again.
+        """
+        self.progress = done
+        if total is not None:
+            self.total = total
+        if self.pk is not None:
+            self.locked_at = timezone.now()
+            Job.objects.filter(pk=self.pk, status=Job.RUNNING, locked_by=self.locked_by).update(
+                progress=self.progress, total=self.total, locked_at=self.locked_at,
+            )
@@ -0,0 +1,123 @@
+"""Keyset pagination for feeds ordered by a date and the primary key.
+
+DRF's ``CursorPagination`` positions its cursor on the first ordering field
+only and falls back to an OFFSET within ties, which degrades when many rows
+share a date. ``KeysetPagination`` encodes the full ``(date, id)`` key of the
+page edge instead, so every page is a single range scan of an index on those
+two columns however deep the client pages.
+"""
+
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Newest-first pages over ``(date_field, id)``.
+
+    Works on model instances and on ``.values()`` rows, as long as both
+    columns are selected. Responses carry ``next``, ``previous`` and ``results``.
+    Set ``base_url`` to link to another endpoint than the current request's.
+    """
+
+    date_field = 'date_set'
+    page_size = 100
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    base_url = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        date_field = self.date_field
+
+        if cursor is None:
+            reverse = False
+            queryset = queryset.order_by(f'-{date_field}', '-id')
+        else:
+            reverse, date, pk = cursor
+            if reverse:
+                # Walking back towards newer rows; flipped back below
+                after = Q(**{f'{date_field}__gte': date}) & (Q(**{f'{date_field}__gt': date}) | Q(id__gt=pk))
+                queryset = queryset.filter(after).order_by(date_field, 'id')
+            else:
+                before = Q(**{f'{date_field}__lte': date}) & (Q(**{f'{date_field}__lt': date}) | Q(id__lt=pk))
+                queryset = queryset.filter(before).order_by(f'-{date_field}', '-id')
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+        self.has_next = has_more if not reverse else True
+        self.has_previous = cursor is not None and (reverse is False or has_more)
+        self.first_key = self._key(rows[0]) if rows else None
+        self.last_key = self._key(rows[-1]) if rows else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.has_next or self.last_key is None:
+            return None
+        return self.encode_cursor(False, *self.last_key)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_key is None:
+            # Paged past the end; the first page is the only safe way back
+            return remove_query_param(self.get_base_url(), self.cursor_query_param)
+        return self.encode_cursor(True, *self.first_key)
+
+    def _key(self, row):
+        if isinstance(row, dict):
+            return row[self.date_field], row['id']
+        return getattr(row, self.date_field), row.pk
+
+    def encode_cursor(self, reverse, date, pk):
+        tokens = {'d': date.isoformat(), 'i': pk}
+        if reverse:
+            tokens['r'] = '1'
+        encoded = b64encode(parse.urlencode(tokens).encode('ascii')).decode('ascii')
+        return replace_query_param(self.get_base_url(), self.cursor_query_param, encoded)
+
+    def get_base_url(self):
+        return self.base_url or self.request.build_absolute_uri()
+
+    def decode_cursor(self, request):
+        """Return ``(reverse, date, id)`` or None for the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            tokens = parse.parse_qs(b64decode(encoded.encode('ascii')).decode('ascii'), keep_blank_values=True)
+            date = parse_date(tokens['d'][0])
+            pk = int(tokens['i'][0])
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, date, pk
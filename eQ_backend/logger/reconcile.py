@@ -0,0 +1,141 @@
+"""Audit and repair of the denormalized ``Boulder.num_ascents`` and ``Ascent.points``.
+
+Both columns are kept up to date by ``logger.signals``, ``logger.services`` and
+the jobs in ``logger.tasks``, but bulk ORM writes, admin edits and raw SQL go
+around them. ``reconcile_boulders`` recomputes both for a chunk of boulders in
+SQL - a grouped COUNT per boulder and a CASE over the boulder's grade - and
+rewrites only the rows that drifted, together with the leaderboard rows and
+gym payloads derived from them. ``manage.py eq_reconcile`` drives it.
+"""
+
+from itertools import chain
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Max, Min, OuterRef, Subquery, Sum, Value, When
+
+from .models import Ascent, Boulder, ChangeLog
+from .leaderboard import refresh_user_scores
+from .services import counted_ascents
+from .versions import touch_gyms_of_boulders
+
+
+def points_for_grade_field(grade_field):
+    """``Ascent.points_for_grade`` as a CASE over ``grade_field``."""
+    return Case(
+        *(When(**{grade_field: grade}, then=Value(points)) for grade, points in Ascent.GRADE_POINTS.items()),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def reconcile_boulders(boulder_ids, fix=True):
+    """Check, and unless ``fix`` is False repair, the given boulders and their ascents.
+
+    Returns a report dict: ``counts`` as ``(boulder_id, stored, actual)``
+    for drifted counters, ``points`` as the number of ascents with wrong
+    points, ``point_delta`` as the points those ascents gain in total, and
+    ``climbers`` whose scores were refreshed. Memory stays proportional to
+    the drift, not to the ascents checked.
+    """
+    boulders = Boulder.objects.filter(pk__in=boulder_ids)
+    counts = list(
+        boulders.annotate(actual=counted_ascents()).exclude(num_ascents=F('actual'))
+        .order_by('pk').values_list('pk', 'num_ascents', 'actual')
+    )
+    wrong_points = Ascent.objects.filter(boulder_id__in=boulder_ids).annotate(
+        expected=points_for_grade_field('boulder__setter_grade')
+    ).exclude(points=F('expected'))
+    drift = wrong_points.aggregate(wrong=Count('pk'), delta=Sum(F('expected') - F('points')))
+    report = {'counts': counts, 'points': drift['wrong'], 'point_delta': drift['delta'] or 0, 'climbers': set()}
+    if not fix or not (counts or report['points']):
+        return report
+
+    changed_boulders = {boulder_id for boulder_id, _, _ in counts}
+    changed_boulders.update(wrong_points.values_list('boulder_id', flat=True).distinct())
+    report['climbers'] = set(wrong_points.values_list('climber_id', flat=True).distinct())
+    with transaction.atomic():
+        if counts:
+            boulders.filter(pk__in=[boulder_id for boulder_id, _, _ in counts]).update(num_ascents=counted_ascents())
+        if report['points']:
+            # SQL cannot join in an UPDATE's SET clause, so the grade comes from a correlated subquery
+            expected = Boulder.objects.filter(pk=OuterRef('boulder_id')).values(
+                points=points_for_grade_field('setter_grade')
+            )
+            Ascent.objects.filter(pk__in=wrong_points.values('pk')).update(points=Subquery(expected))
+            refresh_user_scores(report['climbers'])
+        touch_gyms_of_boulders(changed_boulders)
+    return report
+
+
+def touched_boulder_ids(since, until, chunk_size):
+    """Yield chunks of ids of boulders changed after watermark ``since``, up to ``until``.
+
+    Watermarks are ``(change_id, ascent_id)`` pairs. Ascent writes and boulder
+    saves log their boulder in ``ChangeLog``, but ``bulk_create`` skips that,
+    so boulders of ascents with a higher id than the watermark are checked too.
+    Each boulder is yielded once per run.
+    """
+    seen = set()
+    for chunk in chain(
+        logged_boulder_ids(since[0], until[0], chunk_size),
+        ascended_boulder_ids(since[1], until[1], chunk_size),
+    ):
+        chunk = [boulder_id for boulder_id in chunk if boulder_id not in seen]
+        seen.update(chunk)
+        if chunk:
+            yield chunk
+
+
+def pruned_since(change_id):
+    """Whether ``prune_changelog`` may have deleted entries after change ``change_id``.
+
+    Pruning removes everything below one id, so that is the case when the
+    oldest remaining entry is not the one right after ``change_id``.
+    """
+    first = ChangeLog.objects.aggregate(first=Min('id'))['first']
+    return first is not None and change_id < first - 1
+
+
+def current_watermark():
+    """Return the ``(change_id, ascent_id)`` watermark of everything written so far."""
+    return (
+        ChangeLog.objects.aggregate(last=Max('id'))['last'] or 0,
+        Ascent.objects.aggregate(last=Max('id'))['last'] or 0,
+    )
+
+
+def logged_boulder_ids(since, until, chunk_size):
+    """Yield chunks of ids of boulders in change log entries ``since < id <= until``."""
+    while True:
+        changes = list(
+            ChangeLog.objects.filter(kind=ChangeLog.BOULDER, id__gt=since, id__lte=until)
+            .order_by('id').values_list('id', 'object_id')[:chunk_size]
+        )
+        if not changes:
+            return
+        since = changes[-1][0]
+        yield sorted({object_id for _, object_id in changes})
+
+
+def ascended_boulder_ids(since, until, chunk_size):
+    """Yield chunks of ids of boulders with ascents ``since < id <= until``."""
+    while True:
+        ascents = list(
+            Ascent.objects.filter(id__gt=since, id__lte=until)
+            .order_by('id').values_list('id', 'boulder_id')[:chunk_size]
+        )
+        if not ascents:
+            return
+        since = ascents[-1][0]
+        yield sorted({boulder_id for _, boulder_id in ascents})
+
+
+def all_boulder_ids(chunk_size):
+    """Yield chunks of every boulder id in order, reading one chunk at a time."""
+    last = 0
+    while True:
+        ids = list(Boulder.objects.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return
+        last = ids[-1]
+        yield ids
@@ -1,73 +1,242 @@
-from rest_framework import serializers
-from .models import Gym, Wall, Boulder, Ascent
-from django.contrib.auth.models import User
-
-class UserSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = User
-        fields = ['id', 'username', 'first_name', 'last_name', 'email']
-
-class GymSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Gym
-        fields = '__all__'
-
-    def to_representation(self, instance):
-        rep = super().to_representation(instance)
-        request = self.context.get('request')
-        # Only include walls for detail view
-        if request and request.parser_context and request.parser_context.get('kwargs', {}).get('pk'):
-            from .serializers import WallSerializer
-            rep['walls'] = WallSerializer(instance.walls.all(), many=True).data
-            boulders_qs = Boulder.objects.filter(wall__gym=instance, is_active=True)
-            rep['boulders'] = BoulderSerializer(boulders_qs, many=True, context=self.context).data
-        return rep
-
-class WallSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Wall
-        exclude = ('gym',)
-
-class BoulderSerializer(serializers.ModelSerializer):
-    user_has_sent = serializers.SerializerMethodField()
-    wall_details = serializers.SerializerMethodField()
-
-    class Meta:
-        model = Boulder
-        fields = '__all__'
-
-    def get_user_has_sent(self, obj):
-        """Check if the authenticated user has sent this boulder."""
-        request = self.context.get('request')
-        if request and hasattr(request, 'user') and request.user.is_authenticated:
-            return Ascent.objects.filter(climber=request.user, boulder=obj).exists()
-        return False
-    
-    def get_wall_details(self, obj):
-        """Include wall details with id and name."""
-        if obj.wall:
-            return {'id': obj.wall.id, 'name': obj.wall.name}
-        return None
-
-    def to_representation(self, instance):
-        rep = super().to_representation(instance)
-        request = self.context.get('request')
-        #Only include ascents for detail view
-        if request and request.parser_context and request.parser_context.get('kwargs', {}).get('pk'):
-            from .serializers import AscentSerializerWithoutBoulder
-            rep['ascents'] = AscentSerializerWithoutBoulder(instance.ascents.all(), many=True).data
-        return rep
-
-class AscentSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Ascent
-        fields = '__all__'
-
-
-class AscentSerializerWithoutBoulder(serializers.ModelSerializer):
-    climber_details = UserSerializer(source='climber', read_only=True)
-    
-    class Meta:
-        model = Ascent
-        # include all fields except `boulder`
-        exclude = ('boulder',)
+from collections import defaultdict
+
+from rest_framework import serializers
+from django.db.models import Prefetch
+from .models import Gym, Wall, Boulder, Ascent
+from .cache import get_gym_detail
+from django.contrib.auth.models import User
+
+
+def sent_boulder_ids(request, **filters):
+    """Return the set of boulder ids the requesting user has sent, in one query.
+
+    Pass the result as ``sent_boulder_ids`` in the serializer context so
+    ``BoulderSerializer.get_user_has_sent`` does not query once per boulder.
+    """
+    user = getattr(request, 'user', None)
+    if not (user and user.is_authenticated):
+        return frozenset()
+    return frozenset(Ascent.objects.filter(climber=user, **filters).values_list('boulder_id', flat=True))
+
+
+def ascents_with_climbers():
+    """Prefetch for ``Boulder.ascents`` that loads each climber in the same query."""
+    return Prefetch('ascents', queryset=Ascent.objects.select_related('climber'))
+
+
+def boulder_ascents(boulder_id):
+    """A boulder's ascents, newest first, with climbers joined in and only the columns
+    ``AscentSerializerWithoutBoulder`` renders."""
+    return Ascent.objects.filter(boulder_id=boulder_id).select_related('climber').only(
+        'id', 'climber', 'ascent_type', 'date_climbed', 'points',
+        'climber__username', 'climber__first_name', 'climber__last_name', 'climber__email',
+    ).order_by('-date_climbed', '-id')
+
+class UserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name', 'email']
+
+class GymSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Gym
+        # Version stamps for the ETags in logger.versions and the change log in logger.changes
+        exclude = ['revision', 'updated_at', 'pruned_revision']
+
+    def to_representation(self, instance):
+        rep = super().to_representation(instance)
+        request = self.context.get('request')
+        # Only include walls for detail view
+        if request and request.parser_context and request.parser_context.get('kwargs', {}).get('pk'):
+            # Walls and boulders are shared by every user and cached; user_has_sent is overlaid per request
+            detail = get_gym_detail(instance.pk, lambda: build_gym_detail(instance))
+            sent = sent_boulder_ids(request, boulder__wall__gym=instance)
+            rep['walls'] = detail['walls']
+            rep['boulders'] = [dict(boulder, user_has_sent=boulder['id'] in sent) for boulder in detail['boulders']]
+        return rep
+
+
+def build_gym_detail(gym):
+    """The user-independent ``{'walls', 'boulders'}`` part of a gym detail response."""
+    boulders = list(Boulder.objects.filter(wall__gym=gym, is_active=True).order_by('id').values(*BOULDER_ROW_FIELDS))
+    return {
+        'walls': list(gym.walls.order_by('id').values('id', 'name')),
+        'boulders': boulder_rows(boulders, frozenset(), ascent_rows_by_boulder([row['id'] for row in boulders])),
+    }
+
+
+# Read-only fast path for list responses. These build the same JSON as
+# BoulderSerializer (and its nested ascents) from ``.values()`` rows with plain
+# dict construction, skipping per-instance ModelSerializer work.
+
+BOULDER_ROW_FIELDS = (
+    'id', 'wall_id', 'setter_id', 'setter_grade', 'color', 'difficulty', 'climbing_style',
+    'date_set', 'is_active', 'num_ascents', 'wall__name',
+)
+
+ASCENT_ROW_FIELDS = (
+    'id', 'boulder_id', 'climber_id', 'ascent_type', 'date_climbed', 'points',
+    'climber__username', 'climber__first_name', 'climber__last_name', 'climber__email',
+)
+
+
+def boulder_rows(rows, sent_boulder_ids, ascents_by_boulder=None):
+    """Shape ``Boulder.objects.values(*BOULDER_ROW_FIELDS)`` rows like ``BoulderSerializer``.
+
+    Pass ``ascents_by_boulder`` (see ``ascent_rows_by_boulder``) to embed
+    ascents the way detail responses do.
+    """
+    result = []
+    for row in rows:
+        boulder = {
+            'id': row['id'],
+            'user_has_sent': row['id'] in sent_boulder_ids,
+            'wall_details': {'id': row['wall_id'], 'name': row['wall__name']},
+            'setter_grade': row['setter_grade'],
+            'color': row['color'],
+            'difficulty': row['difficulty'],
+            'climbing_style': row['climbing_style'],
+            'date_set': row['date_set'].isoformat() if row['date_set'] else None,
+            'is_active': row['is_active'],
+            'num_ascents': row['num_ascents'],
+            'wall': row['wall_id'],
+            'setter': row['setter_id'],
+        }
+        if ascents_by_boulder is not None:
+            boulder['ascents'] = ascents_by_boulder.get(row['id'], [])
+        result.append(boulder)
+    return result
+
+
+def ascent_rows_by_boulder(boulder_ids):
+    """``AscentSerializerWithoutBoulder`` output for the given boulders, keyed by boulder id, in one query."""
+    grouped = defaultdict(list)
+    if not boulder_ids:
+        return grouped
+    rows = Ascent.objects.filter(boulder_id__in=boulder_ids).order_by('id').values(*ASCENT_ROW_FIELDS)
+    for row in rows:
+        grouped[row['boulder_id']].append({
+            'id': row['id'],
+            'climber_details': {
+                'id': row['climber_id'],
+                'username': row['climber__username'],
+                'first_name': row['climber__first_name'],
+                'last_name': row['climber__last_name'],
+                'email': row['climber__email'],
+            },
+            'ascent_type': row['ascent_type'],
+            'date_climbed': row['date_climbed'].isoformat() if row['date_climbed'] else None,
+            'points': row['points'],
+            'climber': row['climber_id'],
+        })
+    return grouped
+
+class WallSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Wall
+        exclude = ('gym',)
+
+# Ascents embedded in a boulder detail response; the same size as a page of /boulders/<pk>/ascents/
+DETAIL_ASCENTS = 20
+
+
+class BoulderSerializer(serializers.ModelSerializer):
+    user_has_sent = serializers.SerializerMethodField()
+    wall_details = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Boulder
+        fields = '__all__'
+
+    def get_user_has_sent(self, obj):
+        """Check if the authenticated user has sent this boulder."""
+        sent = self.context.get('sent_boulder_ids')
+        if sent is not None:
+            return obj.pk in sent
+        request = self.context.get('request')
+        if request and hasattr(request, 'user') and request.user.is_authenticated:
+            return Ascent.objects.filter(climber=request.user, boulder=obj).exists()
+        return False
+    
+    def get_wall_details(self, obj):
+        """Include wall details with id and name."""
+        if obj.wall:
+            return {'id': obj.wall.id, 'name': obj.wall.name}
+        return None
+
+    def to_representation(self, instance):
+        rep = super().to_representation(instance)
+        request = self.context.get('request')
+        # Only include ascents for detail view: the newest ones, the rest are paged from /ascents/
+        if request and request.parser_context and request.parser_context.get('kwargs', {}).get('pk'):
+            ascents = self.context.get('ascents_page')
+            if ascents is None:
+                ascents = boulder_ascents(instance.pk)[:DETAIL_ASCENTS]
+            rep['ascents'] = AscentSerializerWithoutBoulder(ascents, many=True).data
+        return rep
+
+class BoulderGradeSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    setter_grade = serializers.ChoiceField(choices=Boulder.GRADE_CHOICES)
+
+
+class BoulderRegradeSerializer(serializers.Serializer):
+    boulders = BoulderGradeSerializer(many=True, allow_empty=False)
+
+    def validate_boulders(self, value):
+        ids = [item['id'] for item in value]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError('Each boulder may only appear once.')
+        missing = set(ids) - set(Boulder.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        if missing:
+            raise serializers.ValidationError(f'Unknown boulder ids: {sorted(missing)}.')
+        return value
+
+
+class WallResetBoulderSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Boulder
+        fields = ['setter_grade', 'color', 'difficulty', 'climbing_style', 'setter']
+
+
+class WallResetSerializer(serializers.Serializer):
+    """Validate a wall reset against the wall in ``context['wall']``.
+
+    Boulders are unique per (wall, setter_grade, color, is_active), so the new
+    set may not repeat a grade and color, and a boulder can only be retired if
+    no retired boulder with its grade and color is already on the wall.
+    """
+    boulders = WallResetBoulderSerializer(many=True)
+
+    def validate_boulders(self, value):
+        keys = [(item.get('setter_grade', ''), item.get('color', '')) for item in value]
+        if len(keys) != len(set(keys)):
+            raise serializers.ValidationError('Each grade and color may only appear once.')
+        return value
+
+    def validate(self, attrs):
+        active, retired = set(), set()
+        for grade, color, is_active in self.context['wall'].boulders.values_list('setter_grade', 'color', 'is_active'):
+            (active if is_active else retired).add((grade, color))
+        clashes = sorted(active & retired)
+        if clashes:
+            raise serializers.ValidationError({'boulders': [
+                'Cannot retire boulders already retired on this wall with the same grade and color: '
+                + ', '.join(f'{grade} {color}' for grade, color in clashes) + '.'
+            ]})
+        return attrs
+
+
+class AscentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Ascent
+        fields = '__all__'
+
+
+class AscentSerializerWithoutBoulder(serializers.ModelSerializer):
+    climber_details = UserSerializer(source='climber', read_only=True)
+    
+    class Meta:
+        model = Ascent
+        # include all fields except `boulder`
+        exclude = ('boulder',)
@@ -0,0 +1,171 @@
+"""Set-based write operations that touch many rows at once.
+
+These bypass the per-instance model signals in ``logger.signals`` and so
+apply the same side effects (ascent points, leaderboard scores) themselves,
+queueing the ones that grow with the number of ascents as background jobs.
+"""
+
+from collections import defaultdict
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Boulder, Ascent
+from .leaderboard import refresh_user_scores
+from .serializers import boulder_rows, BOULDER_ROW_FIELDS
+from .versions import touch_gyms_of_boulders
+from .events import publish_ascent_changes
+from .jobs import enqueue
+
+
+@transaction.atomic
+def regrade_boulders(grades):
+    """Apply ``{boulder_id: setter_grade}`` with one UPDATE per grade.
+
+    Ascent points and leaderboard rows follow in a ``refresh_boulders`` job.
+    Returns the number of boulders updated.
+    """
+    boulder_ids_by_grade = defaultdict(list)
+    for boulder_id, grade in grades.items():
+        boulder_ids_by_grade[grade].append(boulder_id)
+
+    updated = 0
+    for grade, boulder_ids in boulder_ids_by_grade.items():
+        updated += Boulder.objects.filter(pk__in=boulder_ids).update(setter_grade=grade)
+
+    touch_gyms_of_boulders(grades)
+    enqueue('refresh_boulders', boulder_ids=list(grades))
+    return updated
+
+
+@transaction.atomic
+def reset_wall(wall, boulders):
+    """Retire every active boulder on ``wall`` and set ``boulders`` (field dicts) in their place.
+
+    One UPDATE retires the old set and one INSERT creates the new one; the
+    gym invalidation then runs once for the whole reset and the leaderboard
+    refresh is queued as one job. Returns ``{'retired': [ids], 'created': [boulder rows]}``.
+    """
+    retired_ids = list(wall.boulders.filter(is_active=True).values_list('pk', flat=True))
+    Boulder.objects.filter(pk__in=retired_ids).update(is_active=False)
+    created = Boulder.objects.bulk_create([Boulder(wall=wall, **fields) for fields in boulders])
+    created_ids = [boulder.pk for boulder in created]
+
+    if retired_ids:
+        # Retired boulders drop out of every climber's active-only scopes
+        enqueue('refresh_boulders', boulder_ids=retired_ids, recompute_points=False)
+    touch_gyms_of_boulders(retired_ids + created_ids)
+    rows = Boulder.objects.filter(pk__in=created_ids).order_by('id').values(*BOULDER_ROW_FIELDS)
+    return {'retired': retired_ids, 'created': boulder_rows(rows, frozenset())}
+
+
+def counted_ascents():
+    """A boulder's ascent count from a grouped COUNT, for annotating or updating boulders."""
+    ascent_counts = Ascent.objects.filter(
+        boulder=OuterRef('pk')
+    ).order_by().values('boulder').annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(ascent_counts), 0)
+
+
+def recount_ascents(boulder_ids):
+    """Set ``num_ascents`` from the ascent table for many boulders in one UPDATE."""
+    return Boulder.objects.filter(pk__in=boulder_ids).update(num_ascents=counted_ascents())
+
+
+def insert_new_ascents(ascents):
+    """Insert ``ascents``, skipping climber and boulder pairs that already exist.
+
+    Returns the boulder ids of the rows this call inserted. Where the database
+    can return rows from ``INSERT ... ON CONFLICT DO NOTHING``, that is one
+    statement per batch and the returned rows are exactly its own; elsewhere
+    each ascent is inserted in its own savepoint. Like ``bulk_create``, this
+    bypasses the ascent signals.
+    """
+    if not ascents:
+        return set()
+    if connection.vendor not in ('postgresql', 'sqlite') or not connection.features.can_return_rows_from_bulk_insert:
+        created = set()
+        for ascent in ascents:
+            try:
+                with transaction.atomic():
+                    Ascent.objects.bulk_create([ascent])
+            except IntegrityError:
+                continue
+            created.add(ascent.boulder_id)
+        return created
+
+    quote = connection.ops.quote_name
+    fields = [field for field in Ascent._meta.local_concrete_fields if not field.primary_key]
+    row = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    sql = (
+        f'INSERT INTO {quote(Ascent._meta.db_table)} ({", ".join(quote(field.column) for field in fields)}) '
+        f'VALUES {{rows}} ON CONFLICT DO NOTHING RETURNING {quote("boulder_id")}'
+    )
+    batch_size = connection.ops.bulk_batch_size(fields, ascents)
+    created = set()
+    with connection.cursor() as cursor:
+        for start in range(0, len(ascents), batch_size):
+            batch = ascents[start:start + batch_size]
+            params = [
+                field.get_db_prep_save(field.pre_save(ascent, True), connection)
+                for ascent in batch for field in fields
+            ]
+            cursor.execute(sql.format(rows=', '.join([row] * len(batch))), params)
+            created.update(boulder_id for boulder_id, in cursor.fetchall())
+    return created
+
+
+@transaction.atomic
+def log_ascents(climber, items):
+    """Log many ``{'boulder': id, 'ascent_type': type}`` items for one climber.
+
+    Returns one ``{'boulder', 'status'}`` result per item, in order, where
+    status is ``created``, ``duplicate``, ``not_found`` or ``invalid``.
+    """
+    ascent_types = {key for key, _ in Ascent.ASCENT_TYPES}
+    results = []
+    wanted = {}
+    for item in items:
+        boulder_id = item.get('boulder') if isinstance(item, dict) else None
+        ascent_type = item.get('ascent_type') if isinstance(item, dict) else None
+        result = {'boulder': boulder_id, 'status': 'created'}
+        if not isinstance(boulder_id, int) or isinstance(boulder_id, bool) or ascent_type not in ascent_types:
+            result['status'] = 'invalid'
+        elif boulder_id in wanted:
+            result['status'] = 'duplicate'
+        else:
+            wanted[boulder_id] = ascent_type
+        results.append(result)
+
+    grades = dict(Boulder.objects.filter(pk__in=wanted).values_list('pk', 'setter_grade'))
+    already_sent = set(
+        Ascent.objects.filter(climber=climber, boulder_id__in=grades).values_list('boulder_id', flat=True)
+    )
+    new_ascents = [
+        Ascent(
+            climber=climber,
+            boulder_id=boulder_id,
+            ascent_type=ascent_type,
+            points=Ascent.points_for_grade(grades[boulder_id]),
+        )
+        for boulder_id, ascent_type in wanted.items()
+        if boulder_id in grades and boulder_id not in already_sent
+    ]
+    # A concurrent request may insert the same pair first; only this call's own inserts count as created
+    created_ids = insert_new_ascents(new_ascents)
+
+    for result in results:
+        if result['status'] != 'created':
+            continue
+        if result['boulder'] not in grades:
+            result['status'] = 'not_found'
+        elif result['boulder'] not in created_ids:
+            result['status'] = 'duplicate'
+
+    if created_ids:
+        recount_ascents(created_ids)
+        refresh_user_scores([climber.pk])
+        touch_gyms_of_boulders(created_ids)
+        publish_ascent_changes(created_ids, [climber.pk])
+    return results
@@ -1,37 +1,131 @@
-from django.db.models.signals import post_save, post_delete, pre_save
-from django.dispatch import receiver
-from django.db.models import F
-from .models import Ascent, Boulder
-
-
-@receiver(post_save, sender=Ascent)
-def handle_ascent_created(sender, instance, created, **kwargs):
-    if created:
-        Boulder.objects.filter(pk=instance.boulder_id).update(num_ascents=F('num_ascents') + 1)
-
-
-@receiver(post_delete, sender=Ascent)
-def handle_ascent_deleted(sender, instance, **kwargs):
-    boulder_qs = Boulder.objects.filter(pk=instance.boulder_id)
-    boulder_qs.update(num_ascents=F('num_ascents') - 1)
-    boulder = boulder_qs.first()
-    if boulder and boulder.num_ascents < 0:
-        boulder.num_ascents = 0
-        boulder.save()
-
-
-@receiver(pre_save, sender=Boulder)
-def handle_boulder_grade_change(sender, instance, **kwargs):
-    """When a boulder's grade changes, update points for all associated ascents."""
-    if instance.pk:  # Only for existing boulders, not new ones
-        try:
-            old_boulder = Boulder.objects.get(pk=instance.pk)
-            # Check if setter_grade has changed
-            if old_boulder.setter_grade != instance.setter_grade:
-                # Update points for all ascents of this boulder
-                ascents = Ascent.objects.filter(boulder=instance)
-                for ascent in ascents:
-                    ascent.points = ascent.calculate_points()
-                    ascent.save(update_fields=['points'])
-        except Boulder.DoesNotExist:
-            pass
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.db import connection
+from django.dispatch import receiver
+from django.db.models import F
+from .models import Wall, Ascent, Boulder, ChangeLog
+from .leaderboard import (
+    refresh_user_scores, add_ascent_scores, remove_ascent_scores, add_ascent_daily_points, remove_ascent_daily_points,
+)
+from .versions import touch_walls, touch_boulders, touch_gyms_of_boulders, remove_boulders_from_walls
+from .events import publish_ascent_changes
+from .jobs import enqueue
+
+# Boulder fields whose changes affect ascent points or leaderboard scopes
+LEADERBOARD_FIELDS = frozenset({'setter_grade', 'wall', 'wall_id', 'is_active'})
+
+
+def adjust_num_ascents(boulder_id, delta):
+    """Add ``delta`` to a boulder's ``num_ascents`` in SQL and return the new value.
+
+    The counter never drops below zero. Where the database can return columns
+    from a write, this is a single ``UPDATE ... RETURNING``; otherwise the row
+    is read back, still inside the transaction. Returns None if no row changed.
+    """
+    boulders = Boulder.objects.filter(pk=boulder_id)
+    if delta < 0:
+        boulders = boulders.filter(num_ascents__gte=-delta)
+    if not connection.features.can_return_columns_from_insert:
+        if not boulders.update(num_ascents=F('num_ascents') + delta):
+            return None
+        return Boulder.objects.filter(pk=boulder_id).values_list('num_ascents', flat=True).first()
+    quote = connection.ops.quote_name
+    table, column = quote(Boulder._meta.db_table), quote('num_ascents')
+    sql = f'UPDATE {table} SET {column} = {column} + %s WHERE {quote(Boulder._meta.pk.column)} = %s'
+    params = [delta, boulder_id]
+    if delta < 0:
+        sql += f' AND {column} >= %s'
+        params.append(-delta)
+    with connection.cursor() as cursor:
+        cursor.execute(sql + f' RETURNING {column}', params)
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def boulder_scope(ascent):
+    """Return ``(gym_id, is_active)`` for an ascent's boulder, or None if it is gone.
+
+    Free when the boulder was loaded with its wall and ``is_active``;
+    otherwise one query.
+    """
+    if Ascent.boulder.is_cached(ascent):
+        boulder = ascent.boulder
+        if 'is_active' not in boulder.get_deferred_fields() and Boulder.wall.is_cached(boulder):
+            return boulder.wall.gym_id, boulder.is_active
+    return Boulder.objects.filter(pk=ascent.boulder_id).values_list('wall__gym_id', 'is_active').first()
+
+
+@receiver(post_save, sender=Ascent)
+def handle_ascent_created(sender, instance, created, **kwargs):
+    if not created:
+        # Edits may change points or dates anywhere in the climber's rows
+        refresh_user_scores([instance.climber_id])
+        touch_gyms_of_boulders([instance.boulder_id])
+    else:
+        # Stashed for the ascent view's response, so it need not re-read the boulder
+        instance._boulder_num_ascents = adjust_num_ascents(instance.boulder_id, 1)
+        scope = boulder_scope(instance)
+        if scope is not None:
+            add_ascent_scores(instance.climber_id, *scope, instance.points, instance.date_climbed)
+            add_ascent_daily_points(instance.climber_id, *scope, instance.points, instance.date_climbed)
+            touch_boulders({instance.boulder_id: scope[0]})
+    publish_ascent_changes([instance.boulder_id], [instance.climber_id])
+
+
+@receiver(post_delete, sender=Ascent)
+def handle_ascent_deleted(sender, instance, **kwargs):
+    # Clamped at zero in SQL so concurrent deletes never rewrite the row from a stale read
+    instance._boulder_num_ascents = adjust_num_ascents(instance.boulder_id, -1)
+    scope = boulder_scope(instance)
+    if scope is not None:
+        remove_ascent_scores(instance.climber_id, *scope, instance.points, instance.date_climbed)
+        remove_ascent_daily_points(instance.climber_id, *scope, instance.points, instance.date_climbed)
+        touch_boulders({instance.boulder_id: scope[0]})
+    publish_ascent_changes([instance.boulder_id], [instance.climber_id])
+
+
+@receiver(pre_save, sender=Boulder)
+def handle_boulder_grade_change(sender, instance, update_fields=None, **kwargs):
+    """Note whether a save changes anything ascent points or leaderboard rows depend on."""
+    if not instance.pk:  # Only for existing boulders, not new ones
+        return
+    # Saves that cannot change the grade, gym or active flag need no lookup
+    if update_fields is not None and not update_fields & LEADERBOARD_FIELDS:
+        return
+    old_boulder = Boulder.objects.filter(pk=instance.pk).values('setter_grade', 'wall_id', 'is_active').first()
+    if old_boulder is None:
+        return
+    instance._old_wall_id = old_boulder['wall_id']
+    # Leaderboard scopes depend on the grade, the gym and whether the boulder is active
+    instance._leaderboard_stale = (
+        (old_boulder['setter_grade'], old_boulder['wall_id'], old_boulder['is_active'])
+        != (instance.setter_grade, instance.wall_id, instance.is_active)
+    )
+
+
+@receiver(post_save, sender=Boulder)
+def handle_boulder_saved(sender, instance, created, **kwargs):
+    """Queue a points and leaderboard refresh for a regraded, moved or retired boulder."""
+    if getattr(instance, '_leaderboard_stale', False):
+        instance._leaderboard_stale = False
+        # Grows with the boulder's ascents, so it runs on a worker; see logger.tasks
+        enqueue('refresh_boulders', key=f'refresh_boulders:{instance.pk}', boulder_ids=[instance.pk])
+    old_wall_id = getattr(instance, '_old_wall_id', instance.wall_id)
+    instance._old_wall_id = instance.wall_id
+    if old_wall_id != instance.wall_id:
+        remove_boulders_from_walls({instance.pk: old_wall_id})
+    touch_gyms_of_boulders([instance.pk])
+
+
+@receiver(post_delete, sender=Boulder)
+def handle_boulder_deleted(sender, instance, **kwargs):
+    remove_boulders_from_walls({instance.pk: instance.wall_id})
+
+
+@receiver(post_save, sender=Wall)
+def handle_wall_saved(sender, instance, **kwargs):
+    touch_walls([instance])
+
+
+@receiver(post_delete, sender=Wall)
+def handle_wall_deleted(sender, instance, **kwargs):
+    touch_walls([instance], ChangeLog.DELETE)
@@ -0,0 +1,104 @@
+"""Background tasks run by ``manage.py run_workers``; queue them with ``logger.jobs.enqueue``.
+
+Each task is idempotent and commits in batches, reporting progress on its
+job row between them, so a retried or reclaimed job simply redoes the work.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Gym, Ascent, Boulder, LeaderboardScore, DailyPoints, ChangeLog
+from .jobs import task
+from .leaderboard import refresh_user_scores
+from .services import recount_ascents
+from .versions import touch_gyms_of_boulders
+from .events import publish_ascent_changes
+
+# Climbers or boulders handled per transaction
+BATCH_SIZE = 500
+
+
+@task('refresh_boulders')
+def refresh_boulders(job, boulder_ids, recompute_points=True):
+    """Bring ascent points and their climbers' leaderboard rows in line with the boulders.
+
+    Pass ``recompute_points=False`` when only the boulders' gym or active
+    flag changed, not their grade.
+    """
+    if recompute_points:
+        boulder_ids_by_grade = defaultdict(list)
+        for boulder_id, grade in Boulder.objects.filter(pk__in=boulder_ids).values_list('pk', 'setter_grade'):
+            boulder_ids_by_grade[grade].append(boulder_id)
+        with transaction.atomic():
+            for grade, ids in boulder_ids_by_grade.items():
+                # Every ascent of a boulder is worth the same, so one UPDATE per grade covers them all
+                Ascent.objects.filter(boulder_id__in=ids).update(points=Ascent.points_for_grade(grade))
+
+    climber_ids = sorted(set(Ascent.objects.filter(boulder_id__in=boulder_ids).values_list('climber_id', flat=True)))
+    for start in range(0, len(climber_ids), BATCH_SIZE):
+        refresh_user_scores(climber_ids[start:start + BATCH_SIZE])
+        job.report_progress(min(start + BATCH_SIZE, len(climber_ids)), len(climber_ids))
+    # Leaderboard and gym ETags derive from the gym revision, so bump it once the new rows are in
+    touch_gyms_of_boulders(boulder_ids)
+    publish_ascent_changes(boulder_ids, climber_ids)
+
+
+@task('recount_ascents')
+def recount_boulder_ascents(job, boulder_ids=None):
+    """Repair ``num_ascents`` for the given boulders, or for all of them."""
+    if boulder_ids is None:
+        boulder_ids = list(Boulder.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(boulder_ids), BATCH_SIZE):
+        recount_ascents(boulder_ids[start:start + BATCH_SIZE])
+        job.report_progress(min(start + BATCH_SIZE, len(boulder_ids)), len(boulder_ids))
+
+
+@task('rebuild_scores')
+def rebuild_scores(job):
+    """Rebuild every leaderboard row and daily bucket.
+
+    Unlike ``rebuild_all_scores`` this commits per batch of climbers, so the
+    leaderboard stays readable and progress is visible while it runs.
+    """
+    climber_ids = sorted(set(Ascent.objects.values_list('climber_id', flat=True)))
+    for start in range(0, len(climber_ids), BATCH_SIZE):
+        refresh_user_scores(climber_ids[start:start + BATCH_SIZE])
+        job.report_progress(min(start + BATCH_SIZE, len(climber_ids)), len(climber_ids))
+    # Climbers whose last ascent is gone have rows but were not refreshed above
+    with transaction.atomic():
+        LeaderboardScore.objects.exclude(user_id__in=Ascent.objects.values('climber_id')).delete()
+        DailyPoints.objects.exclude(user_id__in=Ascent.objects.values('climber_id')).delete()
+
+
+@task('prune_changelog')
+def prune_changelog(job):
+    """Delete change log entries older than ``EQ_CHANGELOG_RETENTION_DAYS``, in batches.
+
+    Everything below the newest expired id goes, so the log stays one
+    contiguous id range and its oldest id tells ``eq_reconcile`` whether a
+    watermark predates the pruned entries. Each gym records the newest
+    revision it lost in ``pruned_revision`` for ``logger.changes``.
+    """
+    threshold = timezone.now() - timedelta(days=settings.EQ_CHANGELOG_RETENTION_DAYS)
+    cutoff = ChangeLog.objects.filter(created_at__lt=threshold).aggregate(last=Max('id'))['last']
+    if cutoff is None:
+        return
+    with transaction.atomic():
+        # Recorded first, so a sync never trusts a token whose entries are about to go
+        for gym_id, revision in (
+            ChangeLog.objects.filter(id__lt=cutoff).values('gym_id').annotate(last=Max('revision'))
+            .order_by().values_list('gym_id', 'last')
+        ):
+            Gym.objects.filter(pk=gym_id, pruned_revision__lt=revision).update(pruned_revision=revision)
+    pruned = 0
+    while True:
+        ids = list(ChangeLog.objects.filter(id__lt=cutoff).order_by('id').values_list('id', flat=True)[:BATCH_SIZE])
+        if not ids:
+            return
+        pruned += ChangeLog.objects.filter(id__in=ids).delete()[0]
+        job.report_progress(pruned)
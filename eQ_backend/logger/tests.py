@@ -1,3 +1,1048 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import random
+import threading
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings, tag
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.db.models import Count
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from eQ_backend import metrics
+
+from .models import Gym, Wall, Boulder, Ascent, LeaderboardScore, DailyPoints, Job, ChangeLog
+from .leaderboard import rebuild_all_scores, refresh_user_scores
+from .serializers import BoulderSerializer, AscentSerializerWithoutBoulder, boulder_rows, ascent_rows_by_boulder, BOULDER_ROW_FIELDS, DETAIL_ASCENTS
+from .events import InProcessBroker, get_broker
+from .jobs import TASKS, claim, enqueue, run, work
+
+
+class LoggerTestData:
+    """Shared fixture: two gyms, one wall each, a few graded boulders and climbers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.gym = Gym.objects.create(name='Main Gym')
+        cls.other_gym = Gym.objects.create(name='Other Gym')
+        cls.wall = Wall.objects.create(gym=cls.gym, name='Cave')
+        cls.other_wall = Wall.objects.create(gym=cls.other_gym, name='Slab')
+        cls.l2 = Boulder.objects.create(wall=cls.wall, setter_grade='L2', color='red')
+        cls.l5 = Boulder.objects.create(wall=cls.wall, setter_grade='L5', color='blue')
+        cls.l3_other = Boulder.objects.create(wall=cls.other_wall, setter_grade='L3', color='red')
+        cls.alice = User.objects.create_user('alice', password='pw')
+        cls.bob = User.objects.create_user('bob', password='pw')
+        cls.carol = User.objects.create_user('carol', password='pw')
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def log(self, climber, boulder, ascent_type='send'):
+        ascent = Ascent(climber=climber, boulder=boulder, ascent_type=ascent_type)
+        ascent.points = ascent.calculate_points()
+        ascent.save()
+        return ascent
+
+    def run_jobs(self):
+        self.assertEqual(work(burst=True)[1], 0)
+
+
+class LeaderboardScoreTests(LoggerTestData, TestCase):
+
+    def score(self, user, gym=None, only_active=False):
+        row = LeaderboardScore.objects.filter(user=user, gym=gym, only_active=only_active).first()
+        return row.total_points if row else None
+
+    def test_ascent_create_and_delete_update_every_scope(self):
+        self.log(self.alice, self.l2)
+        ascent = self.log(self.alice, self.l3_other)
+        self.assertEqual(self.score(self.alice), 50)
+        self.assertEqual(self.score(self.alice, only_active=True), 50)
+        self.assertEqual(self.score(self.alice, gym=self.gym), 20)
+        self.assertEqual(self.score(self.alice, gym=self.other_gym), 30)
+
+        ascent.delete()
+        self.assertEqual(self.score(self.alice), 20)
+        self.assertIsNone(self.score(self.alice, gym=self.other_gym))
+
+    def test_regrade_and_retire_refresh_scores(self):
+        self.log(self.alice, self.l2)
+        self.log(self.bob, self.l2)
+
+        self.l2.setter_grade = 'L4'
+        self.l2.save()
+        self.run_jobs()
+        self.assertEqual(self.score(self.alice, gym=self.gym), 40)
+        self.assertEqual(self.score(self.bob, only_active=True), 40)
+
+        self.l2.is_active = False
+        self.l2.save()
+        self.run_jobs()
+        self.assertEqual(self.score(self.bob), 40)
+        self.assertIsNone(self.score(self.bob, only_active=True))
+
+    def test_ascent_deletes_match_rebuild(self):
+        earlier = date.today() - timedelta(days=3)
+        old = self.log(self.alice, self.l2)
+        Ascent.objects.filter(pk=old.pk).update(date_climbed=earlier)
+        refresh_user_scores([self.alice.pk])
+        self.log(self.alice, self.l5).delete()
+        fields = ('user_id', 'gym_id', 'only_active', 'total_points', 'most_recent_ascent', 'num_ascents')
+        maintained = set(LeaderboardScore.objects.values_list(*fields))
+        self.assertEqual({row[4] for row in maintained}, {earlier})
+
+        self.log(self.alice, self.l5)
+        self.log(self.alice, self.l3_other).delete()
+        maintained = set(LeaderboardScore.objects.values_list(*fields))
+        bucket_fields = ('user_id', 'gym_id', 'day', 'is_active', 'points', 'num_ascents')
+        buckets = set(DailyPoints.objects.values_list(*bucket_fields))
+        self.assertEqual(len(buckets), 2)
+
+        rebuild_all_scores()
+        self.assertEqual(set(LeaderboardScore.objects.values_list(*fields)), maintained)
+        self.assertEqual(set(DailyPoints.objects.values_list(*bucket_fields)), buckets)
+
+    def test_rebuild_matches_incremental_maintenance(self):
+        self.log(self.alice, self.l2)
+        self.log(self.alice, self.l5, 'flash')
+        self.log(self.bob, self.l3_other)
+        fields = ('user_id', 'gym_id', 'only_active', 'total_points', 'most_recent_ascent', 'num_ascents')
+        maintained = set(LeaderboardScore.objects.values_list(*fields))
+
+        rebuild_all_scores()
+        self.assertEqual(set(LeaderboardScore.objects.values_list(*fields)), maintained)
+
+
+class LeaderboardViewTests(LoggerTestData, APITestCase):
+
+    def test_ranks_share_ties_and_respect_gym_scope(self):
+        self.log(self.alice, self.l5)
+        self.log(self.bob, self.l2)
+        self.log(self.bob, self.l3_other)
+        self.log(self.carol, self.l2)
+        self.client.force_authenticate(self.carol)
+
+        response = self.client.get(reverse('leaderboard'))
+        entries = [(e['username'], e['total_points'], e['rank']) for e in response.data['leaderboard']]
+        self.assertEqual(entries, [('alice', 50, 1), ('bob', 50, 1), ('carol', 20, 3)])
+        self.assertEqual(response.data['your_ranking'], 3)
+
+        response = self.client.get(reverse('leaderboard'), {'gym_id': self.other_gym.pk})
+        self.assertEqual([e['username'] for e in response.data['leaderboard']], ['bob'])
+        self.assertIsNone(response.data['your_ranking'])
+
+    def test_pagination_and_window_around_me(self):
+        climbers = [User.objects.create_user(f'climber{i}') for i in range(6)]
+        # climber0..5 score 50, 50, 20, 20, 20, 10
+        for climber, boulders in zip(climbers, [[self.l5], [self.l5], [self.l2], [self.l2], [self.l2], []]):
+            for boulder in boulders:
+                self.log(climber, boulder)
+        self.log(climbers[5], Boulder.objects.create(wall=self.wall, setter_grade='L1', color='green'))
+        self.client.force_authenticate(climbers[4])
+
+        # version stamp, count, caller's score and two rank counts, then one windowed page
+        # whose ranks already account for the tie straddling the page boundary
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('leaderboard'), {'limit': 2, 'offset': 3})
+        self.assertEqual(response.data['count'], 6)
+        self.assertEqual([(e['index'], e['rank']) for e in response.data['leaderboard']], [(4, 3), (5, 3)])
+        self.assertEqual(response.data['your_ranking'], 3)
+        self.assertEqual(response.data['your_index'], 5)
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(reverse('leaderboard'), {'around_me': 1})
+        self.assertEqual([e['index'] for e in response.data['leaderboard']], [4, 5, 6])
+        self.assertEqual([e['rank'] for e in response.data['leaderboard']], [3, 3, 6])
+        self.assertEqual(response.data['leaderboard'][1]['id'], climbers[4].id)
+
+    def test_date_range_sums_daily_buckets(self):
+        today = date.today()
+        month_ago = today - timedelta(days=30)
+        self.log(self.alice, self.l5)
+        self.log(self.bob, self.l2)
+        old = self.log(self.bob, self.l3_other)
+        Ascent.objects.filter(pk=old.pk).update(date_climbed=month_ago)
+        refresh_user_scores([self.bob.pk])
+        self.assertEqual(
+            sorted(DailyPoints.objects.filter(user=self.bob).values_list('day', 'points')),
+            [(month_ago, 30), (today, 20)],
+        )
+        self.client.force_authenticate(self.bob)
+
+        week = {'from': (today - timedelta(days=7)).isoformat()}
+        response = self.client.get(reverse('leaderboard'), week)
+        entries = [(e['username'], e['total_points'], e['rank']) for e in response.data['leaderboard']]
+        self.assertEqual(entries, [('alice', 50, 1), ('bob', 20, 2)])
+        self.assertEqual((response.data['your_ranking'], response.data['your_index']), (2, 2))
+        response = self.client.get(reverse('leaderboard'), dict(week, offset=1))
+        self.assertEqual([(e['username'], e['rank']) for e in response.data['leaderboard']], [('bob', 2)])
+
+        response = self.client.get(reverse('leaderboard'), {'to': month_ago.isoformat(), 'gym_id': self.other_gym.pk})
+        self.assertEqual([(e['username'], e['total_points']) for e in response.data['leaderboard']], [('bob', 30)])
+        self.assertEqual(self.client.get(reverse('leaderboard'), {'from': 'last week'}).status_code, 400)
+
+
+class AsyncReadPathTests(LoggerTestData, APITestCase):
+
+    def get_both(self, user, name, args=(), **params):
+        """Fetch a read endpoint and its /api/async/ twin as ``user`` (None for anonymous)."""
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'} if user else {}
+        sync_response = self.client.get(reverse(name, args=args), params, headers=headers)
+        async_response = async_to_sync(self.async_client.get)(reverse(f'async-{name}', args=args), params, headers=headers)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        # Pagination links point back at the endpoint that served them
+        return sync_response.json(), json.loads(async_response.content.decode().replace('/api/async/', '/api/'))
+
+    def test_async_views_return_the_same_json(self):
+        self.log(self.alice, self.l5, 'flash')
+        self.log(self.bob, self.l2)
+        self.log(self.bob, self.l3_other)
+        self.log(self.carol, self.l2)
+
+        for params in ({}, {'limit': 1, 'offset': 1}, {'around_me': 1}, {'gym_id': self.gym.pk, 'only_active': 'true'}, {'from': '2000-01-01', 'offset': 1}):
+            sync_data, async_data = self.get_both(self.carol, 'leaderboard', **params)
+            self.assertEqual(async_data, sync_data, params)
+        sync_data, async_data = self.get_both(self.bob, 'gyms-detail', args=[self.gym.pk])
+        self.assertEqual(async_data, sync_data)
+        self.assertTrue(any(boulder['user_has_sent'] for boulder in async_data['boulders']))
+        sync_data, async_data = self.get_both(self.alice, 'profile')
+        self.assertEqual(async_data, sync_data)
+
+    def test_async_views_reject_anonymous_profile_and_bad_tokens(self):
+        self.get_both(None, 'profile')
+        response = async_to_sync(self.async_client.get)(reverse('async-leaderboard'), headers={'Authorization': 'Bearer nope'})
+        self.assertEqual(response.status_code, 401)
+        response = async_to_sync(self.async_client.get)(reverse('async-gyms-detail', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+
+class QueryCountTests(LoggerTestData, APITestCase):
+    """Pin the number of queries per read endpoint so N+1 patterns cannot creep back."""
+
+    def setUp(self):
+        super().setUp()
+        for i in range(10):
+            boulder = Boulder.objects.create(wall=self.wall, setter_grade='L1', color=f'color{i}')
+            self.log(self.bob, boulder)
+            self.log(self.carol, boulder)
+        self.log(self.alice, self.l2)
+        self.client.force_authenticate(self.alice)
+
+    def test_boulder_list(self):
+        # version stamp, keyset page, caller's sent boulders on that page
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('boulders-list'))
+        sent = {b['id'] for b in response.data['results'] if b['user_has_sent']}
+        self.assertEqual(sent, {self.l2.pk})
+
+    def test_boulder_detail(self):
+        # boulder with wall, caller's sent flag, newest ascents with climbers
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('boulders-detail', args=[self.l2.pk]))
+        self.assertTrue(response.data['user_has_sent'])
+        self.assertEqual(response.data['ascents'][0]['climber_details']['username'], 'alice')
+        self.assertIsNone(response.data['ascents_next'])
+
+    def test_boulder_ascents_are_paged(self):
+        climbers = User.objects.bulk_create([User(username=f'climber{i}') for i in range(DETAIL_ASCENTS + 5)])
+        Ascent.objects.bulk_create([
+            Ascent(climber=climber, boulder=self.l5, ascent_type='send', points=50) for climber in climbers
+        ])
+        Ascent.objects.filter(boulder=self.l5).update(date_climbed=date(2024, 1, 1))
+        newest = self.log(self.carol, self.l5)
+
+        detail = self.client.get(reverse('boulders-detail', args=[self.l5.pk])).data
+        self.assertEqual(len(detail['ascents']), DETAIL_ASCENTS)
+        self.assertEqual(detail['ascents'][0]['id'], newest.pk)
+        self.assertIn(reverse('boulders-ascents', args=[self.l5.pk]), detail['ascents_next'])
+
+        # One query per page: ascents joined with their climbers, seeking past the
+        # (date_climbed, id) key rather than OFFSET through the same-day ascents
+        with self.assertNumQueries(1) as queries:
+            rest = self.client.get(detail['ascents_next']).data
+        self.assertNotIn('OFFSET', queries[0]['sql'])
+        ids = [a['id'] for a in detail['ascents'] + rest['results']]
+        self.assertEqual(len(ids), DETAIL_ASCENTS + 6)
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertIsNone(rest['next'])
+        self.assertEqual(rest['results'][-1]['climber_details']['username'], climbers[0].username)
+
+        self.assertEqual(self.client.get(reverse('boulders-ascents', args=[self.l3_other.pk])).data['results'], [])
+        self.assertEqual(self.client.get(reverse('boulders-ascents', args=[0])).status_code, 404)
+
+    def test_ascent_write_budget(self):
+        url = reverse('boulder-ascent', args=[self.l5.pk])
+        # boulder with its gym, insert, counter UPDATE ... RETURNING, one UPDATE each for the score
+        # rows and the daily bucket, change log and revision bump, plus two savepoint pairs
+        with self.assertNumQueries(11):
+            response = self.client.post(url + '?compact=1', {'ascent_type': 'send'}, format='json')
+        ascent = Ascent.objects.get(climber=self.alice, boulder=self.l5)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'ascent_id': ascent.pk, 'num_ascents': 1, 'user_has_sent': True})
+
+        # ascent with its boulder and wall, DELETE, counter, emptied-row DELETE, UPDATE and latest-date
+        # UPDATE for the score rows alice keeps, the emptied bucket, change log and revision bump
+        with self.assertNumQueries(12):
+            response = self.client.delete(url + '?compact=1')
+        self.assertEqual(response.data, {'ascent_id': ascent.pk, 'num_ascents': 0, 'user_has_sent': False})
+
+        # The full responses add the boulder's first page of ascents
+        with self.assertNumQueries(12):
+            response = self.client.post(url, {'ascent_type': 'flash'}, format='json')
+        self.assertEqual(response.data['ascent']['ascent_type'], 'flash')
+        self.assertEqual((response.data['boulder']['num_ascents'], response.data['boulder']['user_has_sent']), (1, True))
+        self.assertEqual(len(response.data['boulder']['ascents']), 1)
+        with self.assertNumQueries(13):
+            response = self.client.delete(url)
+        self.assertEqual((response.data['boulder']['num_ascents'], response.data['boulder']['user_has_sent']), (0, False))
+
+        self.assertEqual(self.client.delete(url + '?compact=1').status_code, 404)
+        self.assertEqual(Boulder.objects.get(pk=self.l5.pk).num_ascents, 0)
+
+    def test_gym_detail(self):
+        # version stamp, gym, walls, boulders with walls, ascents with climbers, caller's sent boulders
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('gyms-detail', args=[self.gym.pk]))
+        self.assertEqual(len(response.data['boulders']), 12)
+        self.assertEqual(response.data['boulders'][0]['wall_details'], {'id': self.wall.pk, 'name': 'Cave'})
+
+        # Walls and boulders now come from the cache
+        with self.assertNumQueries(3):
+            self.client.get(reverse('gyms-detail', args=[self.gym.pk]))
+
+    def test_cached_gym_detail_overlays_user_and_invalidates_on_ascent(self):
+        url = reverse('gyms-detail', args=[self.gym.pk])
+        self.client.get(url)
+        self.client.force_authenticate(self.bob)
+        response = self.client.get(url)
+        self.assertTrue(all(b['user_has_sent'] for b in response.data['boulders'] if b['id'] != self.l2.pk and b['id'] != self.l5.pk))
+        self.assertFalse(next(b for b in response.data['boulders'] if b['id'] == self.l5.pk)['user_has_sent'])
+
+        self.log(self.bob, self.l5)
+        response = self.client.get(url)
+        l5 = next(b for b in response.data['boulders'] if b['id'] == self.l5.pk)
+        self.assertEqual((l5['num_ascents'], l5['user_has_sent']), (1, True))
+
+
+class FastRowTests(LoggerTestData, TestCase):
+
+    def test_rows_match_model_serializers(self):
+        Boulder.objects.filter(pk=self.l5.pk).update(setter=self.bob, difficulty='hard', climbing_style='slab')
+        self.log(self.alice, self.l5, 'flash')
+        self.log(self.bob, self.l5)
+        boulders = Boulder.objects.order_by('id')
+        sent = frozenset({self.l5.pk})
+
+        expected = BoulderSerializer(boulders, many=True, context={'sent_boulder_ids': sent}).data
+        self.assertEqual(boulder_rows(boulders.values(*BOULDER_ROW_FIELDS), sent), expected)
+        self.assertEqual(
+            ascent_rows_by_boulder([self.l5.pk])[self.l5.pk],
+            AscentSerializerWithoutBoulder(Ascent.objects.filter(boulder=self.l5).order_by('id'), many=True).data,
+        )
+
+
+class BoulderListTests(LoggerTestData, APITestCase):
+
+    def ids(self, **params):
+        response = self.client.get(reverse('boulders-list'), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [boulder['id'] for boulder in response.data['results']]
+
+    def test_filters(self):
+        Boulder.objects.filter(pk=self.l5.pk).update(climbing_style='slab', difficulty='hard')
+        retired = Boulder.objects.create(wall=self.wall, setter_grade='L4', color='red', is_active=False)
+        Boulder.objects.filter(pk=retired.pk).update(date_set=date(2020, 1, 1))
+        self.log(self.alice, self.l2)
+        self.client.force_authenticate(self.alice)
+
+        self.assertEqual(set(self.ids(gym=self.gym.pk)), {self.l2.pk, self.l5.pk, retired.pk})
+        self.assertEqual(self.ids(wall=self.other_wall.pk), [self.l3_other.pk])
+        self.assertEqual(set(self.ids(grade_min='L3', grade_max='L4')), {self.l3_other.pk, retired.pk})
+        self.assertEqual(self.ids(climbing_style='power,slab', difficulty='hard'), [self.l5.pk])
+        self.assertEqual(self.ids(is_active='false'), [retired.pk])
+        self.assertEqual(self.ids(date_set_to='2020-12-31'), [retired.pk])
+        self.assertEqual(set(self.ids(gym=self.gym.pk, is_active='true', not_sent='true')), {self.l5.pk})
+        response = self.client.get(reverse('boulders-list'), {'grade_min': 'V9', 'is_active': 'yes'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {'grade_min', 'is_active'})
+
+    def test_keyset_pages_walk_ties_both_ways(self):
+        # Same date_set for every boulder, so ordering falls back to id throughout
+        for i in range(7):
+            Boulder.objects.create(wall=self.wall, setter_grade='L1', color=f'c{i}')
+        expected = list(Boulder.objects.order_by('-date_set', '-id').values_list('id', flat=True))
+
+        pages, url = [], reverse('boulders-list') + '?page_size=4'
+        while url:
+            response = self.client.get(url)
+            pages.append([boulder['id'] for boulder in response.data['results']])
+            last, url = response.data, response.data['next']
+        self.assertEqual([boulder_id for page in pages for boulder_id in page], expected)
+        self.assertEqual([len(page) for page in pages], [4, 4, 2])
+
+        back = self.client.get(last['previous']).data
+        self.assertEqual([boulder['id'] for boulder in back['results']], pages[1])
+        first = self.client.get(back['previous']).data
+        self.assertEqual([boulder['id'] for boulder in first['results']], pages[0])
+        self.assertIsNone(first['previous'])
+        self.assertEqual(self.client.get(reverse('boulders-list'), {'cursor': 'bogus'}).status_code, 404)
+
+
+class RegradeTests(LoggerTestData, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.log(self.alice, self.l2)
+        self.log(self.bob, self.l2)
+        self.log(self.bob, self.l3_other)
+
+    def test_single_regrade_queues_points_refresh(self):
+        self.l2.setter_grade = 'L6'
+        # old values, boulder UPDATE, job INSERT in a savepoint, three for the gym revision
+        with self.assertNumQueries(8):
+            self.l2.save()
+        self.assertEqual(set(Ascent.objects.filter(boulder=self.l2).values_list('points', flat=True)), {20})
+        self.run_jobs()
+        self.assertEqual(set(Ascent.objects.filter(boulder=self.l2).values_list('points', flat=True)), {60})
+
+    def test_save_without_grade_skips_old_value_lookup(self):
+        self.l2.color = 'pink'
+        # boulder UPDATE, gym lookup, change log INSERT and revision bump
+        with self.assertNumQueries(4):
+            self.l2.save(update_fields=['color'])
+
+    def test_bulk_regrade_endpoint(self):
+        self.client.force_authenticate(self.alice)
+        response = self.client.post(reverse('boulders-regrade'), {'boulders': [
+            {'id': self.l2.pk, 'setter_grade': 'L1'},
+            {'id': self.l3_other.pk, 'setter_grade': 'L8'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 2)
+        self.run_jobs()
+        self.assertEqual(Ascent.objects.get(climber=self.bob, boulder=self.l3_other).points, 80)
+        self.assertEqual(LeaderboardScore.objects.get(user=self.bob, gym=None, only_active=False).total_points, 90)
+
+        response = self.client.post(reverse('boulders-regrade'), {'boulders': [{'id': 0, 'setter_grade': 'L1'}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class WallResetTests(LoggerTestData, APITestCase):
+
+    def reset(self, *boulders):
+        url = reverse('gym-walls-reset', args=[self.gym.pk, self.wall.pk])
+        return self.client.post(url, {'boulders': [
+            {'setter_grade': grade, 'color': color} for grade, color in boulders
+        ]}, format='json')
+
+    def test_reset_retires_and_creates_in_constant_queries(self):
+        self.log(self.alice, self.l2)
+        self.client.force_authenticate(self.alice)
+        # wall, clash lookup, retire SELECT + UPDATE, INSERT, job INSERT in a savepoint, three for
+        # the gym revision, created rows and the savepoint pair, however many boulders
+        with self.assertNumQueries(14):
+            response = self.reset(('L3', 'green'), ('L4', 'yellow'), ('L6', 'black'))
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(sorted(response.data['retired']), sorted([self.l2.pk, self.l5.pk]))
+        self.assertEqual([b['setter_grade'] for b in response.data['created']], ['L3', 'L4', 'L6'])
+        self.assertEqual(set(self.wall.boulders.filter(is_active=True).values_list('color', flat=True)), {'green', 'yellow', 'black'})
+        self.run_jobs()
+        self.assertFalse(LeaderboardScore.objects.filter(user=self.alice, only_active=True).exists())
+        self.assertTrue(LeaderboardScore.objects.filter(user=self.alice, only_active=False).exists())
+
+    def test_leaderboard_etag_changes_once_refresh_job_runs(self):
+        self.log(self.alice, self.l2)
+        self.client.force_authenticate(self.alice)
+        self.reset(('L3', 'green'))
+        url = reverse('leaderboard')
+        params = {'only_active': 'true', 'gym_id': self.gym.pk}
+        stale = self.client.get(url, params)
+        self.assertEqual(len(stale.data['leaderboard']), 1)
+
+        self.run_jobs()
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=stale['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['leaderboard'], [])
+
+    def test_reset_rejects_unique_together_clashes(self):
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.reset(('L3', 'green'), ('L3', 'green')).status_code, 400)
+        self.assertEqual(self.reset(('L2', 'red')).status_code, 200)
+        # The new L2 red cannot be retired next to the L2 red retired above
+        response = self.reset(('L1', 'white'))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('L2 red', str(response.data['boulders']))
+        self.assertTrue(self.wall.boulders.filter(setter_grade='L2', color='red', is_active=True).exists())
+
+
+class JobQueueTests(LoggerTestData, TestCase):
+
+    def test_queued_key_is_only_queued_once(self):
+        self.log(self.alice, self.l2)
+        first = enqueue('refresh_boulders', key='boulders', boulder_ids=[self.l2.pk])
+        self.assertEqual(enqueue('refresh_boulders', key='boulders', boulder_ids=[self.l2.pk]), first)
+        self.assertEqual(work(burst=True), (1, 0))
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.progress, first.total), (Job.DONE, 1, 1))
+        # Once picked up, the same key can be queued again
+        self.assertNotEqual(enqueue('refresh_boulders', key='boulders', boulder_ids=[self.l2.pk]), first)
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        flaky = mock.Mock(side_effect=RuntimeError('boom'))
+        with mock.patch.dict(TASKS, {'flaky': flaky}):
+            job = enqueue('flaky', attempt='x')
+            for attempt in range(1, job.max_attempts + 1):
+                Job.objects.filter(pk=job.pk).update(run_after=job.created_at)
+                self.assertEqual(work(burst=True), (0, 1))
+            job.refresh_from_db()
+        self.assertEqual(flaky.call_count, job.max_attempts)
+        flaky.assert_called_with(mock.ANY, attempt='x')
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, job.max_attempts))
+        self.assertIn('boom', job.error)
+
+    def test_progress_keeps_a_long_job_locked(self):
+        job = enqueue('rebuild_scores')
+        claimed = claim('worker-1')
+        stale = timezone.now() - timedelta(seconds=settings.EQ_JOBS_TIMEOUT + 1)
+        Job.objects.filter(pk=job.pk).update(locked_at=stale)
+        claimed.report_progress(1, 2)
+        self.assertIsNone(claim('worker-2'))
+
+        # Once a silent job is reclaimed, only the new worker records the outcome
+        Job.objects.filter(pk=job.pk).update(locked_at=stale)
+        reclaimed = claim('worker-2')
+        self.assertTrue(run(claimed))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.attempts), (Job.RUNNING, 'worker-2', 2))
+        self.assertTrue(run(reclaimed))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+
+    def test_eager_mode_runs_inline(self):
+        self.log(self.bob, self.l2)
+        Ascent.objects.update(points=0)
+        with override_settings(EQ_JOBS_EAGER=True):
+            self.assertIsNone(enqueue('refresh_boulders', boulder_ids=[self.l2.pk]))
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(LeaderboardScore.objects.get(user=self.bob, gym=None, only_active=False).total_points, 20)
+
+    def test_run_workers_drains_the_queue(self):
+        self.log(self.alice, self.l2)
+        LeaderboardScore.objects.all().delete()
+        Boulder.objects.update(num_ascents=0)
+        enqueue('rebuild_scores')
+        enqueue('recount_ascents')
+        out = StringIO()
+        call_command('run_workers', processes=1, burst=True, stdout=out)
+        self.assertIn('2 jobs succeeded, 0 failed', out.getvalue())
+        self.assertTrue(LeaderboardScore.objects.filter(user=self.alice).exists())
+        self.l2.refresh_from_db()
+        self.assertEqual(self.l2.num_ascents, 1)
+
+
+class ReconcileTests(LoggerTestData, TestCase):
+
+    def reconcile(self, *args):
+        out = StringIO()
+        call_command('eq_reconcile', *args, stdout=out)
+        return out.getvalue()
+
+    def test_reports_then_fixes_drift(self):
+        self.log(self.alice, self.l2)
+        self.log(self.bob, self.l5)
+        Boulder.objects.filter(pk=self.l2.pk).update(num_ascents=5)
+        Ascent.objects.filter(boulder=self.l5).update(points=0)
+
+        out = self.reconcile('--dry-run', '--chunk-size', '2')
+        self.assertIn(f'Boulder {self.l2.pk}: num_ascents 5, counted 1', out)
+        self.assertIn('Found 1 ascent counters and 1 ascent points (+50 points) in 3 boulders', out)
+        self.assertEqual(Boulder.objects.get(pk=self.l2.pk).num_ascents, 5)
+
+        self.assertIn('Fixed 1 ascent counters and 1 ascent points (+50 points) in 3 boulders; refreshed 1 climbers', self.reconcile())
+        self.assertEqual(Boulder.objects.get(pk=self.l2.pk).num_ascents, 1)
+        self.assertEqual(Ascent.objects.get(boulder=self.l5).points, 50)
+        self.assertEqual(LeaderboardScore.objects.get(user=self.bob, gym=None, only_active=False).total_points, 50)
+        self.assertIn('Fixed 0 ascent counters and 0 ascent points', self.reconcile())
+
+    def test_since_watermark_checks_only_touched_boulders(self):
+        self.log(self.alice, self.l2)
+        watermark = self.reconcile().splitlines()[-1].split()[-1]
+        Boulder.objects.filter(pk__in=[self.l2.pk, self.l5.pk]).update(num_ascents=7)
+        self.log(self.bob, self.l5)
+
+        out = self.reconcile('--since', watermark)
+        self.assertIn('Fixed 1 ascent counters and 0 ascent points (+0 points) in 1 boulders', out)
+        self.assertEqual(Boulder.objects.get(pk=self.l5.pk).num_ascents, 1)
+        self.assertEqual(Boulder.objects.get(pk=self.l2.pk).num_ascents, 7)
+
+    def test_since_watermark_catches_bulk_created_ascents(self):
+        watermark = self.reconcile().splitlines()[-1].split()[-1]
+        # bulk_create skips the signals, so neither the counter nor the change log sees it
+        Ascent.objects.bulk_create([Ascent(climber=self.bob, boulder=self.l2, ascent_type='send', points=0)])
+
+        out = self.reconcile('--since', watermark)
+        self.assertIn('Fixed 1 ascent counters and 1 ascent points (+20 points) in 1 boulders', out)
+        self.assertEqual(Boulder.objects.get(pk=self.l2.pk).num_ascents, 1)
+
+    def test_since_watermark_falls_back_to_a_full_run_once_pruned_past(self):
+        watermark = self.reconcile().splitlines()[-1].split()[-1]
+        self.l2.save()
+        Boulder.objects.filter(pk=self.l2.pk).update(num_ascents=7)
+        self.wall.save()
+        ChangeLog.objects.update(created_at=timezone.now() - timedelta(days=settings.EQ_CHANGELOG_RETENTION_DAYS + 1))
+        enqueue('prune_changelog')
+        self.run_jobs()
+        self.assertFalse(ChangeLog.objects.filter(kind=ChangeLog.BOULDER, object_id=self.l2.pk).exists())
+
+        out = self.reconcile('--since', watermark)
+        self.assertIn('pruned; checking every boulder', out)
+        self.assertIn('Fixed 1 ascent counters', out)
+        self.assertEqual(Boulder.objects.get(pk=self.l2.pk).num_ascents, 0)
+
+    def test_since_rejects_malformed_watermarks(self):
+        with self.assertRaises(CommandError):
+            self.reconcile('--since', '12')
+
+
+class AscentBatchTests(LoggerTestData, APITestCase):
+
+    def test_batch_logs_new_ascents_and_reports_each_item(self):
+        self.log(self.alice, self.l2)
+        self.client.force_authenticate(self.alice)
+        response = self.client.post(reverse('ascent-batch'), {'ascents': [
+            {'boulder': self.l5.pk, 'ascent_type': 'flash'},
+            {'boulder': self.l2.pk, 'ascent_type': 'send'},
+            {'boulder': self.l3_other.pk, 'ascent_type': 'send'},
+            {'boulder': self.l5.pk, 'ascent_type': 'send'},
+            {'boulder': 0, 'ascent_type': 'send'},
+            {'boulder': self.l3_other.pk, 'ascent_type': 'onsight'},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['created', 'duplicate', 'created', 'duplicate', 'not_found', 'invalid'],
+        )
+        self.assertEqual(Ascent.objects.get(climber=self.alice, boulder=self.l5).points, 50)
+        self.assertEqual(Boulder.objects.get(pk=self.l5.pk).num_ascents, 1)
+        self.assertEqual(Boulder.objects.get(pk=self.l2.pk).num_ascents, 1)
+        self.assertEqual(LeaderboardScore.objects.get(user=self.alice, gym=None, only_active=False).total_points, 100)
+
+    def race_batch(self):
+        """Post a batch for l5 and l2 while another request logs alice's l5 ascent first."""
+        points_for_grade = Ascent.points_for_grade
+        raced = []
+
+        def race(grade):
+            # Runs after the batch checked for existing ascents, right before its INSERT
+            if not raced:
+                raced.append(True)
+                with mock.patch.object(Ascent, 'points_for_grade', points_for_grade):
+                    self.log(self.alice, self.l5)
+            return points_for_grade(grade)
+
+        self.client.force_authenticate(self.alice)
+        with mock.patch.object(Ascent, 'points_for_grade', side_effect=race):
+            response = self.client.post(reverse('ascent-batch'), {'ascents': [
+                {'boulder': self.l5.pk, 'ascent_type': 'send'},
+                {'boulder': self.l2.pk, 'ascent_type': 'send'},
+            ]}, format='json')
+
+        self.assertEqual([result['status'] for result in response.data['results']], ['duplicate', 'created'])
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(Ascent.objects.filter(climber=self.alice, boulder=self.l5).count(), 1)
+        self.assertEqual(Boulder.objects.get(pk=self.l5.pk).num_ascents, 1)
+        self.assertEqual(Boulder.objects.get(pk=self.l2.pk).num_ascents, 1)
+
+    def test_batch_reports_ascents_a_concurrent_request_inserted_as_duplicates(self):
+        # INSERT ... ON CONFLICT DO NOTHING RETURNING only returns this batch's own rows
+        with CaptureQueriesContext(connection) as queries:
+            self.race_batch()
+        self.assertTrue([query for query in queries if 'ON CONFLICT DO NOTHING RETURNING' in query['sql']])
+
+    def test_batch_without_insert_returning_uses_savepoints(self):
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            self.race_batch()
+
+    def test_batch_requires_a_list(self):
+        self.client.force_authenticate(self.alice)
+        response = self.client.post(reverse('ascent-batch'), {'ascents': 'nope'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ConditionalGetTests(LoggerTestData, APITestCase):
+
+    def test_unchanged_gym_answers_304_until_an_ascent_is_logged(self):
+        url = reverse('gyms-detail', args=[self.gym.pk])
+        response = self.client.get(url)
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Other gyms' activity does not invalidate this gym
+        self.log(self.alice, self.l3_other)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.log(self.alice, self.l2)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_gym_list_ignores_ascents_and_hides_version_fields(self):
+        url = reverse('gyms-list')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertNotIn('revision', response.data['results'][0])
+        self.assertNotIn('updated_at', response.data['results'][0])
+
+        self.log(self.alice, self.l2)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.gym.name = 'Renamed'
+        self.gym.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_differs_per_user_and_query(self):
+        url = reverse('leaderboard')
+        anonymous = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url, {'only_active': 'true'})['ETag'], anonymous)
+        self.client.force_authenticate(self.alice)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=anonymous)
+        self.assertEqual(response.status_code, 200)
+
+
+class GymChangesTests(LoggerTestData, APITestCase):
+
+    def changes(self, since=None):
+        params = {} if since is None else {'since': since}
+        response = self.client.get(reverse('gyms-changes', args=[self.gym.pk]), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_delta_lists_only_changed_walls_and_boulders(self):
+        self.client.force_authenticate(self.alice)
+        full = self.changes()
+        self.assertTrue(full['reset'])
+        self.assertEqual({boulder['id'] for boulder in full['boulders']}, {self.l2.pk, self.l5.pk})
+
+        self.log(self.alice, self.l5)
+        delta = self.changes(full['token'])
+        self.assertFalse(delta['reset'])
+        self.assertEqual([(b['id'], b['num_ascents'], b['user_has_sent']) for b in delta['boulders']], [(self.l5.pk, 1, True)])
+        self.assertEqual((delta['walls'], delta['removed_boulders']), ([], []))
+        self.assertEqual(self.changes(delta['token'])['boulders'], [])
+
+        token = delta['token']
+        other_token = self.client.get(reverse('gyms-changes', args=[self.other_gym.pk])).data['token']
+        self.l2.is_active = False
+        self.l2.save()
+        self.l5.wall = self.other_wall
+        self.l5.save()
+        new_wall = Wall.objects.create(gym=self.gym, name='Roof')
+        old_wall_id = self.wall.pk
+        self.wall.delete()
+        delta = self.changes(token)
+        self.assertEqual([wall['id'] for wall in delta['walls']], [new_wall.pk])
+        self.assertEqual(delta['removed_walls'], [old_wall_id])
+        self.assertEqual(delta['boulders'], [])
+        self.assertEqual(delta['removed_boulders'], sorted([self.l2.pk, self.l5.pk]))
+        other = self.client.get(reverse('gyms-changes', args=[self.other_gym.pk]), {'since': other_token}).data
+        self.assertEqual([boulder['id'] for boulder in other['boulders']], [self.l5.pk])
+
+    def test_unusable_tokens(self):
+        self.assertEqual(self.client.get(reverse('gyms-changes', args=[self.gym.pk]), {'since': 'x'}).status_code, 400)
+        self.assertTrue(self.changes(10 ** 9)['reset'])
+        token = self.changes()['token']
+        with mock.patch('logger.changes.MAX_DELTA_CHANGES', 1):
+            # Many entries for one boulder count as one change
+            self.log(self.alice, self.l2)
+            self.log(self.bob, self.l2)
+            self.assertEqual([b['id'] for b in self.changes(token)['boulders']], [self.l2.pk])
+            self.log(self.bob, self.l5)
+            self.assertTrue(self.changes(token)['reset'])
+
+    def test_change_committed_late_with_a_lower_id_is_still_delivered(self):
+        self.log(self.alice, self.l2)
+        token = self.changes()['token']
+        # On PostgreSQL a transaction can hold a lower sequence id and commit after a later one
+        # was read; here the late entry simply takes an id below everything already logged
+        self.log(self.bob, self.l5)
+        late = ChangeLog.objects.filter(gym=self.gym).latest('id')
+        lowest = ChangeLog.objects.order_by('id').values_list('id', flat=True).first()
+        ChangeLog.objects.filter(pk=lowest).delete()
+        ChangeLog.objects.filter(pk=late.pk).update(id=lowest)
+
+        self.assertEqual([boulder['id'] for boulder in self.changes(token)['boulders']], [self.l5.pk])
+
+    def test_pruned_tokens_get_a_reset(self):
+        old_token = self.changes()['token']
+        self.log(self.alice, self.l2)
+        self.log(self.carol, self.l5)
+        ChangeLog.objects.update(created_at=timezone.now() - timedelta(days=settings.EQ_CHANGELOG_RETENTION_DAYS + 1))
+        self.log(self.bob, self.l5)
+        current = self.changes(old_token)
+        self.assertFalse(current['reset'])
+
+        enqueue('prune_changelog')
+        self.run_jobs()
+        expired = ChangeLog.objects.filter(gym=self.gym, created_at__lt=timezone.now() - timedelta(days=1))
+        self.assertEqual(list(expired.values_list('object_id', flat=True)), [self.l5.pk])
+        self.assertTrue(self.changes(old_token)['reset'])
+        self.gym.refresh_from_db()
+        self.assertFalse(self.changes(self.gym.pruned_revision)['reset'])
+        delta = self.changes(current['token'])
+        self.assertEqual((delta['reset'], delta['boulders']), (False, []))
+
+
+@tag('stress')
+class AscentCounterConcurrencyTests(TransactionTestCase):
+    """Hammer the ascent endpoint from many threads and check num_ascents stays exact.
+
+    Needs a database that allows concurrent connections, which SQLite's shared
+    in-memory test database does not; run with a file-backed test database.
+    The default run is a quick smoke test; set ``EQ_STRESS_OPERATIONS`` (for
+    example to 2000) for a real soak, or skip it with ``--exclude-tag stress``.
+    """
+
+    threads = 8
+    operations = int(os.environ.get('EQ_STRESS_OPERATIONS', 160))
+
+    def test_counter_matches_ascent_count_under_concurrency(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('SQLite in-memory test databases cannot be shared between threads.')
+        gym = Gym.objects.create(name='Stress Gym')
+        wall = Wall.objects.create(gym=gym, name='Board')
+        boulders = [Boulder.objects.create(wall=wall, setter_grade='L3', color=f'c{i}') for i in range(5)]
+        climbers = [User.objects.create_user(f'stress{i}') for i in range(self.threads)]
+        errors = []
+
+        def worker(climber, seed):
+            rng = random.Random(seed)
+            client = APIClient()
+            client.force_authenticate(climber)
+            try:
+                for _ in range(self.operations // self.threads):
+                    url = reverse('boulder-ascent', args=[rng.choice(boulders).pk])
+                    if rng.random() < 0.6:
+                        response = client.post(url, {'ascent_type': 'send'}, format='json')
+                        ok = response.status_code in (201, 400)
+                    else:
+                        response = client.delete(url)
+                        ok = response.status_code in (200, 404)
+                    if not ok:
+                        errors.append(response.status_code)
+            except Exception as exc:  # surfaced by the assertion below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(climber, i)) for i, climber in enumerate(climbers)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        counts = dict(
+            Ascent.objects.values('boulder_id').annotate(count=Count('pk')).values_list('boulder_id', 'count')
+        )
+        for boulder in Boulder.objects.filter(pk__in=[b.pk for b in boulders]):
+            self.assertEqual(boulder.num_ascents, counts.get(boulder.pk, 0))
+
+
+class DatabaseConfigTests(TestCase):
+
+    def test_sqlite_connections_use_wal(self):
+        if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+            self.skipTest('Only file-backed SQLite databases journal to a WAL.')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+
+class BenchmarkCommandTests(TestCase):
+
+    def test_seed_and_benchmark_smoke(self):
+        out = StringIO()
+        call_command('seed_data', gyms=1, walls=2, boulders=30, climbers=10, ascents=100, stdout=out)
+        self.assertEqual(
+            sum(Boulder.objects.values_list('num_ascents', flat=True)),
+            Ascent.objects.count(),
+        )
+        self.assertTrue(LeaderboardScore.objects.exists())
+
+        call_command('benchmark_api', requests=2, warmup=0, stdout=out)
+        self.assertIn('ascent post + delete', out.getvalue())
+
+        call_command('benchmark_serializers', boulders=10, iterations=1, stdout=out)
+        self.assertIn('serialize: boulder_rows', out.getvalue())
+
+    def test_clear_deletes_seeded_rows_in_bulk(self):
+        gym = Gym.objects.create(name='Real Gym')
+        boulder = Boulder.objects.create(wall=Wall.objects.create(gym=gym, name='Real Wall'), setter_grade='L2')
+        climber = User.objects.create_user('real-climber')
+        call_command('seed_data', gyms=1, walls=2, boulders=30, climbers=10, ascents=100, stdout=StringIO())
+        seeded = Boulder.objects.exclude(pk=boulder.pk).first()
+        Ascent.objects.create(climber=climber, boulder=seeded, ascent_type='send', points=10)
+        Ascent.objects.create(climber=User.objects.get(username='seed-climber-0'), boulder=boulder, ascent_type='send', points=20)
+
+        # A handful of statements, however many seeded ascents there are
+        with CaptureQueriesContext(connection) as queries:
+            call_command('seed_data', gyms=1, walls=1, boulders=5, climbers=2, ascents=4, clear=True, stdout=StringIO())
+        self.assertLess(len(queries), 60)
+        self.assertEqual(Gym.objects.filter(name__startswith='Seed Gym').count(), 1)
+        self.assertFalse(LeaderboardScore.objects.filter(user=climber).exists())
+        self.assertEqual(Boulder.objects.get(pk=boulder.pk).num_ascents, 0)
+        self.assertFalse(ChangeLog.objects.exclude(gym_id__in=Gym.objects.values('pk')).exists())
+
+
+class ConcurrencyBenchmarkTests(TransactionTestCase):
+    """The benchmark runs requests on other threads, which only see committed data."""
+
+    def test_benchmark_concurrency_smoke(self):
+        out = StringIO()
+        call_command('seed_data', gyms=1, walls=2, boulders=20, climbers=5, ascents=40, stdout=out)
+        call_command('benchmark_concurrency', clients=2, requests=2, stdout=out)
+        self.assertIn('leaderboard (asgi)', out.getvalue())
+        self.assertIn('profile (wsgi)', out.getvalue())
+
+
+class ProfileTests(LoggerTestData, APITestCase):
+
+    def test_stats_come_from_one_query(self):
+        self.log(self.alice, self.l2, 'flash')
+        self.log(self.alice, self.l5)
+        self.log(self.alice, self.l3_other)
+        self.client.force_authenticate(self.alice)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(response.data['stats'], {
+            'total_ascents': 3, 'total_points': 100, 'flash_count': 1, 'send_count': 2,
+        })
+        self.assertNotIn('ascents', response.data)
+
+    def test_ascent_history_is_cursor_paginated(self):
+        boulders = [Boulder.objects.create(wall=self.wall, setter_grade='L1', color=f'c{i}') for i in range(60)]
+        for boulder in boulders:
+            self.log(self.alice, boulder)
+        self.client.force_authenticate(self.alice)
+
+        first = self.client.get(reverse('profile-ascents'))
+        self.assertEqual(len(first.data['results']), 50)
+        self.assertEqual(first.data['results'][0]['boulder_id'], boulders[-1].pk)
+        self.assertEqual(first.data['results'][0]['gym_name'], 'Main Gym')
+
+        # A same-day session is the common case; the next page seeks past its (date_climbed, id) key
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(first.data['next'])
+        self.assertFalse([query for query in queries if 'OFFSET' in query['sql']])
+        self.assertEqual(len(second.data['results']), 10)
+        self.assertIsNone(second.data['next'])
+        seen = {row['id'] for row in first.data['results'] + second.data['results']}
+        self.assertEqual(len(seen), 60)
+
+
+@override_settings(EQ_METRICS_ENABLED=True, EQ_METRICS_TOKEN='scrape-me')
+class MetricsTests(LoggerTestData, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        metrics.registry.reset()
+        # The middleware chain is built per client, after the settings override
+        self.client = APIClient()
+
+    def test_records_requests_and_queries_per_view(self):
+        self.client.get(reverse('boulders-list'))
+        self.client.get(reverse('boulders-list'))
+        self.client.get(reverse('leaderboard'))
+
+        admin = User.objects.create_user('admin', is_staff=True)
+        self.client.force_authenticate(admin)
+        views = self.client.get(reverse('metrics')).data['views']
+        self.assertEqual(views['BoulderViewSet.list']['requests'], 2)
+        self.assertGreater(views['BoulderViewSet.list']['queries_total'], 0)
+        self.assertEqual(views['LeaderboardView.get']['requests'], 1)
+
+    def test_async_views_count_queries_too(self):
+        async_to_sync(AsyncClient().get)(reverse('async-leaderboard'))
+        views = metrics.registry.snapshot()
+        self.assertEqual(views['async_leaderboard']['requests'], 1)
+        self.assertGreater(views['async_leaderboard']['queries_total'], 0)
+
+    def test_endpoints_are_restricted(self):
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics-prometheus')).status_code, 403)
+
+        response = self.client.get(reverse('metrics-prometheus'), HTTP_X_METRICS_TOKEN='scrape-me')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('eq_http_request_duration_milliseconds_bucket{view="MetricsView.get"', response.content.decode())
+
+
+class GymEventTests(LoggerTestData, TestCase):
+
+    def test_broker_delivers_published_events_across_threads(self):
+        broker = InProcessBroker()
+
+        async def listen():
+            subscription = broker.subscribe(self.gym.pk)
+            publisher = threading.Thread(target=broker.publish, args=(self.gym.pk, {'type': 'ping'}))
+            publisher.start()
+            try:
+                return await asyncio.wait_for(subscription.get(), 5)
+            finally:
+                publisher.join()
+                subscription.close()
+
+        self.assertEqual(asyncio.run(listen()), {'type': 'ping'})
+        self.assertEqual(broker.subscribed_gyms(), set())
+
+    def test_ascent_publishes_count_and_position_after_commit(self):
+        published = []
+        broker = get_broker()
+        with mock.patch.object(broker, 'subscribed_gyms', return_value={self.gym.pk}), \
+                mock.patch.object(broker, 'publish', side_effect=lambda gym_id, event: published.append((gym_id, event))):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.log(self.alice, self.l5)
+
+        self.assertEqual(published, [
+            (self.gym.pk, {'type': 'boulder', 'id': self.l5.pk, 'num_ascents': 1}),
+            (self.gym.pk, {'type': 'leaderboard', 'user_id': self.alice.pk, 'total_points': 50, 'rank': 1}),
+        ])
+
+    def test_nothing_is_queried_without_listeners(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.log(self.alice, self.l5)
+        with self.assertNumQueries(0):
+            for callback in callbacks:
+                callback()
+
+    async def test_event_stream_emits_published_events(self):
+        response = await self.async_client.get(reverse('gym-events', args=[self.gym.pk]))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content.__aiter__()
+        self.assertEqual(await anext(stream), b'retry: 5000\n\n')
+
+        get_broker().publish(self.gym.pk, {'type': 'boulder', 'id': self.l5.pk, 'num_ascents': 3})
+        chunk = await asyncio.wait_for(anext(stream), 5)
+        await stream.aclose()
+        self.assertEqual(chunk, f'event: boulder\ndata: {{"type": "boulder", "id": {self.l5.pk}, "num_ascents": 3}}\n\n'.encode())
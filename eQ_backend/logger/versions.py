@@ -0,0 +1,142 @@
+"""Gym version stamps and conditional GET handling.
+
+Each gym carries a ``revision`` counter and ``updated_at`` timestamp that are
+bumped whenever its walls, boulders or ascents change. Read endpoints derive an
+ETag and Last-Modified from those columns alone, so a client that already has
+the current payload gets a 304 without the view touching the ascent tables.
+Changes to individual walls and boulders are also appended to ``ChangeLog``,
+at the revision they bumped, for the delta-sync endpoint.
+"""
+
+import hashlib
+from functools import wraps
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .models import Gym, Wall, Boulder, ChangeLog
+from .cache import invalidate_gym_detail
+
+
+def touch_gyms(gym_ids):
+    """Bump the revision of the given gyms and drop their cached payloads."""
+    gym_ids = {gym_id for gym_id in gym_ids if gym_id is not None}
+    if gym_ids:
+        Gym.objects.filter(pk__in=gym_ids).update(revision=F('revision') + 1, updated_at=timezone.now())
+        invalidate_gym_detail(gym_ids)
+
+
+def record_changes(changes):
+    """Bump the revision of the gyms in ``(gym_id, kind, object_id, action)`` changes and log them at it.
+
+    The UPDATE locks each gym's row until the transaction commits, so a gym's
+    entries become visible in revision order: a client that has seen revision
+    ``T`` can never miss an entry committed later, unlike with sequence ids,
+    which are handed out before commit.
+    """
+    changes = [change for change in changes if change[0] is not None]
+    if not changes:
+        return
+    with transaction.atomic(savepoint=False):
+        touch_gyms(gym_id for gym_id, _, _, _ in changes)
+        ChangeLog.objects.bulk_create([
+            ChangeLog(gym_id=gym_id, kind=kind, object_id=object_id, action=action, revision=Coalesce(
+                Subquery(Gym.objects.filter(pk=gym_id).values('revision')), Value(0),
+            ))
+            for gym_id, kind, object_id, action in changes
+        ])
+
+
+def touch_walls(walls, action=ChangeLog.UPSERT):
+    """Log saved or deleted walls, bumping the revision of their gyms."""
+    record_changes((wall.gym_id, ChangeLog.WALL, wall.pk, action) for wall in walls)
+
+
+def touch_gyms_of_boulders(boulder_ids):
+    """Log the given boulders as updated, bumping the revision of their gyms."""
+    touch_boulders(dict(Boulder.objects.filter(pk__in=set(boulder_ids)).values_list('pk', 'wall__gym_id')))
+
+
+def touch_boulders(boulder_gyms):
+    """Like ``touch_gyms_of_boulders`` for callers that already know ``{boulder_id: gym_id}``."""
+    record_changes((gym_id, ChangeLog.BOULDER, boulder_id, ChangeLog.UPSERT) for boulder_id, gym_id in boulder_gyms.items())
+
+
+def remove_boulders_from_walls(boulder_walls):
+    """Log ``{boulder_id: wall_id}`` boulders as gone from those walls' gyms, bumping their revision.
+
+    Used for deleted boulders and for boulders moved off a wall; a move
+    within the same gym is superseded by the upsert logged after it.
+    """
+    gym_ids = dict(Wall.objects.filter(pk__in=set(boulder_walls.values())).values_list('pk', 'gym_id'))
+    record_changes(
+        (gym_ids.get(wall_id), ChangeLog.BOULDER, boulder_id, ChangeLog.DELETE)
+        for boulder_id, wall_id in boulder_walls.items()
+    )
+
+
+def gym_version(gym_id):
+    """Return ``(token, last_modified)`` for one gym, or None if it does not exist."""
+    try:
+        version = Gym.objects.filter(pk=gym_id).values_list('revision', 'updated_at').first()
+    except (TypeError, ValueError):
+        return None
+    if version is None:
+        return None
+    revision, updated_at = version
+    return f'gym-{gym_id}-{revision}-{updated_at.timestamp()}', updated_at
+
+
+def all_gyms_version():
+    """Return ``(token, last_modified)`` covering every gym."""
+    version = Gym.objects.aggregate(count=Count('pk'), revision=Sum('revision'), updated_at=Max('updated_at'))
+    updated_at = version['updated_at']
+    token = f"gyms-{version['count']}-{version['revision']}-{updated_at.timestamp() if updated_at else 0}"
+    return token, updated_at
+
+
+def gym_list_version():
+    """Return ``(token, None)`` for the gym list, which only shows the gym rows themselves.
+
+    Unlike ``all_gyms_version`` it ignores revisions, so ascents and boulder
+    edits do not invalidate it.
+    """
+    rows = Gym.objects.order_by('pk').values_list('pk', 'name')
+    return 'gym-list-' + hashlib.md5(repr(list(rows)).encode()).hexdigest(), None
+
+
+def conditional_get(version):
+    """Decorate a DRF handler to answer If-None-Match / If-Modified-Since with 304.
+
+    ``version(request, *args, **kwargs)`` returns ``(token, last_modified)``
+    or None to skip the check. The ETag also covers the full path and the
+    requesting user, since responses embed per-user fields.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            stamp = version(request, *args, **kwargs)
+            if stamp is None:
+                return handler(self, request, *args, **kwargs)
+            token, last_modified = stamp
+            user_id = request.user.pk if request.user and request.user.is_authenticated else 0
+            digest = hashlib.md5(f'{request.get_full_path()}|{user_id}|{token}'.encode()).hexdigest()
+            etag = quote_etag(digest)
+            last_modified = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = handler(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_vary_headers(response, ('Authorization',))
+            return response
+        return wrapper
+    return decorator
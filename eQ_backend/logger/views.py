@@ -1,17 +1,82 @@
+import asyncio
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+
 
 from rest_framework import viewsets, mixins, status
 from rest_framework.views import APIView
+from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.request import Request
+from rest_framework.reverse import reverse
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.pagination import LimitOffsetPagination
+from django.core.serializers.json import DjangoJSONEncoder
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db import transaction
+from django.utils.dateparse import parse_date
+from django.db import transaction, IntegrityError
+from django.db.models import F, Q, Count, Sum
+from django.db.models.functions import Coalesce
 
 from .models import Gym, Wall, Boulder, Ascent
-from .serializers import GymSerializer, WallSerializer, BoulderSerializer, AscentSerializer
+from .serializers import GymSerializer, WallSerializer, BoulderSerializer, AscentSerializer, AscentSerializerWithoutBoulder, BoulderRegradeSerializer, WallResetSerializer, sent_boulder_ids, build_gym_detail, boulder_rows, boulder_ascents, BOULDER_ROW_FIELDS, DETAIL_ASCENTS
+from .services import regrade_boulders, log_ascents, reset_wall
+from .leaderboard import leaderboard_queryset, user_position, ranked_entries, auser_position, aranked_entries
+from .cache import aget_gym_detail
+from .versions import conditional_get, gym_version, all_gyms_version, gym_list_version
+from .events import get_broker
+from .changes import gym_changes
+from .filters import BoulderFilter
+from .pagination import KeysetPagination
+
+
+def _all_gyms_version(request, *args, **kwargs):
+	return all_gyms_version()
+
+
+def _gym_list_version(request, *args, **kwargs):
+	return gym_list_version()
+
+
+def _gym_version(request, *args, pk=None, **kwargs):
+	return gym_version(pk)
+
+
+def _leaderboard_version(request, *args, **kwargs):
+	gym_id = request.query_params.get('gym_id')
+	return gym_version(gym_id) if gym_id else all_gyms_version()
+
 
 class GymViewSet(viewsets.ModelViewSet):
-	queryset = Gym.objects.all()
+	queryset = Gym.objects.order_by('id')
 	serializer_class = GymSerializer
 
+	@conditional_get(_gym_list_version)
+	def list(self, request, *args, **kwargs):
+		return super().list(request, *args, **kwargs)
+
+	@conditional_get(_gym_version)
+	def retrieve(self, request, *args, **kwargs):
+		return super().retrieve(request, *args, **kwargs)
+
+	@action(detail=True, methods=['get'])
+	def changes(self, request, pk=None):
+		"""Walls and boulders changed since the ``since`` change token; see logger.changes."""
+		since = request.query_params.get('since')
+		if since is not None:
+			try:
+				since = int(since)
+				if since < 0:
+					raise ValueError
+			except ValueError:
+				return Response({'detail': 'since must be a change token.'}, status=status.HTTP_400_BAD_REQUEST)
+		return Response(gym_changes(request, self.get_object(), since))
+
 
 class WallViewSet(mixins.CreateModelMixin,
 				  mixins.UpdateModelMixin,
@@ -27,6 +92,26 @@ class WallViewSet(mixins.CreateModelMixin,
 		gym_id = self.kwargs.get('gym_pk')
 		serializer.save(gym_id=gym_id)
 
+	@action(detail=True, methods=['post'])
+	def reset(self, request, gym_pk=None, pk=None):
+		"""Retire every active boulder on the wall and set a new batch in one transaction.
+
+		POST body: {"boulders": [{"setter_grade": "L3", "color": "red", ...}, ...]}
+		"""
+		wall = self.get_object()
+		serializer = WallResetSerializer(data=request.data, context={'wall': wall})
+		serializer.is_valid(raise_exception=True)
+		try:
+			result = reset_wall(wall, serializer.validated_data['boulders'])
+		except IntegrityError:
+			return Response({'detail': 'Reset would duplicate a grade and color on this wall.'}, status=status.HTTP_400_BAD_REQUEST)
+		return Response(result, status=status.HTTP_200_OK)
+
+
+class BoulderAscentPagination(KeysetPagination):
+	date_field = 'date_climbed'
+	page_size = DETAIL_ASCENTS
+
 
 class BoulderViewSet(mixins.ListModelMixin,
 					 mixins.RetrieveModelMixin,
@@ -34,17 +119,66 @@ class BoulderViewSet(mixins.ListModelMixin,
 					 mixins.UpdateModelMixin,
 					 mixins.DestroyModelMixin,
 					 viewsets.GenericViewSet):
-	queryset = Boulder.objects.all()
+	queryset = Boulder.objects.select_related('wall').order_by('id')
 	serializer_class = BoulderSerializer
+	# Newest first, on (date_set, id), so deep pages cost the same as the first
+	pagination_class = KeysetPagination
+	filter_backends = [BoulderFilter]
+	lookup_value_regex = r'\d+'
 
+	@conditional_get(_all_gyms_version)
+	def list(self, request, *args, **kwargs):
+		# Read-only fast path: plain rows in BoulderSerializer's shape, no model instances
+		queryset = self.filter_queryset(self.get_queryset()).values(*BOULDER_ROW_FIELDS)
+		page = self.paginate_queryset(queryset)
+		sent = sent_boulder_ids(request, boulder_id__in=[row['id'] for row in page])
+		return self.get_paginated_response(boulder_rows(page, sent))
 
-class BoulderAscentView(APIView):
-	"""Handle POST to create an ascent for the given boulder and
-	DELETE to remove the authenticated user's ascent for the boulder.
+	def get_serializer_context(self):
+		context = super().get_serializer_context()
+		if self.action == 'retrieve':
+			context['sent_boulder_ids'] = sent_boulder_ids(self.request, boulder_id=self.kwargs['pk'])
+		return context
 
-	POST body should include 'ascent_type' (one of Ascent.ASCENT_TYPES keys).
-	The view will create an Ascent and increment Boulder.num_ascents.
-	"""
+	def retrieve(self, request, *args, **kwargs):
+		boulder = self.get_object()
+		# Embed the newest page of ascents and link to the next one on the ascents endpoint
+		paginator = BoulderAscentPagination()
+		page = paginator.paginate_queryset(boulder_ascents(boulder.pk), request, view=self)
+		paginator.base_url = reverse('boulders-ascents', args=[boulder.pk], request=request)
+		context = dict(self.get_serializer_context(), ascents_page=page)
+		data = self.get_serializer_class()(boulder, context=context).data
+		data['ascents_next'] = paginator.get_next_link()
+		return Response(data)
+
+	@action(detail=True)
+	def ascents(self, request, pk=None):
+		"""The boulder's ascents with their climbers, newest first, cursor-paginated."""
+		paginator = BoulderAscentPagination()
+		page = paginator.paginate_queryset(boulder_ascents(pk), request, view=self)
+		if not page and not Boulder.objects.filter(pk=pk).exists():
+			raise Http404
+		return paginator.get_paginated_response(AscentSerializerWithoutBoulder(page, many=True).data)
+
+	@action(detail=False, methods=['post'])
+	def regrade(self, request):
+		"""Regrade many boulders at once.
+
+		POST body: {"boulders": [{"id": <boulder id>, "setter_grade": "L4"}, ...]}
+		Ascent points and leaderboard scores are recomputed with set-based updates.
+		"""
+		serializer = BoulderRegradeSerializer(data=request.data)
+		serializer.is_valid(raise_exception=True)
+		grades = {item['id']: item['setter_grade'] for item in serializer.validated_data['boulders']}
+		try:
+			updated = regrade_boulders(grades)
+		except IntegrityError:
+			return Response({'detail': 'Regrade would duplicate a grade and color on the same wall.'}, status=status.HTTP_400_BAD_REQUEST)
+		return Response({'updated': updated}, status=status.HTTP_200_OK)
+
+
+class ClimberMixin:
+	"""Resolve the climber an ascent request acts for."""
 
 	def _get_climber(self, request):
 		# Prefer authenticated user; fall back to explicit climber id in body
@@ -57,31 +191,59 @@ class BoulderAscentView(APIView):
 			return get_object_or_404(User, pk=climber_id)
 		return None
 
+
+def _compact(request):
+	return request.query_params.get('compact', '').lower() in ('1', 'true')
+
+
+class BoulderAscentView(ClimberMixin, APIView):
+	"""Handle POST to create an ascent for the given boulder and
+	DELETE to remove the authenticated user's ascent for the boulder.
+
+	POST body should include 'ascent_type' (one of Ascent.ASCENT_TYPES keys).
+	The view will create an Ascent and increment Boulder.num_ascents.
+
+	With ``?compact=1`` both respond with just
+	``{ascent_id, num_ascents, user_has_sent}`` instead of the full ascent and boulder.
+	"""
+
 	@transaction.atomic
 	def post(self, request, pk):
-		boulder = get_object_or_404(Boulder, pk=pk)
+		compact = _compact(request)
+		# The grade sets the points and the gym and activity pick the leaderboard rows; the full response also renders the wall
+		boulders = Boulder.objects.select_related('wall')
+		if compact:
+			boulders = boulders.only('setter_grade', 'is_active', 'wall__gym_id')
+		boulder = get_object_or_404(boulders, pk=pk)
 		climber = self._get_climber(request)
 		if climber is None:
 			return Response({'detail': 'Authentication required or provide climber id.'}, status=status.HTTP_401_UNAUTHORIZED)
 
-		# Check if ascent already exists (unique_together)
-		if Ascent.objects.filter(climber=climber, boulder=boulder).exists():
-			return Response({'detail': 'Ascent already exists for this climber and boulder.'}, status=status.HTTP_400_BAD_REQUEST)
-
 		ascent_type = request.data.get('ascent_type')
 		if not ascent_type:
 			return Response({'detail': 'Missing ascent_type.'}, status=status.HTTP_400_BAD_REQUEST)
 
 		ascent = Ascent(climber=climber, boulder=boulder, ascent_type=ascent_type)
 		ascent.points = ascent.calculate_points()
-		ascent.save()
+		try:
+			# Let unique_together decide, so concurrent taps cannot both pass a check
+			with transaction.atomic():
+				ascent.save()
+		except IntegrityError:
+			return Response({'detail': 'Ascent already exists for this climber and boulder.'}, status=status.HTTP_400_BAD_REQUEST)
+
+		# The `post_save` signal in `logger.signals` incremented `num_ascents` and stashed the new value
+		num_ascents = ascent._boulder_num_ascents
+		if compact:
+			return Response({
+				'ascent_id': ascent.pk,
+				'num_ascents': num_ascents,
+				'user_has_sent': True,
+			}, status=status.HTTP_201_CREATED)
 
-		# The `post_save` signal in `logger.signals` will update `num_ascents`.
 		ascent_serializer = AscentSerializer(ascent, context={'request': request})
-		
-		# Refresh boulder from DB to get updated num_ascents
-		boulder.refresh_from_db()
-		boulder_serializer = BoulderSerializer(boulder, context={'request': request})
+		boulder.num_ascents = num_ascents
+		boulder_serializer = BoulderSerializer(boulder, context={'request': request, 'sent_boulder_ids': {boulder.pk}})
 		
 		return Response({
 			'ascent': ascent_serializer.data,
@@ -90,165 +252,260 @@ class BoulderAscentView(APIView):
 
 	@transaction.atomic
 	def delete(self, request, pk):
-		boulder = get_object_or_404(Boulder, pk=pk)
 		climber = getattr(request, 'user', None)
-		if climber and climber.is_authenticated:
-			ascent_qs = Ascent.objects.filter(climber=climber, boulder=boulder)
-		else:
+		if not (climber and climber.is_authenticated):
 			# Allow passing climber id in body for deletion if unauthenticated
 			climber_id = request.data.get('climber') if hasattr(request, 'data') else None
 			if not climber_id:
 				return Response({'detail': 'Authentication required or provide climber id.'}, status=status.HTTP_401_UNAUTHORIZED)
 			from django.contrib.auth.models import User
 			climber = get_object_or_404(User, pk=climber_id)
-			ascent_qs = Ascent.objects.filter(climber=climber, boulder=boulder)
 
-		ascent = ascent_qs.first()
+		# No ascent also covers a missing boulder; its wall tells the signals which gym to update
+		ascent = Ascent.objects.select_related('boulder__wall').filter(climber=climber, boulder_id=pk).first()
 		if not ascent:
 			return Response({'detail': 'Ascent not found.'}, status=status.HTTP_404_NOT_FOUND)
 
+		ascent_id = ascent.pk
 		ascent.delete()
 
-		# `post_delete` signal in `logger.signals` will decrement `num_ascents`.
-		# Refresh boulder from DB to get updated num_ascents
-		boulder.refresh_from_db()
-		boulder_serializer = BoulderSerializer(boulder, context={'request': request})
+		# `post_delete` signal in `logger.signals` decremented `num_ascents` and stashed the new value
+		if _compact(request):
+			return Response({
+				'ascent_id': ascent_id,
+				'num_ascents': ascent._boulder_num_ascents or 0,
+				'user_has_sent': False,
+			}, status=status.HTTP_200_OK)
+
+		boulder = ascent.boulder
+		boulder.num_ascents = ascent._boulder_num_ascents or 0
+		boulder_serializer = BoulderSerializer(boulder, context={'request': request, 'sent_boulder_ids': frozenset()})
 		
 		return Response({'boulder': boulder_serializer.data}, status=status.HTTP_200_OK)
 
 
+class AscentBatchView(ClimberMixin, APIView):
+	"""Log many ascents in one request, e.g. a session recorded offline.
+
+	POST body: {"ascents": [{"boulder": <boulder id>, "ascent_type": "flash"}, ...]}
+	Returns one result per item with status 'created', 'duplicate',
+	'not_found' or 'invalid'.
+	"""
+	max_items = 500
+
+	def post(self, request):
+		climber = self._get_climber(request)
+		if climber is None:
+			return Response({'detail': 'Authentication required or provide climber id.'}, status=status.HTTP_401_UNAUTHORIZED)
+
+		items = request.data.get('ascents')
+		if not isinstance(items, list) or not items:
+			return Response({'detail': 'ascents must be a non-empty list.'}, status=status.HTTP_400_BAD_REQUEST)
+		if len(items) > self.max_items:
+			return Response({'detail': f'At most {self.max_items} ascents per batch.'}, status=status.HTTP_400_BAD_REQUEST)
+
+		results = log_ascents(climber, items)
+		created = sum(1 for result in results if result['status'] == 'created')
+		return Response({'created': created, 'results': results}, status=status.HTTP_200_OK)
+
+
+class LeaderboardPagination(LimitOffsetPagination):
+	default_limit = 100
+	max_limit = 500
+
+
+def leaderboard_page(request, count):
+	"""Return ``(offset, limit, next_link, previous_link)`` for a leaderboard of ``count`` entries.
+
+	Uses the DRF paginator for parameter parsing and links, but not for the query.
+	"""
+	paginator = LeaderboardPagination()
+	paginator.request = request
+	paginator.limit = paginator.get_limit(request)
+	paginator.offset = paginator.get_offset(request)
+	paginator.count = count
+	return paginator.offset, paginator.limit, paginator.get_next_link(), paginator.get_previous_link()
+
+
+def _date_param(query_params, name):
+	value = query_params.get(name)
+	if not value:
+		return None
+	try:
+		parsed = parse_date(value)
+	except ValueError:
+		parsed = None
+	if parsed is None:
+		raise ValueError(f'{name} must be a date (YYYY-MM-DD).')
+	return parsed
+
+
+def leaderboard_params(query_params):
+	"""Parse the leaderboard query string into ``(gym_id, only_active, around_me, date_from, date_to)``.
+	
+	Raises ValueError with a client-facing message for a bad ``around_me`` or date.
+	"""
+	# Check if we should only count active boulders
+	only_active = query_params.get('only_active', 'false').lower() == 'true'
+	
+	# Check if we should filter by gym
+	gym_id = query_params.get('gym_id') or None
+	
+	around_me = query_params.get('around_me')
+	if around_me is not None:
+		try:
+			around_me = min(int(around_me), LeaderboardPagination.max_limit // 2)
+		except ValueError:
+			raise ValueError('around_me must be an integer.')
+		if around_me < 0:
+			raise ValueError('around_me must not be negative.')
+	
+	# Optional inclusive date range, e.g. this week or this season
+	date_from = _date_param(query_params, 'from')
+	date_to = _date_param(query_params, 'to')
+	if date_from and date_to and date_from > date_to:
+		raise ValueError('from must not be after to.')
+	return gym_id, only_active, around_me, date_from, date_to
+
+
+class LeaderboardQuery:
+	"""A parsed leaderboard request, shared by LeaderboardView and async_leaderboard.
+	
+	The views only run the queries, sync or async; ``window`` picks the slice
+	to rank and ``payload`` builds the response body. Raises ValueError with a
+	client-facing message for bad query parameters.
+	"""
+	
+	def __init__(self, request, user):
+		self.request = request
+		gym_id, only_active, self.around_me, date_from, date_to = leaderboard_params(request.query_params)
+		# Keyword arguments for leaderboard_queryset, user_position and ranked_entries
+		self.scope = {'gym_id': gym_id, 'only_active': only_active, 'date_from': date_from, 'date_to': date_to}
+		self.user_id = user.id if user and user.is_authenticated else None
+		self.next_link = self.previous_link = None
+	
+	def window(self, count, position):
+		"""Return ``(offset, limit)``: ``around_me`` entries either side of ``position``, or the requested page."""
+		if self.around_me is not None and position is not None:
+			offset = max(position['index'] - 1 - self.around_me, 0)
+			return offset, position['index'] + self.around_me - offset
+		offset, limit, self.next_link, self.previous_link = leaderboard_page(self.request, count)
+		return offset, limit
+	
+	def payload(self, count, entries, position):
+		return {
+			'count': count,
+			'next': self.next_link,
+			'previous': self.previous_link,
+			'leaderboard': entries,
+			'your_ranking': position['rank'] if position else None,
+			'your_index': position['index'] if position else None,
+			'your_user_id': self.user_id
+		}
+
+
 class LeaderboardView(APIView):
 	"""Returns a ranked list of climbers by total points.
 	
 	Query parameters:
 	- only_active: If 'true', only counts ascents of active boulders
 	- gym_id: If provided, only counts ascents from boulders in that gym
+	- limit / offset: Page through the leaderboard (default 100 entries)
+	- around_me: If provided, return this many entries above and below the
+	  authenticated user instead of a page
+	- from / to: If provided (YYYY-MM-DD, inclusive), only counts ascents
+	  climbed in that date range
 	"""
 	
+	@conditional_get(_leaderboard_version)
 	def get(self, request):
-		from django.contrib.auth.models import User
-		from django.db.models import Sum, Q, Max
-		
-		# Check if we should only count active boulders
-		only_active = request.query_params.get('only_active', 'false').lower() == 'true'
-		
-		# Check if we should filter by gym
-		gym_id = request.query_params.get('gym_id')
+		try:
+			query = LeaderboardQuery(request, request.user)
+		except ValueError as exc:
+			return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 		
-		# Build the filter conditionally
-		filters = Q()
-		if only_active:
-			filters &= Q(ascents__boulder__is_active=True)
-		if gym_id:
-			filters &= Q(ascents__boulder__wall__gym_id=gym_id)
-		
-		# Build the annotation with most recent ascent for tie-breaking
-		if filters:
-			leaderboard = User.objects.annotate(
-				total_points=Sum('ascents__points', filter=filters),
-				most_recent_ascent=Max('ascents__date_climbed', filter=filters)
-			).filter(
-				total_points__isnull=False
-			).order_by('-total_points', '-most_recent_ascent').values(
-				'id', 'username', 'first_name', 'last_name', 'total_points', 'most_recent_ascent'
-			)
-		else:
-			leaderboard = User.objects.annotate(
-				total_points=Sum('ascents__points'),
-				most_recent_ascent=Max('ascents__date_climbed')
-			).filter(
-				total_points__isnull=False
-			).order_by('-total_points', '-most_recent_ascent').values(
-				'id', 'username', 'first_name', 'last_name', 'total_points', 'most_recent_ascent'
-			)
-		
-		# Add index and rank (rank handles ties)
-		leaderboard_list = list(leaderboard)
-		current_rank = 1
-		for idx, entry in enumerate(leaderboard_list, start=1):
-			entry['index'] = idx
-			
-			# If this is not the first entry, check for tie with previous
-			if idx > 1 and entry['total_points'] == leaderboard_list[idx - 2]['total_points']:
-				# Tie: use same rank as previous entry
-				entry['rank'] = leaderboard_list[idx - 2]['rank']
-			else:
-				# New rank: use current index
-				entry['rank'] = idx
-			
-			# Don't include most_recent_ascent in response (just used for sorting)
-			del entry['most_recent_ascent']
-		
-		# Find the authenticated user's ranking and ID
-		your_ranking = None
-		your_user_id = None
-		if request.user and request.user.is_authenticated:
-			your_user_id = request.user.id
-			for entry in leaderboard_list:
-				if entry['id'] == request.user.id:
-					your_ranking = entry['rank']
-					break
-		
-		return Response({
-			'leaderboard': leaderboard_list,
-			'your_ranking': your_ranking,
-			'your_user_id': your_user_id
-		})
+		# Scores are maintained per scope by `logger.signals`, so this is an indexed ordered scan
+		# and the user's ranking is found by counting the climbers ahead of them
+		position = user_position(**query.scope, user_id=query.user_id) if query.user_id else None
+		count = leaderboard_queryset(**query.scope).count()
+		offset, limit = query.window(count, position)
+		# The database attaches index and rank (rank handles ties)
+		return Response(query.payload(count, ranked_entries(offset, limit, **query.scope), position))
+
+
+def ascent_history(user):
+	"""The user's ascents as flat rows, newest first, without loading model instances."""
+	return Ascent.objects.filter(climber=user).values(
+		'id',
+		'boulder_id',
+		'ascent_type',
+		'date_climbed',
+		'points',
+		boulder_grade=F('boulder__setter_grade'),
+		boulder_color=F('boulder__color'),
+		wall_name=F('boulder__wall__name'),
+		gym_name=F('boulder__wall__gym__name'),
+	)
+
+
+class AscentHistoryPagination(KeysetPagination):
+	date_field = 'date_climbed'
+	page_size = 50
+
+
+def profile_info(user):
+	"""The user's basic account fields, as returned by the profile endpoints."""
+	return {
+		'id': user.id,
+		'username': user.username,
+		'email': user.email,
+		'first_name': user.first_name,
+		'last_name': user.last_name,
+	}
+
+
+def profile_stats():
+	"""Aggregates over a user's ascents for the profile ``stats`` block."""
+	return {
+		'total_ascents': Count('id'),
+		'total_points': Coalesce(Sum('points'), 0),
+		'flash_count': Count('id', filter=Q(ascent_type='flash')),
+		'send_count': Count('id', filter=Q(ascent_type='send')),
+	}
 
 
 class UserProfileView(APIView):
-	"""Returns the authenticated user's profile with ascent history and stats."""
+	"""Returns the authenticated user's profile with ascent stats.
+	
+	The ascent history itself is served page by page from UserAscentHistoryView.
+	"""
 	
 	def get(self, request):
 		user = request.user
 		if not user.is_authenticated:
 			return Response({'detail': 'Authentication required.'}, status=status.HTTP_401_UNAUTHORIZED)
 		
-		# User basic info
-		profile = {
-			'id': user.id,
-			'username': user.username,
-			'email': user.email,
-			'first_name': user.first_name,
-			'last_name': user.last_name,
-		}
+		profile = profile_info(user)
 		
-		# Get user's ascents
-		ascents = Ascent.objects.filter(climber=user).select_related('boulder', 'boulder__wall', 'boulder__wall__gym')
-		ascent_data = []
-		total_points = 0
-		flash_count = 0
-		send_count = 0
-		
-		for ascent in ascents:
-			ascent_data.append({
-				'id': ascent.id,
-				'boulder_id': ascent.boulder.id,
-				'boulder_grade': ascent.boulder.setter_grade,
-				'boulder_color': ascent.boulder.color,
-				'wall_name': ascent.boulder.wall.name,
-				'gym_name': ascent.boulder.wall.gym.name,
-				'ascent_type': ascent.ascent_type,
-				'date_climbed': ascent.date_climbed,
-				'points': ascent.points,
-			})
-			total_points += ascent.points
-			if ascent.ascent_type == 'flash':
-				flash_count += 1
-			elif ascent.ascent_type == 'send':
-				send_count += 1
-		
-		profile['ascents'] = ascent_data
-		profile['stats'] = {
-			'total_ascents': len(ascent_data),
-			'total_points': total_points,
-			'flash_count': flash_count,
-			'send_count': send_count,
-		}
+		# All stats in one conditional-aggregate query
+		profile['stats'] = Ascent.objects.filter(climber=user).aggregate(**profile_stats())
 		
 		return Response(profile)
 
 
+class UserAscentHistoryView(APIView):
+	"""Returns the authenticated user's ascents, newest first, cursor-paginated."""
+	
+	def get(self, request):
+		user = request.user
+		if not user.is_authenticated:
+			return Response({'detail': 'Authentication required.'}, status=status.HTTP_401_UNAUTHORIZED)
+		
+		paginator = AscentHistoryPagination()
+		page = paginator.paginate_queryset(ascent_history(user), request, view=self)
+		return paginator.get_paginated_response(page)
+
+
 class LogoutView(APIView):
 	"""Logout endpoint for token blacklisting (if using token blacklist) or just client-side token removal."""
 	
@@ -257,3 +514,106 @@ class LogoutView(APIView):
 		# If using djangorestframework-simplejwt with token blacklist, you could blacklist the refresh token here
 		# For now, we'll just return a success response
 		return Response({'detail': 'Logout successful.'}, status=status.HTTP_200_OK)
+
+
+# Seconds between keep-alive comments on an idle event stream
+EVENT_STREAM_HEARTBEAT = 15
+
+
+async def gym_events(request, pk):
+	"""Server-Sent Events stream of live changes in one gym.
+
+	Emits 'boulder' events ({id, num_ascents}) and 'leaderboard' events
+	({user_id, total_points, rank}) as ascents are logged. Needs an ASGI server
+	(see eQ_backend/asgi.py); under WSGI the stream would never flush.
+	"""
+	if not await Gym.objects.filter(pk=pk).aexists():
+		raise Http404
+
+	async def stream():
+		subscription = get_broker().subscribe(pk)
+		try:
+			yield 'retry: 5000\n\n'
+			while True:
+				try:
+					event = await asyncio.wait_for(subscription.get(), EVENT_STREAM_HEARTBEAT)
+				except asyncio.TimeoutError:
+					yield ': keep-alive\n\n'
+					continue
+				yield f"event: {event['type']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+		finally:
+			subscription.close()
+
+	response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+	response['Cache-Control'] = 'no-cache'
+	# Stop nginx-style proxies from buffering the stream
+	response['X-Accel-Buffering'] = 'no'
+	return response
+
+
+# Async twins of the read-heavy endpoints, for ASGI deployments (see eQ_backend/asgi.py).
+# They return the same JSON as the DRF views but await the database instead of
+# holding a worker thread for the whole request.
+
+def async_api_view(view):
+	"""Make an async view GET-only and authenticate it with the API's JWT bearer tokens."""
+	@wraps(view)
+	async def wrapper(request, *args, **kwargs):
+		if request.method not in ('GET', 'HEAD'):
+			return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+		try:
+			authenticated = await sync_to_async(JWTAuthentication().authenticate)(request)
+		except APIException as exc:
+			detail = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+			return JsonResponse(detail, status=exc.status_code)
+		request.user = authenticated[0] if authenticated else AnonymousUser()
+		return await view(request, *args, **kwargs)
+	return wrapper
+
+
+@async_api_view
+async def async_leaderboard(request):
+	"""Async version of LeaderboardView, taking the same query parameters."""
+	try:
+		query = LeaderboardQuery(Request(request), request.user)
+	except ValueError as exc:
+		return JsonResponse({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+	
+	position = await auser_position(**query.scope, user_id=query.user_id) if query.user_id else None
+	count = await leaderboard_queryset(**query.scope).acount()
+	offset, limit = query.window(count, position)
+	return JsonResponse(query.payload(count, await aranked_entries(offset, limit, **query.scope), position))
+
+
+@async_api_view
+async def async_gym_detail(request, pk):
+	"""Async version of the gym detail endpoint, sharing its cached walls and boulders."""
+	try:
+		gym = await Gym.objects.aget(pk=pk)
+	except Gym.DoesNotExist:
+		return JsonResponse({'detail': 'No Gym matches the given query.'}, status=status.HTTP_404_NOT_FOUND)
+	
+	rep = dict(GymSerializer(gym).data)
+	detail = await aget_gym_detail(gym.pk, sync_to_async(lambda: build_gym_detail(gym)))
+	sent = set()
+	if request.user.is_authenticated:
+		sent = {
+			boulder_id async for boulder_id in Ascent.objects.filter(
+				climber=request.user, boulder__wall__gym=gym
+			).values_list('boulder_id', flat=True)
+		}
+	rep['walls'] = detail['walls']
+	rep['boulders'] = [dict(boulder, user_has_sent=boulder['id'] in sent) for boulder in detail['boulders']]
+	return JsonResponse(rep)
+
+
+@async_api_view
+async def async_profile(request):
+	"""Async version of UserProfileView."""
+	user = request.user
+	if not user.is_authenticated:
+		return JsonResponse({'detail': 'Authentication required.'}, status=status.HTTP_401_UNAUTHORIZED)
+	
+	profile = profile_info(user)
+	profile['stats'] = await Ascent.objects.filter(climber=user).aaggregate(**profile_stats())
+	return JsonResponse(profile)